@@ -0,0 +1,366 @@
+import numpy as np
+
+
+class ArrayMinion:
+    """A lightweight handle on one minion of an ArrayMinionRoster.
+
+    It has the same properties as a Minion, but reads and writes the
+    roster's arrays instead of holding anything itself.
+    """
+
+    __slots__ = ("_army", "_seat")
+
+    def __init__(self, army, seat: int):
+        self._army = army
+        self._seat = seat
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, ArrayMinion)
+            and other._army is self._army
+            and other._seat == self._seat
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self._army), self._seat))
+
+    @property
+    def _roster(self):
+        return self._army
+
+    @property
+    def name(self) -> str:
+        return self._army._names[self._army._index(self._seat)]
+
+    @property
+    def max_hp(self) -> int:
+        return int(self._army._max_hp[self._army._index(self._seat)])
+
+    @max_hp.setter
+    def max_hp(self, amt) -> None:
+        if amt <= 0:
+            raise ValueError("Minion tried to set an invalid max HP.")
+
+        i = self._army._index(self._seat)
+        self._army._max_hp[i] = amt
+        if amt < self._army._hp[i]:
+            self.hp = amt
+
+    @property
+    def hp(self) -> int:
+        return int(self._army._hp[self._army._index(self._seat)])
+
+    @hp.setter
+    def hp(self, new_hp) -> None:
+        self._army._set_hp(self._army._index(self._seat), new_hp)
+
+    @property
+    def damage(self) -> int:
+        return int(self._army._damage[self._army._index(self._seat)])
+
+    @damage.setter
+    def damage(self, amt) -> None:
+        if amt <= 0:
+            raise ValueError("Minion tried to set an invalid damage.")
+        self._army._set_damage(self._army._index(self._seat), amt)
+
+    @property
+    def attacking(self) -> bool:
+        return bool(self._army._attacking[self._army._index(self._seat)])
+
+    @attacking.setter
+    def attacking(self, mode: bool) -> None:
+        self._army._set_role(self._army._index(self._seat), mode)
+
+    @property
+    def defending(self) -> bool:
+        return not self.attacking
+
+    @defending.setter
+    def defending(self, mode: bool) -> None:
+        self._army._set_role(self._army._index(self._seat), not mode)
+
+
+class ArrayMinionRoster:
+    """A MinionRoster for very large armies, stored as NumPy arrays.
+
+    HP, max HP, damage and role are kept in one array each instead of one
+    Minion object per minion. It offers the same interface as MinionRoster;
+    indexing or iterating hands out ArrayMinion handles. Blows are spread
+    over the defenders with a running total instead of a loop, and healing
+    is a single assignment.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self._size = 0
+
+        self._seats = np.zeros(capacity, dtype=np.int64)
+        self._hp = np.zeros(capacity, dtype=np.int64)
+        self._max_hp = np.zeros(capacity, dtype=np.int64)
+        self._damage = np.zeros(capacity, dtype=np.int64)
+        self._attacking = np.zeros(capacity, dtype=bool)
+        self._names = []
+
+        self._next_seat = 0
+
+        self._attacking_count = 0
+        self._attack_damage = 0
+        self._living_defenders = 0
+        self._defense_hp = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self):
+        for seat in self._seats[: self._size].tolist():
+            yield ArrayMinion(self, seat)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            seats = self._seats[: self._size][index]
+            return [ArrayMinion(self, int(s)) for s in seats]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("minion index out of range")
+        return ArrayMinion(self, int(self._seats[index]))
+
+    def __contains__(self, minion) -> bool:
+        return isinstance(minion, ArrayMinion) and minion._army is self
+
+    @property
+    def attackers(self) -> list:
+        """Attacking minions, in roster order."""
+        rows = np.flatnonzero(self._attacking[: self._size])
+        return [ArrayMinion(self, int(s)) for s in self._seats[rows]]
+
+    @property
+    def defenders(self) -> list:
+        """Defending minions, in roster order. Includes those at 0 HP."""
+        rows = np.flatnonzero(~self._attacking[: self._size])
+        return [ArrayMinion(self, int(s)) for s in self._seats[rows]]
+
+    @property
+    def attacking_count(self) -> int:
+        return self._attacking_count
+
+    @property
+    def defending_count(self) -> int:
+        """Defending minions that can still take a hit."""
+        return self._living_defenders
+
+    @property
+    def attack_damage(self) -> int:
+        """Damage dealt by all attacking minions together."""
+        return self._attack_damage
+
+    @property
+    def defense_hp(self) -> int:
+        """HP of all defending minions that can still take a hit."""
+        return self._defense_hp
+
+    def add(self, minion) -> None:
+        """Copy a new Minion into the army."""
+
+        if self._size == len(self._seats):
+            self._grow()
+
+        i = self._size
+        self._seats[i] = self._next_seat
+        self._hp[i] = minion.hp
+        self._max_hp[i] = minion.max_hp
+        self._damage[i] = minion.damage
+        self._attacking[i] = minion.attacking
+        self._names.append(minion.name)
+
+        self._next_seat += 1
+        self._size += 1
+        self._count(i, 1)
+
+    def remove(self, minion) -> None:
+        if minion not in self:
+            raise ValueError(
+                "Tried to remove a minion that wasn't already in the minions list."
+            )
+
+        i = self._index(minion._seat)
+        self._count(i, -1)
+
+        n = self._size
+        columns = (self._seats, self._hp, self._max_hp, self._damage, self._attacking)
+        for column in columns:
+            column[i : n - 1] = column[i + 1 : n]
+        del self._names[i]
+        self._size -= 1
+
+    def get_columns(self) -> tuple:
+        """The whole army as (names, hp, max_hp, damage, attacking) lists,
+        in roster order."""
+
+        n = self._size
+        return (
+            list(self._names),
+            self._hp[:n].tolist(),
+            self._max_hp[:n].tolist(),
+            self._damage[:n].tolist(),
+            self._attacking[:n].tolist(),
+        )
+
+    def set_columns(self, columns: tuple, master) -> None:
+        """Fill an empty roster from get_columns()'s lists. Array minions
+        keep no reference to their master, so master is not used."""
+
+        if self._size > 0:
+            raise ValueError("Tried to fill a roster that already has minions.")
+
+        names, hp, max_hp, damage, attacking = columns
+        n = len(names)
+        while len(self._seats) < n:
+            self._grow()
+
+        self._seats[:n] = np.arange(n)
+        self._hp[:n] = hp
+        self._max_hp[:n] = max_hp
+        self._damage[:n] = damage
+        self._attacking[:n] = attacking
+        self._names = list(names)
+
+        self._next_seat = n
+        self._size = n
+        self._recount()
+
+    def command_attack(self, count: int = 1) -> list:
+        """Send the first count defending minions on the attack.
+
+        Returns the minions that changed role.
+        """
+
+        rows = np.flatnonzero(~self._attacking[: self._size])[:count]
+        self._attacking[rows] = True
+        self._recount()
+        return [ArrayMinion(self, int(s)) for s in self._seats[rows]]
+
+    def command_defend(self, count: int = 1) -> list:
+        """Pull the first count attacking minions back to defend.
+
+        Returns the minions that changed role.
+        """
+
+        rows = np.flatnonzero(self._attacking[: self._size])[:count]
+        self._attacking[rows] = False
+        self._recount()
+        return [ArrayMinion(self, int(s)) for s in self._seats[rows]]
+
+    def absorb(self, damage: int) -> tuple:
+        """Let the defending minions soak up a blow, in roster order.
+
+        Each standing defender takes as much of the blow as it has HP left.
+        Returns the damage that got through and a list of
+        (minion, damage taken, destroyed) for every minion that was hit.
+        """
+
+        n = self._size
+        hp = self._hp[:n]
+        rows = np.flatnonzero(~self._attacking[:n] & (hp > 0))
+        if rows.size == 0 or damage <= 0:
+            return damage, []
+
+        # Every defender whose running total of HP fits inside the blow is
+        # destroyed; the first one past it takes whatever is left.
+        pool = hp[rows]
+        total = np.cumsum(pool)
+        destroyed = int(np.searchsorted(total, damage, side="right"))
+
+        hits = []
+        for row, taken in zip(rows[:destroyed].tolist(), pool[:destroyed].tolist()):
+            hits.append((ArrayMinion(self, int(self._seats[row])), taken, True))
+        hp[rows[:destroyed]] = total[:destroyed] - damage
+
+        absorbed = int(total[destroyed - 1]) if destroyed > 0 else 0
+        self._living_defenders -= destroyed
+        self._defense_hp -= absorbed
+        damage -= absorbed
+
+        if destroyed < rows.size and damage > 0:
+            row = rows[destroyed]
+            hp[row] -= damage
+            self._defense_hp -= damage
+            hits.append((ArrayMinion(self, int(self._seats[row])), damage, False))
+            damage = 0
+
+        return damage, hits
+
+    def heal(self) -> int:
+        """Restore every minion to full HP.
+
+        Returns how many had fallen to exactly 0 HP.
+        """
+
+        n = self._size
+        reanimated = int(np.count_nonzero(self._hp[:n] == 0))
+        self._hp[:n] = self._max_hp[:n]
+        self._recount()
+        return reanimated
+
+    def reset_stats(self, max_hp: int, damage: int) -> None:
+        """Give every minion the same fresh stats, at full HP."""
+
+        if max_hp <= 0:
+            raise ValueError("Minion tried to set an invalid max HP.")
+        if damage <= 0:
+            raise ValueError("Minion tried to set an invalid damage.")
+
+        n = self._size
+        self._hp[:n] = max_hp
+        self._max_hp[:n] = max_hp
+        self._damage[:n] = damage
+        self._recount()
+
+    # Bookkeeping
+
+    def _index(self, seat: int) -> int:
+        i = int(np.searchsorted(self._seats[: self._size], seat))
+        if i == self._size or self._seats[i] != seat:
+            raise ValueError("That minion no longer serves in this army.")
+        return i
+
+    def _grow(self) -> None:
+        capacity = len(self._seats) * 2
+        for name in ("_seats", "_hp", "_max_hp", "_damage", "_attacking"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[: len(column)] = column
+            setattr(self, name, grown)
+
+    def _count(self, i: int, sign: int) -> None:
+        if self._attacking[i]:
+            self._attacking_count += sign
+            self._attack_damage += sign * int(self._damage[i])
+        elif self._hp[i] > 0:
+            self._living_defenders += sign
+            self._defense_hp += sign * int(self._hp[i])
+
+    def _recount(self) -> None:
+        n = self._size
+        attacking = self._attacking[:n]
+        living = ~attacking & (self._hp[:n] > 0)
+
+        self._attacking_count = int(np.count_nonzero(attacking))
+        self._attack_damage = int(self._damage[:n][attacking].sum())
+        self._living_defenders = int(np.count_nonzero(living))
+        self._defense_hp = int(self._hp[:n][living].sum())
+
+    def _set_hp(self, i: int, new_hp: int) -> None:
+        self._count(i, -1)
+        self._hp[i] = new_hp
+        self._count(i, 1)
+
+    def _set_damage(self, i: int, amt: int) -> None:
+        self._count(i, -1)
+        self._damage[i] = amt
+        self._count(i, 1)
+
+    def _set_role(self, i: int, attacking: bool) -> None:
+        self._count(i, -1)
+        self._attacking[i] = attacking
+        self._count(i, 1)
@@ -0,0 +1,625 @@
+from minion import Minion
+from monster import Monster
+from player import Player
+import instrument
+import journal
+import rng
+from stats import Stats
+from variables import GameVariables
+
+
+class BattleOutcome:
+    """The result of a single battle, as resolved by the BattleEngine.
+
+    Damage is split by source the same way Stats splits it, so an outcome
+    can be folded into the game statistics once the battle is over.
+    """
+
+    __slots__ = (
+        "turns",
+        "won",
+        "fled",
+        "player_dead",
+        "cause",
+        "souls_gained",
+        "kills",
+        "spirits",
+        "potions_drank",
+        "minions_fallen",
+        "damage_dealt_personal",
+        "damage_dealt_minions",
+        "damage_taken_personal",
+        "damage_taken_minions",
+        "damage_deflected",
+        "damage_dodged",
+    )
+
+    def __init__(self):
+        self.turns = 0
+
+        self.won = False
+        self.fled = False
+        self.player_dead = False
+
+        # The coded choice that ended the battle, or "MINIONS" when the
+        # attacking minions landed the killing blow.
+        self.cause = None
+
+        self.souls_gained = 0
+        self.kills = 0
+        self.spirits = 0
+        self.potions_drank = 0
+        self.minions_fallen = 0
+
+        self.damage_dealt_personal = 0
+        self.damage_dealt_minions = 0
+        self.damage_taken_personal = 0
+        self.damage_taken_minions = 0
+        self.damage_deflected = 0
+        self.damage_dodged = 0
+
+    def record_stats(self, stats: Stats) -> None:
+        """Fold this battle into the game's Stats."""
+
+        stats.add_battle(self)
+
+
+class BattleEngine:
+    """The battle rules, with no terminal I/O.
+
+    Decisions come from a policy: any callable that takes the engine and
+    returns one of the coded CHOICES. Anything worth telling the player
+    about is reported to an optional listener as an event name followed by
+    its arguments. BattleMaster is the interactive front-end built on both.
+    """
+
+    CHOICES = (
+        "ATTACK",
+        "CAST_PAIN",
+        "CAST_VAMPIRIC_TOUCH",
+        "CAST_DEATH_BOLT",
+        "CAST_BONE_SPIRIT",
+        "DRINK_POTION",
+        "COMMAND_MINION_ATTACK",
+        "COMMAND_MINION_DEFEND",
+        "TRY_DODGE",
+        "TRY_FLEE",
+    )
+
+    __slots__ = (
+        "_player",
+        "_monster",
+        "_minions",
+        "_listener",
+        "_variables",
+        "_streams",
+        "_final_boss",
+        "_outcome",
+    )
+
+    def __init__(
+        self,
+        player: Player,
+        monster: Monster,
+        listener=None,
+        streams: rng.RandomStreams = None,
+    ):
+        if player == None:
+            raise ValueError("BattleEngine tried to track non-existent player.")
+        if monster == None:
+            raise ValueError("BattleEngine tried to track non-existent monster.")
+
+        self._player = player
+        self._monster = monster
+        self._minions = player.minions
+        self._listener = listener
+        self._variables = player.variables
+
+        # The random streams to roll with, by default those in use.
+        self._streams = streams if streams != None else rng.get_streams()
+
+        self._final_boss = monster.name == "Runekeeper"
+        self._outcome = BattleOutcome()
+
+    @property
+    def player(self) -> Player:
+        return self._player
+
+    @property
+    def monster(self) -> Monster:
+        return self._monster
+
+    @property
+    def variables(self) -> GameVariables:
+        return self._variables
+
+    @property
+    def streams(self) -> rng.RandomStreams:
+        return self._streams
+
+    @property
+    def outcome(self) -> BattleOutcome:
+        return self._outcome
+
+    @property
+    def final_boss(self) -> bool:
+        return self._final_boss
+
+    @property
+    def fled(self) -> bool:
+        return self._outcome.fled
+
+    def run(self, policy) -> BattleOutcome:
+        """Fight until the monster dies, the player dies or the player flees.
+
+        The player's Stats are updated once, when the battle is over.
+        """
+
+        while True:
+            self.begin_round()
+            if self.play_round(policy(self)):
+                break
+
+        return self.finish()
+
+    def finish(self) -> BattleOutcome:
+        """Once the last round is played, fold the battle into the player's
+        Stats and return how it went."""
+
+        self._outcome.record_stats(self._player.stats)
+        return self._outcome
+
+    def begin_round(self) -> None:
+        """At the top of the round, reset any temporary variables."""
+
+        self._player.dodging = False
+        self._monster.pained = False
+
+    def play_round(self, choice: str) -> bool:
+        """Resolve one round of battle for the given choice.
+
+        This occurs in several steps:
+
+        1. Player's choice resolves.
+        2. If BONE SPIRIT was cast, end battle. Award level but no souls.
+        3. If Monster's health reaches 0, end battle. Award level and soul.
+        4. Any attacking minions deal damage.
+        5. If Monster's health reaches 0, end battle. Award level and soul.
+        6. Monster attacks, dealing damage to minions first if possible.
+
+        Returns True when the battle is over.
+        """
+
+        outcome = self._outcome
+        monster = self._monster
+        outcome.turns += 1
+
+        journal.record(journal.BATTLE, self.CHOICES.index(choice))
+
+        # A span costs a few calls even while it times nothing, and a
+        # headless game plays a great many rounds, so the steps are only
+        # wrapped in them while instrumentation is on.
+        timed = instrument.is_enabled()
+
+        if timed:
+            with instrument.span("battle.resolve_choice"):
+                self.resolve_choice(choice)
+        else:
+            self.resolve_choice(choice)
+
+        if choice == "CAST_BONE_SPIRIT" and not self._final_boss:
+            # Victory is done in _cast_bone_spirit
+            return True
+
+        if outcome.fled:
+            self.heal_living_minions()
+            return True
+
+        if monster.hp <= 0:
+            self._do_victory(choice)
+            return True
+
+        if timed:
+            with instrument.span("battle.minion_damage"):
+                self.do_minion_damage()
+        else:
+            self.do_minion_damage()
+
+        if monster.hp <= 0:
+            self._do_victory("MINIONS")
+            return True
+
+        if timed:
+            with instrument.span("battle.monster_attack"):
+                self.do_monster_attack()
+        else:
+            self.do_monster_attack()
+
+        if self._player.hp <= 0:
+            outcome.player_dead = True
+            return True
+
+        return False
+
+    def legal_choices(self) -> list:
+        """The choices the player is currently allowed to make."""
+
+        player = self._player
+
+        choices = ["ATTACK", "CAST_PAIN", "CAST_VAMPIRIC_TOUCH", "CAST_DEATH_BOLT"]
+        if player.souls > 0:
+            choices.append("CAST_BONE_SPIRIT")
+        if player.potions > 0:
+            choices.append("DRINK_POTION")
+        if player.minions_defending > 0:
+            choices.append("COMMAND_MINION_ATTACK")
+        if player.minions_attacking > 0:
+            choices.append("COMMAND_MINION_DEFEND")
+        choices.append("TRY_DODGE")
+        if not self._final_boss:
+            choices.append("TRY_FLEE")
+
+        return choices
+
+    def resolve_choice(self, choice: str) -> None:
+        """choice is a coded str that indicates what the player chose to do."""
+
+        match choice:
+            case "ATTACK":
+                self._do_player_attack()
+            case "CAST_PAIN":
+                self._cast_pain()
+            case "CAST_VAMPIRIC_TOUCH":
+                self._cast_vampiric_touch()
+            case "CAST_DEATH_BOLT":
+                self._cast_death_bolt()
+            case "CAST_BONE_SPIRIT":
+                self._cast_bone_spirit()
+            case "DRINK_POTION":
+                self._drink_potion()
+            case "COMMAND_MINION_ATTACK":
+                self._command_minion_attack()
+            case "COMMAND_MINION_DEFEND":
+                self._command_minion_defend()
+            case "TRY_DODGE":
+                self._try_dodging()
+            case "TRY_FLEE":
+                self._try_fleeing()
+            case _:
+                raise ValueError(f"Tried to resolve an invalid choice: {choice}")
+
+    # Rules
+
+    def get_flee_chance(self) -> int:
+        flee_chance = self._variables.FLEE_BASE_CHANCE
+        level_diff = self._player.level - self._monster.level
+        flee_chance += level_diff * self._variables.FLEE_LEVEL_VARIANCE
+
+        if flee_chance < 0:
+            return 0
+
+        return flee_chance
+
+    def get_dodge_chance(self) -> int:
+        dodge_chance = self._variables.DODGE_BASE_CHANCE
+        level_diff = self._monster.level - self._player.level
+        dodge_chance -= level_diff * self._variables.DODGE_LEVEL_VARIANCE
+
+        if dodge_chance < 0:
+            return 0
+
+        return dodge_chance
+
+    def get_bone_spirit_damage(self) -> int:
+        return self._player.level + self._player.weapon + self._player.souls
+
+    def get_pained_damage(self) -> int:
+        """The reduced damage a monster will deal as a result of the player casting Pain."""
+
+        monster_damage = self._monster.damage / self._variables.SPELL_PAIN_RATIO
+        if monster_damage < 1:
+            return 0
+        else:
+            return round(monster_damage)
+
+    def get_pain_damage(self) -> int:
+        """The damage caused by casting Pain on the monster."""
+
+        if self._player.weapon == 1:
+            return 0
+        return self._get_spell_damage(self._variables.SPELL_PAIN_RATIO)
+
+    def get_vampiric_touch_damage(self) -> int:
+        """Return the damage that would be inflicted by Vampiric Touch."""
+
+        if self._player.weapon == 1:
+            return 1
+        return self._get_spell_damage(self._variables.SPELL_VAMPIRIC_TOUCH_RATIO)
+
+    def get_death_bolt_damage(self) -> int:
+        return self._get_spell_damage(self._variables.SPELL_DEATH_BOLT_RATIO)
+
+    def get_death_bolt_self_damage(self) -> int:
+        return self._player.weapon
+
+    def _get_spell_damage(self, ratio: int) -> int:
+        damage = round(self._player.weapon / ratio)
+        if damage <= 0:
+            damage = 1
+
+        return damage
+
+    # Player actions
+
+    def _do_player_attack(self) -> None:
+        damage = self._player.weapon
+        self._monster.hp -= damage
+        self._outcome.damage_dealt_personal += damage
+
+        if self._listener is not None:
+            self._listener("attack", damage)
+
+    def _cast_pain(self) -> None:
+        damage = self.get_pain_damage()
+
+        self._monster.pained = True
+        self._monster.hp -= damage
+        self._outcome.damage_dealt_personal += damage
+
+        if self._listener is not None:
+            self._listener("pain", damage)
+
+    def _cast_vampiric_touch(self) -> None:
+        damage = self.get_vampiric_touch_damage()
+
+        self._player.hp += damage
+        self._monster.hp -= damage
+        self._outcome.damage_dealt_personal += damage
+
+        if self._listener is not None:
+            self._listener("vampiric_touch", damage)
+
+    def _cast_death_bolt(self) -> None:
+        damage = self.get_death_bolt_damage()
+        self_damage = self.get_death_bolt_self_damage()
+
+        self._player.hp -= self_damage
+        self._monster.hp -= damage
+        self._outcome.damage_dealt_personal += damage
+        self._outcome.damage_taken_personal += self_damage
+
+        if self._listener is not None:
+            self._listener("death_bolt", damage, self_damage)
+
+    def _cast_bone_spirit(self) -> None:
+        """A Bone Spirit cast instantly kills the monster, but a soul is used
+        and the player does not gain a new one.
+
+        However, the Runekeeper is not killed, but takes damage instead!"""
+
+        self._player.souls -= 1
+
+        if self._listener is not None:
+            self._listener("bone_spirit")
+
+        if not self._final_boss:
+            self._outcome.spirits += 1
+            self._do_victory("CAST_BONE_SPIRIT", soul=False)
+        else:
+            damage = self.get_bone_spirit_damage()
+            self._monster.hp -= damage
+
+            if self._listener is not None:
+                self._listener("bone_spirit_repelled", damage)
+
+    def _drink_potion(self) -> None:
+        self._player.potions -= 1
+        self._player.hp += self._variables.POTION_VALUE
+        self._outcome.potions_drank += 1
+
+        if self._listener is not None:
+            self._listener("potion")
+
+    def _command_minion_attack(self) -> None:
+        """Move one minion from defense to offense.
+
+        Assume that we do have a minion per conditions to call this."""
+
+        minion = self._minions.command_attack()[0]
+        if self._listener is not None:
+            self._listener("minion_attack", minion)
+
+    def _command_minion_defend(self) -> None:
+        """Move one minion from offense to defense.
+
+        Assume that we do have a minion per conditions to call this."""
+
+        minion = self._minions.command_defend()[0]
+        if self._listener is not None:
+            self._listener("minion_defend", minion)
+
+    def _try_dodging(self) -> None:
+        """Flip on a dodging flag that will give the enemy a chance to miss if damage comes directly to the player."""
+
+        self._player.dodging = True
+
+        if self._listener is not None:
+            self._listener("dodge")
+
+    def _try_fleeing(self) -> None:
+        """Try to flee the battle. If Player flees, reset Doom but gain no souls or XP. Low chance to succeed."""
+
+        # Unlike get_flee_chance, a negative chance is not clamped here.
+        flee_chance = self._variables.FLEE_BASE_CHANCE
+        level_diff = self._player.level - self._monster.level
+        flee_chance += level_diff * self._variables.FLEE_LEVEL_VARIANCE
+
+        if self._streams["combat"].randint(0, 100) < flee_chance:
+            self._outcome.fled = True
+
+        if self._listener is not None:
+            self._listener("flee", self._outcome.fled)
+
+    # Minion and monster turns
+
+    def do_minion_damage(self) -> None:
+        minions = self._minions
+        attackers = minions.attacking_count
+
+        if attackers == 0:
+            return
+
+        if attackers == 1:
+            damage = minions[0].damage
+        else:
+            damage = minions.attack_damage
+
+        self._monster.hp -= damage
+        self._outcome.damage_dealt_minions += damage
+
+        if self._listener is not None:
+            self._listener("minion_damage", attackers, damage)
+
+    def do_monster_attack(self) -> None:
+        """Now the monster attacks the player.
+
+        The monster's damage is equal to its level.
+        If the monster is pained, it will deal reduced damage.
+        First, the monster will deal damage to any defending minions.
+        If the minion HP reaches 0, it is destroyed.
+
+        If no defending minions remain, the player themselves will take damage.
+        """
+
+        player = self._player
+        monster = self._monster
+        outcome = self._outcome
+        listener = self._listener
+
+        pained = monster.pained
+        if pained:
+            monster_damage = self.get_pained_damage()
+        else:
+            monster_damage = monster.damage
+
+        if monster_damage == 0 and pained:
+            if listener is not None:
+                listener("monster_falters")
+        else:
+            if listener is not None:
+                listener("monster_strikes")
+
+            # Reduce incoming damage by Shadowcloak first.
+
+            armor = player.armor
+            if armor > 0:
+                outcome.damage_deflected += armor
+                monster_damage -= armor
+                if listener is not None:
+                    listener("armor_absorbs", armor, monster_damage > 0)
+
+            # Now try to hit minions.
+
+            minions = self._minions
+            if monster_damage > 0 and minions.defending_count > 0:
+                monster_damage, hits = minions.absorb(monster_damage)
+
+                for minion, damage, destroyed in hits:
+                    outcome.damage_taken_minions += damage
+                    if destroyed:
+                        outcome.minions_fallen += 1
+                        if listener is not None:
+                            listener("minion_destroyed", minion, damage)
+                    elif listener is not None:
+                        listener("minion_struck", minion, damage)
+
+            # Minions have taken all damage, or they are all destroyed.
+
+            if monster_damage > 0:
+                # Here's the last chance to dodge!
+                dodging = player.dodging
+                if dodging and self._dodge_successful():
+                    outcome.damage_dodged += monster_damage
+                    if listener is not None:
+                        listener("dodged", monster_damage)
+                else:
+                    if listener is not None:
+                        listener("struck", dodging)
+
+                    outcome.damage_taken_personal += monster_damage
+                    player.hp -= monster_damage
+                    if listener is not None:
+                        listener("player_damaged", monster_damage)
+
+        if listener is not None:
+            listener("monster_attack_over")
+
+    def _dodge_successful(self) -> bool:
+        # Unlike get_dodge_chance, a negative chance is not clamped here.
+        dodge_chance = self._variables.DODGE_BASE_CHANCE
+        level_diff = self._monster.level - self._player.level
+        dodge_chance -= level_diff * self._variables.DODGE_LEVEL_VARIANCE
+
+        return self._streams["combat"].randint(0, 100) < dodge_chance
+
+    # Endings
+
+    def _do_victory(self, cause: str, soul=True) -> None:
+        outcome = self._outcome
+        outcome.won = True
+        outcome.cause = cause
+        outcome.kills += 1
+
+        if self._listener is not None:
+            self._listener("victory", cause, soul)
+
+        player = self._player
+        if soul:
+            player.souls += 1
+            outcome.souls_gained += 1
+        player.level_up()
+        player.doom = 0
+        self.heal_living_minions()
+
+        if cause == "CAST_BONE_SPIRIT" and not self._final_boss:
+            self._monster.name = f"skeletal {self._monster.name}"
+
+    def heal_living_minions(self) -> None:
+        """Called at the end of battle.
+        If any minions are low on health, heal them.
+        """
+
+        reanimated = self._minions.heal()
+
+        if reanimated > 0 and self._listener is not None:
+            self._listener("reanimate", reanimated)
+
+    # Necromancy, once the monster is slain
+
+    def raise_minion(self, choose_behavior=None) -> Minion:
+        """Raise the slain monster as a new minion.
+
+        choose_behavior is called once the minion has risen, for "attack" or
+        "defend"; without it the player's default minion behavior applies.
+        If that is "ask", it is up to the caller to ask the player (see
+        Player.ask_new_minion_behavior).
+        """
+
+        journal.record(journal.NECROMANCY, 0)
+
+        minion = Minion(name=self._monster.name, master=self._player)
+
+        if self._listener is not None:
+            self._listener("raise", minion)
+
+        behavior = None if choose_behavior == None else choose_behavior()
+        self._player.add_minion(minion, behavior=behavior)
+        self._player.stats.add_raise()
+        return minion
+
+    def butcher(self) -> None:
+        """Butcher the slain monster for a ration of food."""
+
+        journal.record(journal.NECROMANCY, 1)
+        self._player.food += 1
+        self._player.stats.add_butchery()
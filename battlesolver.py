@@ -0,0 +1,331 @@
+"""The exact chance of winning a battle when every choice is made perfectly.
+
+A battle state is a plain tuple, so states can be memoized:
+
+    (player hp, monster hp, souls, potions, minions)
+
+where minions holds an (attacking, hp, damage) tuple per minion, in roster
+order. What does not change during a battle (weapon, armor, levels,
+chances) lives in a separate rules tuple.
+
+Only flee and dodge rolls are random. Every other step makes progress
+(the monster, the player, a minion, a potion or a soul loses something),
+except a round where nothing happens at all: a blow fully absorbed by the
+Shadowcloak, a successful dodge or a faltering monster. Those rounds lead
+straight back to the same state, so instead of searching them forever
+their value is solved directly.
+
+get_rules, get_state, legal_choices and resolve make a model of the battle
+that other searches can use too (see mcts.py); it has no limit on minions.
+"""
+
+from functools import lru_cache
+
+from battleengine import BattleEngine
+from monster import Monster
+from player import Player
+
+# The number of states kept between queries.
+CACHE_SIZE = 200_000
+
+# Above this many minions, the number of states grows too quickly to solve
+# while the player waits.
+MAX_MINIONS = 8
+
+
+def win_probability(player: Player, monster: Monster) -> float:
+    """The chance to win the battle from here on, under optimal play."""
+
+    _check_size(player)
+    rules, state = get_rules(player, monster), get_state(player, monster)
+    return _value(rules, state)
+
+
+def choice_probabilities(player: Player, monster: Monster) -> dict:
+    """The chance to win after each legal choice, assuming optimal play after it."""
+
+    _check_size(player)
+    rules, state = get_rules(player, monster), get_state(player, monster)
+    value = _value(rules, state)
+
+    odds = {}
+    for choice in legal_choices(rules, state):
+        odds[choice] = _choice_value(rules, state, choice, value)
+
+    return odds
+
+
+def best_choice(player: Player, monster: Monster) -> tuple:
+    """The best choice and the chance to win when taking it."""
+
+    odds = choice_probabilities(player, monster)
+    choice = max(odds, key=odds.get)
+    return choice, odds[choice]
+
+
+def clear_cache() -> None:
+    _value.cache_clear()
+
+
+def _check_size(player: Player) -> None:
+    if player.minion_count > MAX_MINIONS:
+        raise ValueError(
+            f"Too many minions to solve the battle exactly: {player.minion_count}"
+        )
+
+
+def get_rules(player: Player, monster: Monster) -> tuple:
+    """What stays the same for the whole battle, as a tuple."""
+
+    # A throwaway engine gives the spell and chance formulas from one place.
+    engine = BattleEngine(player, monster)
+
+    variables = player.variables
+    flee_chance = (
+        variables.FLEE_BASE_CHANCE
+        + (player.level - monster.level) * variables.FLEE_LEVEL_VARIANCE
+    )
+    dodge_chance = (
+        variables.DODGE_BASE_CHANCE
+        - (monster.level - player.level) * variables.DODGE_LEVEL_VARIANCE
+    )
+
+    return (
+        player.weapon,
+        player.armor,
+        player.level,
+        player.max_hp,
+        monster.damage,
+        engine.get_pained_damage(),
+        engine.get_pain_damage(),
+        engine.get_vampiric_touch_damage(),
+        engine.get_death_bolt_damage(),
+        _roll_chance(flee_chance),
+        _roll_chance(dodge_chance),
+        engine.final_boss,
+        variables.POTION_VALUE,
+    )
+
+
+def get_state(player: Player, monster: Monster) -> tuple:
+    """Where the battle stands, as a tuple."""
+
+    minions = tuple((m.attacking, m.hp, m.damage) for m in player.minions)
+    return (player.hp, monster.hp, player.souls, player.potions, minions)
+
+
+def _roll_chance(chance: int) -> float:
+    """The chance that random.randint(0, 100) rolls below chance."""
+
+    return min(max(chance, 0), 101) / 101
+
+
+def legal_choices(rules: tuple, state: tuple) -> list:
+    """The choices BattleEngine.legal_choices would allow in state."""
+
+    _, _, souls, potions, minions = state
+
+    choices = ["ATTACK", "CAST_PAIN", "CAST_VAMPIRIC_TOUCH", "CAST_DEATH_BOLT"]
+    if souls > 0:
+        choices.append("CAST_BONE_SPIRIT")
+    if potions > 0:
+        choices.append("DRINK_POTION")
+    if any(not attacking and hp > 0 for attacking, hp, _ in minions):
+        choices.append("COMMAND_MINION_ATTACK")
+    if any(attacking for attacking, _, _ in minions):
+        choices.append("COMMAND_MINION_DEFEND")
+    choices.append("TRY_DODGE")
+    if not rules[11]:
+        choices.append("TRY_FLEE")
+
+    return choices
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _value(rules: tuple, state: tuple) -> float:
+    best = 0.0
+
+    for choice in legal_choices(rules, state):
+        outcomes = resolve(rules, state, choice)
+
+        stay = 0.0
+        value = 0.0
+        for chance, result in outcomes:
+            if result == state:
+                stay += chance
+            elif type(result) is tuple:
+                value += chance * _value(rules, result)
+            else:
+                value += chance * result
+
+        if stay >= 1.0:
+            # Nothing can ever come of this choice.
+            continue
+        if stay > 0.0:
+            # If this choice is the best one, the rounds that change nothing
+            # just repeat it, so only the rounds that do count.
+            value /= 1.0 - stay
+
+        if value > best:
+            best = value
+            if best >= 1.0:
+                break
+
+    return best
+
+
+def _choice_value(rules: tuple, state: tuple, choice: str, value: float) -> float:
+    result_value = 0.0
+    for chance, result in resolve(rules, state, choice):
+        if result == state:
+            result_value += chance * value
+        elif type(result) is tuple:
+            result_value += chance * _value(rules, result)
+        else:
+            result_value += chance * result
+    return result_value
+
+
+def resolve(rules: tuple, state: tuple, choice: str) -> list:
+    """Every way a round can go, as (chance, result) pairs.
+
+    A result is either the next state or, when the battle ends, 1.0 for a
+    win and 0.0 for anything else. Mirrors BattleEngine.play_round.
+    """
+
+    (
+        weapon,
+        armor,
+        level,
+        max_hp,
+        monster_damage,
+        pained_damage,
+        pain_damage,
+        vampiric_damage,
+        death_bolt_damage,
+        flee_chance,
+        dodge_chance,
+        final_boss,
+        potion_value,
+    ) = rules
+    player_hp, monster_hp, souls, potions, minions = state
+
+    pained = False
+    dodging = False
+    flee_fails = 1.0
+
+    match choice:
+        case "ATTACK":
+            monster_hp -= weapon
+        case "CAST_PAIN":
+            pained = True
+            monster_hp -= pain_damage
+        case "CAST_VAMPIRIC_TOUCH":
+            player_hp = min(player_hp + vampiric_damage, max_hp)
+            monster_hp -= vampiric_damage
+        case "CAST_DEATH_BOLT":
+            player_hp = max(player_hp - weapon, 0)
+            monster_hp -= death_bolt_damage
+        case "CAST_BONE_SPIRIT":
+            souls -= 1
+            if not final_boss:
+                return [(1.0, 1.0)]
+            monster_hp -= level + weapon + souls
+        case "DRINK_POTION":
+            potions -= 1
+            player_hp = min(player_hp + potion_value, max_hp)
+        case "COMMAND_MINION_ATTACK":
+            minions = _swap_first(minions, attacking=False)
+        case "COMMAND_MINION_DEFEND":
+            minions = _swap_first(minions, attacking=True)
+        case "TRY_DODGE":
+            dodging = True
+        case "TRY_FLEE":
+            flee_fails = 1.0 - flee_chance
+        case _:
+            raise ValueError(f"Tried to resolve an invalid choice: {choice}")
+
+    outcomes = []
+    if flee_fails < 1.0:
+        outcomes.append((flee_chance, 0.0))
+        if flee_fails <= 0.0:
+            return outcomes
+
+    if monster_hp <= 0:
+        return outcomes + [(flee_fails, 1.0)]
+
+    # Attacking minions strike.
+
+    attackers = [damage for attacking, _, damage in minions if attacking]
+    if len(attackers) == 1:
+        monster_hp -= minions[0][2]
+    else:
+        monster_hp -= sum(attackers)
+
+    if monster_hp <= 0:
+        return outcomes + [(flee_fails, 1.0)]
+
+    # The monster attacks.
+
+    damage = pained_damage if pained else monster_damage
+
+    if not (damage == 0 and pained):
+        damage -= armor
+
+        if damage > 0:
+            minions, damage = _absorb(minions, damage)
+
+    untouched = _next_state(player_hp, monster_hp, souls, potions, minions)
+
+    if damage <= 0:
+        return outcomes + [(flee_fails, untouched)]
+
+    struck = _next_state(player_hp - damage, monster_hp, souls, potions, minions)
+
+    if dodging:
+        outcomes.append((flee_fails * dodge_chance, untouched))
+        outcomes.append((flee_fails * (1.0 - dodge_chance), struck))
+    else:
+        outcomes.append((flee_fails, struck))
+
+    return outcomes
+
+
+def _next_state(player_hp, monster_hp, souls, potions, minions):
+    """The state for the next round, or 0.0 if the player did not survive this one."""
+
+    if player_hp <= 0:
+        return 0.0
+    return (player_hp, monster_hp, souls, potions, minions)
+
+
+def _swap_first(minions: tuple, attacking: bool) -> tuple:
+    """Swap the role of the first minion in the given role, as the commands do."""
+
+    for i, (role, hp, damage) in enumerate(minions):
+        if role == attacking:
+            return minions[:i] + ((not attacking, hp, damage),) + minions[i + 1 :]
+    return minions
+
+
+def _absorb(minions: tuple, damage: int) -> tuple:
+    """Let defending minions soak up damage in roster order.
+
+    Returns the new minions and the damage left over for the player.
+    """
+
+    absorbed = list(minions)
+    for i, (attacking, hp, minion_damage) in enumerate(minions):
+        if attacking or hp <= 0:
+            continue
+
+        absorbed[i] = (attacking, hp - damage, minion_damage)
+        if hp - damage <= 0:
+            damage -= hp
+            if damage == 0:
+                break
+        else:
+            damage = 0
+            break
+
+    return tuple(absorbed), damage
@@ -0,0 +1,59 @@
+"""Rolls per second of the standard library streams against pooled ones.
+
+    py -m benchmarks.rolls --rolls 1000000
+
+Each roll is timed the way the game makes it: one call at a time.
+"""
+
+import argparse
+import time
+
+import rng
+from randompool import PooledStream
+
+# The rolls the game makes most often, as (label, method, arguments).
+ROLLS = (
+    ("randint(0, 100)", "randint", (0, 100)),
+    ("randint(0, 50)", "randint", (0, 50)),
+    ("choice(5 items)", "choice", (tuple(range(5)),)),
+    ("choice(300 items)", "choice", (tuple(range(300)),)),
+    ("random()", "random", ()),
+)
+
+
+def main():
+    args = parse_args()
+
+    print(f"{'roll':<20}{'stdlib':>12}{'pooled':>12}{'speedup':>10}")
+    for label, method, roll_args in ROLLS:
+        stdlib = time_rolls(rng.Stream(args.seed), method, roll_args, args.rolls)
+        pooled = time_rolls(PooledStream(args.seed), method, roll_args, args.rolls)
+        print(
+            f"{label:<20}{_rate(stdlib, args.rolls):>12}{_rate(pooled, args.rolls):>12}"
+            f"{stdlib / pooled:>9.2f}x"
+        )
+
+
+def time_rolls(stream, method: str, roll_args: tuple, rolls: int) -> float:
+    """Seconds taken by rolls calls of stream.method(*roll_args)."""
+
+    roll = getattr(stream, method)
+    start = time.perf_counter()
+    for _ in range(rolls):
+        roll(*roll_args)
+    return time.perf_counter() - start
+
+
+def _rate(seconds: float, rolls: int) -> str:
+    return f"{rolls / seconds / 1e6:.2f}M/s"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Time single rolls.")
+    parser.add_argument("--rolls", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
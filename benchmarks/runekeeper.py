@@ -0,0 +1,110 @@
+"""How often each policy beats the Runekeeper, over the same fixed seeds.
+
+    py -m benchmarks.runekeeper --seeds 200 --length 10
+
+Every game is played by CautiousPolicy up to the final boss, and only the
+boss fight by the policy being measured. Rolls before the boss are the
+same for every policy, so each one faces exactly the same fights, and the
+win rates differ by the boss fight alone.
+
+The search of the mcts policy runs a fixed number of --iterations a
+choice, which gives the same results on any machine. --budget gives it
+that many seconds a choice instead, as in play.
+"""
+
+import argparse
+import math
+import time
+
+from dm import DungeonMaster
+from policies import POLICIES, CautiousPolicy, MCTSPolicy
+import simulation
+
+
+class BossAgent(CautiousPolicy):
+    """Plays as CautiousPolicy, except for the choices against the
+    Runekeeper, which come from agent."""
+
+    def __init__(self, agent):
+        self._agent = agent
+
+    def choose_battle_action(self, battle) -> str:
+        if battle.final_boss:
+            return self._agent.choose_battle_action(battle)
+        return super().choose_battle_action(battle)
+
+
+def make_agent(name: str, iterations: int, budget: float):
+    if name != "mcts":
+        return POLICIES[name]()
+    if budget == None:
+        return MCTSPolicy(budget=math.inf, iterations=iterations)
+    return MCTSPolicy(budget=budget)
+
+
+def play_bosses(agent_name: str, args: argparse.Namespace) -> tuple:
+    """The seeds whose games reached the Runekeeper, the seeds where it was
+    beaten, and the seconds the games took."""
+
+    reached = []
+    beaten = []
+    start = time.perf_counter()
+    for seed in range(args.first_seed, args.first_seed + args.seeds):
+        agent = BossAgent(make_agent(agent_name, args.iterations, args.budget))
+        summary = simulation.play_run(args.length, agent, seed)
+        if summary["ending"] == "victory":
+            reached.append(seed)
+            beaten.append(seed)
+        elif summary["killer"] == "Runekeeper":
+            reached.append(seed)
+    return reached, beaten, time.perf_counter() - start
+
+
+def main():
+    args = parse_args()
+    DungeonMaster.load_data()
+
+    print(f"{'policy':<12}{'fights':>8}{'wins':>8}{'win rate':>12}{'time':>10}")
+    fights = None
+    for name in args.policies:
+        reached, beaten, seconds = play_bosses(name, args)
+        if fights == None:
+            fights = reached
+        elif reached != fights:
+            raise RuntimeError("Policies reached the Runekeeper in different games.")
+
+        rate = len(beaten) / max(len(reached), 1)
+        error = math.sqrt(rate * (1 - rate) / max(len(reached), 1))
+        print(
+            f"{name:<12}{len(reached):>8}{len(beaten):>8}"
+            f"{rate:>8.1%} ±{error:.1%}{seconds:>8.1f}s"
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Win rates against the Runekeeper over fixed seeds."
+    )
+    parser.add_argument("--seeds", type=int, default=200)
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--length", type=int, default=10, help="rooms in the dungeon")
+    parser.add_argument(
+        "--policies",
+        nargs="+",
+        choices=sorted(POLICIES),
+        default=["cautious", "aggressive", "minions", "random", "mcts"],
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=500, help="mcts iterations per choice"
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=None,
+        help="mcts seconds per choice, in place of --iterations",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
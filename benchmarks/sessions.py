@@ -0,0 +1,213 @@
+"""Many players at once against the TCP server, and how quickly it answers.
+
+    py -m benchmarks.sessions --idle 5000 --active 500 --seconds 30
+
+Idle players connect, read the intro and then sit there. Active players
+play whole games with random answers, waiting up to twice --think seconds
+before each one, and start a new game whenever one ends. The latency of
+an answer is the time from sending it to receiving the server's next
+prompt, which ends with a telnet Go Ahead.
+
+The server runs in a process of its own, started here unless --port
+points at one already running. Clients and server share the machine, so
+on a busy one the clients' own delays count against the server.
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import server
+
+GO_AHEAD = bytes((server.IAC, server.GA))
+
+# Connections opened at the same time, to stay within the listen backlog.
+CONNECTING_AT_ONCE = 256
+
+
+def answer(prompt: str, rand: random.Random) -> str:
+    """A random but acceptable answer to what the server last sent."""
+
+    if prompt.endswith("What is your name? "):
+        return "Benchmark"
+    if prompt.endswith("maximum 100) "):
+        return "10"
+    if prompt.endswith("(y/n): "):
+        return "y"
+    if prompt.endswith("continue."):
+        return ""
+    return rand.choice("1234567890")
+
+
+class LoadTest:
+    def __init__(self, host: str, port: int, think: float, seed: int):
+        self._host = host
+        self._port = port
+        self._think = think
+        self._rand = random.Random(seed)
+        self._connecting = asyncio.Semaphore(CONNECTING_AT_ONCE)
+
+        # Only answers sent after this time are timed.
+        self._measure_from = math.inf
+        self.latencies = []
+        self.games = 0
+        self.idle_open = 0
+
+    async def _connect(self) -> tuple:
+        async with self._connecting:
+            return await asyncio.open_connection(self._host, self._port, limit=2**20)
+
+    async def idle_player(self) -> None:
+        reader, writer = await self._connect()
+        await reader.readuntil(GO_AHEAD)
+        self.idle_open += 1
+        # Hold the connection until cancelled.
+        await reader.read()
+
+    async def active_player(self, until: float) -> None:
+        while time.monotonic() < until:
+            reader, writer = await self._connect()
+            self.games += 1
+            sent = None
+            try:
+                while time.monotonic() < until:
+                    try:
+                        text = await reader.readuntil(GO_AHEAD)
+                    except asyncio.IncompleteReadError:
+                        # The game is over.
+                        break
+                    if sent != None and sent >= self._measure_from:
+                        self.latencies.append(time.perf_counter() - sent)
+
+                    await asyncio.sleep(self._rand.uniform(0, 2 * self._think))
+                    prompt = text[:-2].decode(errors="replace")
+                    writer.write(answer(prompt, self._rand).encode() + b"\r\n")
+                    sent = time.perf_counter()
+            finally:
+                writer.close()
+
+    async def run(self, idle: int, active: int, warmup: float, seconds: float):
+        idlers = [asyncio.create_task(self.idle_player()) for _ in range(idle)]
+        while self.idle_open < idle:
+            await asyncio.sleep(0.1)
+        print(f"{self.idle_open} idle players connected", file=sys.stderr)
+
+        until = time.monotonic() + warmup + seconds
+        players = [
+            asyncio.create_task(self.active_player(until)) for _ in range(active)
+        ]
+        await asyncio.sleep(warmup)
+        self._measure_from = time.perf_counter()
+        await asyncio.gather(*players)
+
+        for task in idlers:
+            task.cancel()
+        await asyncio.gather(*idlers, return_exceptions=True)
+
+
+def start_server(host: str) -> tuple:
+    """Start server.py on a free port. Returns the process and the port."""
+
+    with socket.socket() as s:
+        s.bind((host, 0))
+        port = s.getsockname()[1]
+
+    process = subprocess.Popen(
+        [sys.executable, "server.py", "--host", host, "--port", str(port)]
+    )
+
+    # Wait for it to listen.
+    for _ in range(100):
+        try:
+            socket.create_connection((host, port)).close()
+            return process, port
+        except ConnectionRefusedError:
+            time.sleep(0.1)
+
+    process.terminate()
+    raise RuntimeError("The server did not start listening.")
+
+
+def get_memory(pid: int) -> str:
+    """The resident memory of a process, where /proc has it."""
+
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return line.split(":")[1].strip()
+    except OSError:
+        pass
+    return "unknown"
+
+
+def report(test: LoadTest, seconds: float) -> None:
+    latencies = sorted(test.latencies)
+    if len(latencies) == 0:
+        print("No answers were timed.")
+        return
+
+    def percentile(percent: int) -> float:
+        rank = math.ceil(percent / 100 * len(latencies))
+        return latencies[max(rank, 1) - 1] * 1000
+
+    print(f"answers timed   {len(latencies)} ({len(latencies) / seconds:.0f}/s)")
+    print(f"games started   {test.games}")
+    print(f"p50 latency     {percentile(50):.2f} ms")
+    print(f"p95 latency     {percentile(95):.2f} ms")
+    print(f"p99 latency     {percentile(99):.2f} ms")
+    print(f"max latency     {latencies[-1] * 1000:.2f} ms")
+
+
+def main():
+    args = parse_args()
+    server.raise_file_limit()
+
+    process = None
+    port = args.port
+    if port == None:
+        process, port = start_server(args.host)
+
+    try:
+        test = LoadTest(args.host, port, args.think, args.seed)
+        asyncio.run(test.run(args.idle, args.active, args.warmup, args.seconds))
+
+        print(f"\n{args.idle} idle and {args.active} active players")
+        report(test, args.seconds)
+        if process != None:
+            print(f"server memory   {get_memory(process.pid)}")
+    finally:
+        if process != None:
+            process.terminate()
+            process.wait()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Time the TCP server under many players at once."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument(
+        "--port", type=int, default=None, help="a server already running"
+    )
+    parser.add_argument("--idle", type=int, default=5000)
+    parser.add_argument("--active", type=int, default=500)
+    parser.add_argument(
+        "--think",
+        type=float,
+        default=1.0,
+        help="the average seconds an active player takes to answer",
+    )
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
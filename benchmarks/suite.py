@@ -0,0 +1,330 @@
+"""Timings of the parts of the game that changes tend to touch.
+
+    py -m benchmarks.suite run --output results.json
+    py -m benchmarks.suite compare baseline.json results.json
+
+run times every benchmark (or those whose name contains --filter) and
+writes the results, along with where they were taken, to a JSON file.
+compare lines two such files up and flags every benchmark that got slower
+by more than --threshold, exiting with status 1 if any did.
+
+Each benchmark is a function that does its setup and returns the
+callable to time, which is called in loops of roughly 0.2 seconds.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+
+from battleengine import BattleEngine
+from dm import DungeonMaster
+from minion import Minion
+from monster import Monster
+from player import Player
+from policies import BattleView, CautiousPolicy
+import rng
+from room import Room
+import simulation
+import util
+
+ARMY_SIZES = (10, 1_000, 100_000)
+
+
+def setup_game() -> DungeonMaster:
+    if len(DungeonMaster.monsters) == 0:
+        DungeonMaster.load_data()
+    master = DungeonMaster(rng.RandomStreams(0))
+    master.setup_player("Benchmark")
+    master.place_runes(30)
+    return master
+
+
+def make_player(minions: int, army: str = "objects") -> Player:
+    """A player with an army of minions, every third one attacking."""
+
+    player = Player("Benchmark", army)
+    for i in range(minions):
+        minion = Minion("skeletal prisoner", player)
+        minion.attacking = i % 3 == 0
+        player.minions.add(minion)
+    return player
+
+
+# Microbenchmarks
+
+
+def bench_room_construct():
+    streams = setup_game().streams
+    return lambda: Room("cursed armory", "armory", streams)
+
+
+def bench_room_search():
+    room = Room("cursed workshop", "workshop", setup_game().streams)
+    return room.search
+
+
+def bench_generate_room():
+    return setup_game().generate_room
+
+
+def bench_generate_monster():
+    return setup_game().generate_monster
+
+
+def bench_update_minion_stats(minions: int, army: str = "objects"):
+    master = setup_game()
+    master.player = make_player(minions, army)
+    master.player.armor = 3
+    return master.update_minion_stats
+
+
+def bench_minion_counts(minions: int):
+    player = make_player(minions)
+
+    def count():
+        return player.minion_count, player.minions_attacking, player.minions_defending
+
+    return count
+
+
+# Macrobenchmarks
+
+
+def bench_battle():
+    """One headless battle against a monster two levels up, from a fresh
+    player, under the cautious policy."""
+
+    setup_game()
+    policy = CautiousPolicy()
+    seeds = iter(range(10**9))
+
+    def battle():
+        master = DungeonMaster(rng.RandomStreams(next(seeds)))
+        master.setup_player("Benchmark")
+        master.player.level = 3
+        monster = Monster("benchmark ogre", level=5)
+        engine = BattleEngine(master.player, monster, streams=master.streams)
+        view = BattleView(engine)
+        engine.run(lambda _: policy.choose_battle_action(view))
+
+    return battle
+
+
+def bench_battle_level5():
+    """The engine alone through a typical level-5 fight, as simulated games
+    have them: a level-5 player with a weapon of 2, armor of 1 and six
+    minions, two of them attacking, against a level-5 monster. The player
+    always attacks, and is put back as it was after every battle."""
+
+    master = setup_game()
+    player = master.player = make_player(6)
+    player.minions[3].attacking = True
+    player.weapon = 2
+    player.armor = 1
+    player.level = 5
+    player.max_hp = player.hp = 14
+    master.update_minion_stats()
+
+    streams = master.streams
+    policy = lambda _: "ATTACK"
+
+    def battle():
+        player.level = 5
+        player.max_hp = player.hp = 14
+        monster = Monster("benchmark ogre", level=5)
+        BattleEngine(player, monster, streams=streams).run(policy)
+
+    return battle
+
+
+def bench_full_run():
+    """A whole headless run of a 30-room dungeon, from setup to its ending."""
+
+    setup_game()
+    seeds = iter(range(10**9))
+    return lambda: simulation.play_run(30, CautiousPolicy(), next(seeds))
+
+
+def get_benchmarks() -> dict:
+    """Every benchmark by name, as a function that returns what to time."""
+
+    benchmarks = {
+        "room.construct": bench_room_construct,
+        "room.search": bench_room_search,
+        "dm.generate_room": bench_generate_room,
+        "dm.generate_monster": bench_generate_monster,
+    }
+
+    armies = ["objects"]
+    if _has_numpy():
+        armies.append("arrays")
+    for army in armies:
+        for size in ARMY_SIZES:
+            benchmarks[f"dm.update_minion_stats[{army}, {size}]"] = (
+                lambda size=size, army=army: bench_update_minion_stats(size, army)
+            )
+
+    for size in ARMY_SIZES:
+        benchmarks[f"player.minion_counts[{size}]"] = (
+            lambda size=size: bench_minion_counts(size)
+        )
+
+    benchmarks["battle.headless"] = bench_battle
+    benchmarks["battle.level5"] = bench_battle_level5
+    benchmarks["run.headless_30_rooms"] = bench_full_run
+    return benchmarks
+
+
+def time_benchmark(setup, repeats: int) -> dict:
+    """Time the callable setup() returns. Seconds are per call."""
+
+    timer = timeit.Timer(setup())
+    loops, _ = timer.autorange()
+    times = [t / loops for t in timer.repeat(repeats, loops)]
+    return {
+        "seconds": statistics.median(times),
+        "best": min(times),
+        "loops": loops,
+        "repeats": repeats,
+    }
+
+
+def get_metadata() -> dict:
+    """Where and when the benchmarks were taken."""
+
+    metadata = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "numpy": None,
+        "commit": None,
+    }
+
+    if _has_numpy():
+        import numpy
+
+        metadata["numpy"] = numpy.__version__
+
+    try:
+        metadata["commit"] = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+
+    return metadata
+
+
+def run(args: argparse.Namespace) -> None:
+    results = {"metadata": get_metadata(), "benchmarks": {}}
+
+    for name, setup in get_benchmarks().items():
+        if args.filter and args.filter not in name:
+            continue
+        result = time_benchmark(setup, args.repeats)
+        results["benchmarks"][name] = result
+        print(f"{name:<40}{_format_seconds(result['seconds']):>12}")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+def compare(args: argparse.Namespace) -> None:
+    with open(args.baseline) as f:
+        baseline = json.load(f)["benchmarks"]
+    with open(args.results) as f:
+        results = json.load(f)["benchmarks"]
+
+    regressions = 0
+    print(f"{'benchmark':<40}{'baseline':>12}{'now':>12}{'change':>10}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<40}{'-':>12}{_format_seconds(result['seconds']):>12}")
+            continue
+
+        before = baseline[name]["seconds"]
+        after = result["seconds"]
+        change = after / before - 1
+
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(
+            f"{name:<40}{_format_seconds(before):>12}{_format_seconds(after):>12}"
+            f"{change:>+10.1%}{flag}"
+        )
+
+    if regressions > 0:
+        print(
+            f"\n{regressions} {util.make_plural('benchmark', regressions)} got more "
+            f"than {args.threshold:.0%} slower."
+        )
+        sys.exit(1)
+
+
+def _has_numpy() -> bool:
+    try:
+        import numpy
+    except ImportError:
+        return False
+    return True
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    if seconds >= 1e-6:
+        return f"{seconds * 1e6:.2f} us"
+    return f"{seconds * 1e9:.0f} ns"
+
+
+def main():
+    args = parse_args()
+    args.command(args)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Time the game's hot paths.")
+    commands = parser.add_subparsers(required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.set_defaults(command=run)
+    run_parser.add_argument("--output", default="benchmarks.json")
+    run_parser.add_argument(
+        "--filter", help="only run benchmarks whose name contains this"
+    )
+    run_parser.add_argument("--repeats", type=int, default=5)
+
+    compare_parser = commands.add_parser(
+        "compare", help="flag benchmarks that got slower than a baseline"
+    )
+    compare_parser.set_defaults(command=compare)
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("results")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="the slowdown that counts as a regression, as a fraction",
+    )
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
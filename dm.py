@@ -1,100 +1,103 @@
 import math
-import random
 
 from player import Player
 from monster import Monster
 from room import Room
 from minion import Minion
+import instrument
+import loot
+import rng
 import util
-from stats import Stats
-from variables import Variables
+from variables import GameVariables
+import wordtables
 
 
-class DM:
+class DungeonMaster:
+
+    """Helps build the Rooms, Monsters, and Items of one game, and controls
+    much of its logic.
+
+    A DungeonMaster owns the game's player, the rooms its runes lie in, the
+    random streams it rolls with and the variables it plays by, so many
+    games can be played in one process. Without streams of its own, it
+    rolls with rng's streams in use; without variables, it takes those of
+    a game starting now. The word lists are loaded once and shared by
+    every game.
 
-    """An object with static methods to help build Rooms, Monsters, and Items.
-    It also controls much of the game logic.
     This object has too many responsibilities and should be refactored
     into many smaller pieces.
     """
 
-    """Loaded data stores"""
+    """Loaded data stores, shared by every game (see wordtables.py)"""
 
-    adjectives: list = []
+    adjectives: tuple = ()
     rooms: dict = {}
-    monsters: list = []
-
-    """Class methods"""
+    monsters: tuple = ()
+
+    def __init__(
+        self, streams: rng.RandomStreams = None, variables: GameVariables = None
+    ):
+        self.player: Player = None
+        self._rune_rooms = []
+        self._streams = streams
+        self._variables = variables if variables != None else GameVariables.current()
+
+    @property
+    def streams(self) -> rng.RandomStreams:
+        if self._streams == None:
+            return rng.get_streams()
+        return self._streams
+
+    @property
+    def variables(self) -> GameVariables:
+        return self._variables
 
     @classmethod
     def load_data(cls) -> None:
-        cls.adjectives = cls._load_file("data/adjectives.txt")
-        cls.monsters = cls._load_file("data/monsters.txt")
-        cls.rooms = cls._load_rooms()
-
-    @classmethod
-    def setup_player(cls, name) -> None:
-        """Set up initial player variables."""
-
-        cls.player = Player(name)
+        """Use the latest word lists and loot tables, which are only read
+        from disk when the files have changed."""
 
-        cls.player.potions = Variables.PLAYER_STARTING_POTIONS
-        cls.player.food = Variables.PLAYER_STARTING_FOOD
+        loot.load()
+        tables = wordtables.load(room_types=loot.get_room_types())
+        cls.adjectives = tables.adjectives
+        cls.monsters = tables.monsters
+        cls.rooms = tables.rooms
 
-        cls.add_generic_minion(silent=True)
-
-    @classmethod
-    def _load_file(cls, file) -> list:
-        data = []
-
-        with open(file) as f:
-            for line in f.readlines():
-                data.append(line.strip())
-
-        return data
+    def setup_player(self, name) -> None:
+        """Set up initial player variables."""
 
-    @classmethod
-    def _load_rooms(cls) -> dict:
-        rooms = {
-            "generic": [],
-            "armory": [],
-            "kitchen": [],
-            "workshop": [],
-        }
+        self.player = Player(name, variables=self._variables)
 
-        rooms["generic"] = cls._load_file("data/rooms_generic.txt")
-        rooms["armory"] = cls._load_file("data/rooms_armory.txt")
-        rooms["kitchen"] = cls._load_file("data/rooms_kitchen.txt")
-        rooms["workshop"] = cls._load_file("data/rooms_workshop.txt")
+        self.player.potions = self._variables.PLAYER_STARTING_POTIONS
+        self.player.food = self._variables.PLAYER_STARTING_FOOD
 
-        return rooms
+        self.add_generic_minion(silent=True)
 
-    @classmethod
-    def generate_final_boss(cls) -> Monster:
+    def generate_final_boss(self) -> Monster:
         """The final boss! It must killed to win."""
 
         boss_level = round(
-            (cls.player.level + Variables.FINAL_BOSS_ADDITIONAL_LEVELS)
-            * Variables.FINAL_BOSS_LEVEL_MULTIPLIER
+            (self.player.level + self._variables.FINAL_BOSS_ADDITIONAL_LEVELS)
+            * self._variables.FINAL_BOSS_LEVEL_MULTIPLIER
         )
         return Monster("Runekeeper", level=boss_level)
 
-    @classmethod
-    def generate_monster(cls) -> Monster:
+    @instrument.timed("dm.generate_monster")
+    def generate_monster(self) -> Monster:
         """Generate a new Monster. Monster names are purely flavor text."""
 
-        if len(cls.monsters) == 0:
+        if len(self.monsters) == 0:
             raise ValueError("Monsters list is empty.")
 
-        adjective = cls._get_adjective()
-        monster_name = f"{adjective} {random.choice(cls.monsters)}"
+        monster_rng = self.streams["monster"]
+        adjective = self._get_adjective(monster_rng)
+        monster_name = f"{adjective} {monster_rng.choice(self.monsters)}"
 
-        level: int = cls._randomize_monster_level()
+        level: int = self._randomize_monster_level()
 
         return Monster(monster_name, level=level)
 
-    @classmethod
-    def _randomize_monster_level(cls) -> int:
+    def _randomize_monster_level(self) -> int:
         """Generate a monster whose level is in a specific range.
 
         LEVEL_TIER1_CHANCE = 25
@@ -106,18 +109,18 @@ class DM:
 
         randomization_max_roll = 100
 
-        level_roll = random.randint(0, randomization_max_roll)
+        level_roll = self.streams["monster"].randint(0, randomization_max_roll)
 
-        if level_roll < Variables.LEVEL_TIER2_CHANCE:
-            level = cls.player.level - Variables.LEVEL_TIER2_DIFF
-        elif level_roll < Variables.LEVEL_TIER1_CHANCE:
-            level = cls.player.level - Variables.LEVEL_TIER1_DIFF
-        elif level_roll < randomization_max_roll - Variables.LEVEL_TIER1_CHANCE:
-            level = cls.player.level
-        elif level_roll < randomization_max_roll - Variables.LEVEL_TIER2_CHANCE:
-            level = cls.player.level + 1
+        if level_roll < self._variables.LEVEL_TIER2_CHANCE:
+            level = self.player.level - self._variables.LEVEL_TIER2_DIFF
+        elif level_roll < self._variables.LEVEL_TIER1_CHANCE:
+            level = self.player.level - self._variables.LEVEL_TIER1_DIFF
+        elif level_roll < randomization_max_roll - self._variables.LEVEL_TIER1_CHANCE:
+            level = self.player.level
+        elif level_roll < randomization_max_roll - self._variables.LEVEL_TIER2_CHANCE:
+            level = self.player.level + 1
         else:
-            level = cls.player.level + 2
+            level = self.player.level + 2
 
         if level <= 0:
             level = 1
@@ -125,145 +128,136 @@ class DM:
         return level
 
     # TODO: Move this to Room or a room helper
-    @classmethod
-    def generate_room(cls) -> Room:
+    @instrument.timed("dm.generate_room")
+    def generate_room(self) -> Room:
         """Generate a new Room. Room types determine what can be looted there."""
 
-        if len(cls.rooms) == 0:
+        if len(self.rooms) == 0:
             raise ValueError("Rooms dict is empty.")
 
-        adjective = cls._get_adjective()
-        room_type = cls._get_room_type()
-        room_name = f"{adjective} {random.choice(cls.rooms[room_type])}"
+        room_rng = self.streams["room"]
+        adjective = self._get_adjective(room_rng)
+        room_type = self._get_room_type()
+        room_name = f"{adjective} {room_rng.choice(self.rooms[room_type])}"
 
-        return Room(room_name, room_type)
+        return Room(room_name, room_type, self.streams, self._variables)
 
-    @classmethod
-    def _get_adjective(cls) -> str:
-        if len(cls.adjectives) == 0:
+    def _get_adjective(self, stream) -> str:
+        """An adjective drawn from stream, the room or monster stream."""
+
+        if len(self.adjectives) == 0:
             raise ValueError("Adjectives list is empty.")
         else:
-            return random.choice(cls.adjectives)
+            return stream.choice(self.adjectives)
 
     # TODO: Move this to Room or a room helper
-    @classmethod
-    def _get_room_type(cls) -> str:
-        roll = random.randint(0, 100)
+    def _get_room_type(self) -> str:
+        room_rng = self.streams["room"]
+        roll = room_rng.randint(0, 100)
 
-        if roll < Variables.ROOM_GENERIC_CHANCE:
+        # Generic rooms come first, then the others in the order of loot.txt.
+        special_types = tuple(self.rooms)[1:]
+        if roll < self._variables.ROOM_GENERIC_CHANCE or len(special_types) == 0:
             room_type = "generic"
         else:
-            room_files = ["armory", "kitchen", "workshop"]
-            room_type = random.choice(room_files)
+            room_type = room_rng.choice(special_types)
 
         return room_type
 
-    @classmethod
-    def increase_doom(cls) -> None:
-        doom_increase = random.randint(0, Variables.DOOM_VARIANCE)
-        cls.player.doom += doom_increase
+    def increase_doom(self) -> None:
+        doom_increase = self.streams["doom"].randint(0, self._variables.DOOM_VARIANCE)
+        self.player.doom += doom_increase
 
-    @classmethod
-    def get_bad_feeling(cls) -> str:
+    def get_bad_feeling(self) -> str:
         """A descriptive indicator of the DOOM level.
         When DOOM reaches 100, a battle will begin."""
 
         feeling = ""
-        if DM.player.doom >= Variables.MAX_DOOM:
+        if self.player.doom >= self._variables.MAX_DOOM:
             feeling = "\nYou hear something rapidly approaching!"
-        elif DM.player.doom >= Variables.MAX_DOOM * 0.75:
+        elif self.player.doom >= self._variables.MAX_DOOM * 0.75:
             feeling = (
                 "\nA feeling of doom settles into your stomach like an iron weight."
             )
-        elif DM.player.doom >= Variables.MAX_DOOM * 0.5:
+        elif self.player.doom >= self._variables.MAX_DOOM * 0.5:
             feeling = "\nWas that a noise somewhere up ahead...?"
-        elif DM.player.doom >= Variables.MAX_DOOM * 0.25:
+        elif self.player.doom >= self._variables.MAX_DOOM * 0.25:
             feeling = "\nYou feel unnerved... something is watching you."
 
         return feeling
 
-    @classmethod
-    def destroy_minion(cls, minion: Minion) -> None:
-        DM.player.destroy_minion(minion)
+    def destroy_minion(self, minion: Minion) -> None:
+        self.player.destroy_minion(minion)
 
-    @classmethod
-    def add_generic_minion(cls, silent=False) -> None:
-        minion = Minion("skeletal prisoner", DM.player)
-        DM.player.add_minion(minion, silent=silent)
-        DM.update_minion_stats()
-        Stats.add_raise()
+    def add_generic_minion(self, silent=False, behavior: str = None) -> None:
+        minion = Minion("skeletal prisoner", self.player)
+        self.player.add_minion(minion, silent=silent, behavior=behavior)
+        self.update_minion_stats()
+        self.player.stats.add_raise()
 
-    @classmethod
-    def update_minion_stats(cls) -> None:
+    def update_minion_stats(self) -> None:
         """Called whenever there is a change in armor or weapon,
         or when a minion is raised for the first time."""
 
-        for minion in DM.player.minions:
-            minion.hp = DM._get_minion_defense()
-            minion.max_hp = DM._get_minion_defense()
-            minion.damage = DM._get_minion_attack()
+        self.player.minions.reset_stats(
+            self._get_minion_defense(), self._get_minion_attack()
+        )
 
-    @classmethod
-    def _get_minion_defense(cls) -> int:
+    def _get_minion_defense(self) -> int:
         """Calculate the minion defense, which is their HP.
         It's based on the player's armor level, and when minions
         get destroyed, the player's armor is damaged as well.
         """
 
-        if cls.player.armor == 0:
+        if self.player.armor == 0:
             return 1
         else:
-            return math.ceil(cls.player.armor / Variables.MINION_ARMOR_RATIO)
+            return math.ceil(self.player.armor / self._variables.MINION_ARMOR_RATIO)
 
-    @classmethod
-    def _get_minion_attack(cls) -> int:
+    def _get_minion_attack(self) -> int:
         """Calculate the minion attack damage.
         It's based on the player's weapon level."""
 
-        return math.ceil(cls.player.weapon / Variables.MINION_DAMAGE_RATIO)
+        return math.ceil(self.player.weapon / self._variables.MINION_DAMAGE_RATIO)
 
-    @classmethod
-    def print_player_info(cls, room_count: int) -> None:
+    def print_player_info(self, room_count: int) -> None:
         # info = f"You are {self.name} the Necromancer."
-        info = "\n" + cls.player.get_minion_count_str()
+        info = "\n" + self.player.get_minion_count_str()
         info += (
-            f"\nYour health is at {cls.player.hp} of a maximum of {cls.player.max_hp}."
+            f"\nYour health is at {self.player.hp} of a maximum of {self.player.max_hp}."
         )
-        info += f"\nYou are at {cls.player.hunger}% hunger."
-        info += f"\nFood remaining: {cls.player.food}"
-        info += f"\nHealing potions available: {cls.player.potions}"
-        info += f"\nVengeful souls: {cls.player.souls}"
-        info += f"\n\nYou hold {cls.player.runes} of the {cls._get_rune_count()} Runes of Escape."
-        info += cls._do_rune_sense(room_count)
+        info += f"\nYou are at {self.player.hunger}% hunger."
+        info += f"\nFood remaining: {self.player.food}"
+        info += f"\nHealing potions available: {self.player.potions}"
+        info += f"\nVengeful souls: {self.player.souls}"
+        info += f"\n\nYou hold {self.player.runes} of the {self._get_rune_count()} Runes of Escape."
+        info += self._do_rune_sense(room_count)
 
         info += (
-            f"\n\nYou are wielding {cls.player._get_weapon_descriptor(with_level=True)}"
+            f"\n\nYou are wielding {self.player._get_weapon_descriptor(with_level=True)}"
         )
-        if cls.player.minions_attacking > 0:
-            info += f"\nEmpowered by your weapon, your attacking {util.make_plural('minion', cls.player.minions_attacking)} will deal {cls.player.minions_attacking * cls._get_minion_attack()} damage each turn in combat."
-        info += f"\nYou are protected by {cls.player._get_armor_descriptor(with_level=True)}"
-        if cls.player.minions_defending > 0:
-            info += f"\nEmpowered by your Shadowcloak, your defending {util.make_plural('minion', cls.player.minions_attacking)} can absorb {cls.player.minions_defending * cls._get_minion_defense()} damage each turn in combat."
+        if self.player.minions_attacking > 0:
+            info += f"\nEmpowered by your weapon, your attacking {util.make_plural('minion', self.player.minions_attacking)} will deal {self.player.minions_attacking * self._get_minion_attack()} damage each turn in combat."
+        info += f"\nYou are protected by {self.player._get_armor_descriptor(with_level=True)}"
+        if self.player.minions_defending > 0:
+            info += f"\nEmpowered by your Shadowcloak, your defending {util.make_plural('minion', self.player.minions_attacking)} can absorb {self.player.minions_defending * self._get_minion_defense()} damage each turn in combat."
 
-        print(info)
+        util.say(info)
 
-    @classmethod
-    def _get_rune_count(cls) -> int:
-        return len(cls._rune_rooms)
+    def _get_rune_count(self) -> int:
+        return len(self._rune_rooms)
 
-    @classmethod
-    def place_runes(cls, dungeon_length: int) -> list:
-        cls._rune_rooms = []
+    def place_runes(self, dungeon_length: int) -> list:
+        self._rune_rooms = []
 
         rune_count = 3
 
         for i in range(rune_count, 0, -1):
-            cls._rune_rooms.append(int(dungeon_length / i))
+            self._rune_rooms.append(int(dungeon_length / i))
 
-    @classmethod
-    def _do_rune_sense(cls, room_count: int) -> str:
-        if cls._get_rune_count() > 0:
-            for rune in cls._rune_rooms:
+    def _do_rune_sense(self, room_count: int) -> str:
+        if self._get_rune_count() > 0:
+            for rune in self._rune_rooms:
                 if rune > room_count:
                     rune_diff = rune - room_count
                     if rune_diff == 1:
@@ -273,28 +267,33 @@ class DM:
         else:
             raise ValueError("Failed to sense next rune.")
 
-    @classmethod
-    def try_find_rune(cls, room_count: int) -> None:
-        for rune_room in cls._rune_rooms:
+    def find_rune(self, room_count: int) -> bool:
+        """Pick up the rune in this room, if there is one."""
+
+        found = False
+        for rune_room in self._rune_rooms:
             if room_count == rune_room:
-                print("\nThere it is! One of the Runes of Escape!")
-                DM.player.runes += 1
-                rune_diff = cls._get_rune_count() - DM.player.runes
-                if rune_diff > 1:
-                    print(f"Only {rune_diff} runes remain to be found!")
-                elif rune_diff == 1:
-                    print("Only one rune remains to be found! You're almost free!")
-                else:
-                    print("\nYou enter the chamber of the final Rune of Escape...")
+                self.player.runes += 1
+                found = True
+        return found
+
+    def print_rune_found(self) -> None:
+        util.say("\nThere it is! One of the Runes of Escape!")
+        rune_diff = self._get_rune_count() - self.player.runes
+        if rune_diff > 1:
+            util.say(f"Only {rune_diff} runes remain to be found!")
+        elif rune_diff == 1:
+            util.say("Only one rune remains to be found! You're almost free!")
+        else:
+            util.say("\nYou enter the chamber of the final Rune of Escape...")
 
-    @classmethod
-    def do_bad_ending(cls, ending_type: str, killer: str = None) -> None:
+    def do_bad_ending(self, ending_type: str, killer: str = None) -> None:
         """Do the bad ending. In the event of death in battle, killer should be given a value."""
 
         util.clear()
         match ending_type:
             case "starvation":
-                print(
+                util.say(
                     "You collapse to the floor, a starved, withered husk, much like your former servants.\n"
                 )
             case "damage":
@@ -303,18 +302,18 @@ class DM:
                         "Player was killed by an unknown monster. Was the killer parameter not supplied?"
                     )
                 else:
-                    print(
+                    util.say(
                         f"You fall to the ground, streaked with blood and unable to move your limbs. The {killer} descends upon your barely-living body, looking hungry..."
                     )
             case _:
-                print("You collapse to the floor, expiring from old age.")
-        if DM.player.minion_count > 0:
-            print(
+                util.say("You collapse to the floor, expiring from old age.")
+        if self.player.minion_count > 0:
+            util.say(
                 "Your minions, no longer bound to your will, begin to wander the dungeon aimlessly."
             )
-            print("Perhaps an unfortunate future prisoner will encounter them...")
-        if DM.player.runes > 0:
-            print(
+            util.say("Perhaps an unfortunate future prisoner will encounter them...")
+        if self.player.runes > 0:
+            util.say(
                 "The last thing you see is the light of the Runes of Escape as they return to the darkness..."
             )
 
@@ -329,41 +328,73 @@ class DM:
                     end_str += "SLAIN BY A MONSTER)"
             case _:
                 end_str += "SOMETHING WEIRD)"
-        print(end_str)
+        util.say(end_str)
 
-        util.close(DM.player.name)
+        util.close(self.player.name)
 
-    @classmethod
-    def do_victory(self):
+    async def do_victory(self):
         util.clear()
-        print(
+        util.say(
             "With the creature's death, the final Rune of Escape is released from its grasp and enters your possession."
         )
-        print(
+        util.say(
             "Without giving it a second glance, you turn and leave, your Shadowcloak swirling behind you."
         )
-        print(
+        util.say(
             "\nYou return to the magically-locked barrier at the entrance of the Dungeon of Despair."
         )
-        print(
+        util.say(
             "Releasing the three Runes of Escape from your grasp, you intone the magic word that they form."
         )
-        print("The final syllable reverberates through the darkness of the dungeon.")
-        print(
+        util.say("The final syllable reverberates through the darkness of the dungeon.")
+        util.say(
             "Before you take your next breath, there is the sound of glass shattering."
         )
-        print(
+        util.say(
             "The magical barrier that barred your escape has collapsed into a thousand fading shards."
         )
-        print(
+        util.say(
             "\nWith a triumphant grin on your face, you ascend the stairs to the world above."
         )
-        print("They should've known they could not contain you for long...")
-        util.continue_prompt()
+        util.say("They should've known they could not contain you for long...")
+        await util.continue_prompt()
         self._do_victory_statistics()
 
-    @classmethod
     def _do_victory_statistics(self) -> None:
         util.clear()
-        Stats.print_stats()
-        util.close(DM.player.name)
+        self.player.stats.print_stats()
+        util.close(self.player.name)
+
+
+# The DungeonMaster of the game being played.
+_current = DungeonMaster()
+
+
+def use(master: DungeonMaster) -> None:
+    """Make master the one DM stands for. If it has streams of its own, they
+    become the ones rng hands out as well."""
+
+    global _current
+    _current = master
+    if master._streams != None:
+        rng.use(master._streams)
+
+
+def get_current() -> DungeonMaster:
+    return _current
+
+
+class _Current(type):
+    def __getattr__(cls, name):
+        return getattr(_current, name)
+
+    def __setattr__(cls, name, value):
+        setattr(_current, name, value)
+
+
+class DM(metaclass=_Current):
+    """The current game's DungeonMaster, as it was used before games had one
+    each: DM.player and DM.generate_room() are those of get_current().
+
+    Code that is handed a DungeonMaster should use it instead.
+    """
@@ -0,0 +1,371 @@
+"""The whole game as a step-at-a-time environment, for training agents.
+
+    env = GameEnvironment(length=10)
+    observation = env.reset(seed=1)
+    while True:
+        action = agent(observation, env.legal_actions())
+        observation, reward, done, info = env.step(action)
+        if done:
+            break
+
+Every decision of the game is one step: the room actions, the rounds of a
+battle, what to do with a slain monster and, while the player's minion
+default is to ask, what a new minion does. An action is an index into
+ACTIONS, which holds the choices of every phase; legal_actions() has those
+allowed in the phase the game is in.
+
+An observation is a tuple of ints, in the order of OBSERVATION. Nothing is
+printed and no text is made. The reward is 1 for a victory and -1 for any
+other ending, except a game cut off at max_steps, which ends with 0.
+
+The steps call the same GameEngine and BattleEngine methods as
+GameEngine.run, in the same order, so a seed plays out exactly as it
+would there under a policy making the same choices.
+"""
+
+import random
+
+from battleengine import BattleEngine
+from dm import DungeonMaster
+from gameengine import GameEngine
+from player import Player
+import rng
+from variables import GameVariables
+
+# Moving the whole army to one role stands in for the army orders of
+# GameEngine.manage_army; resting always rests as long as is allowed.
+ROOM_ACTIONS = (
+    "SEARCH",
+    "REST",
+    "FIGHT",
+    "EXPLORE",
+    "ALL_ATTACK",
+    "ALL_DEFEND",
+    "POTION",
+    "SURRENDER",
+)
+NECROMANCY_ACTIONS = ("RAISE", "BUTCHER")
+
+ACTIONS = (
+    *ROOM_ACTIONS,
+    *BattleEngine.CHOICES,
+    *NECROMANCY_ACTIONS,
+    *Player.BEHAVIOR_ANSWERS,
+)
+
+# The phases a game can be in, as OBSERVATION gives them.
+ROOM = 0
+BATTLE = 1
+NECROMANCY = 2
+BEHAVIOR = 3
+
+OBSERVATION = (
+    "phase",
+    "hp",
+    "max_hp",
+    "hunger",
+    "food",
+    "potions",
+    "souls",
+    "runes",
+    "doom",
+    "level",
+    "weapon",
+    "armor",
+    "minions_attacking",
+    "minions_defending",
+    "searches_left",
+    "room_count",
+    "monster_level",
+    "monster_hp",
+)
+
+_ROOM_ACTIONS = tuple(range(len(ROOM_ACTIONS)))
+_BATTLE_START = len(ROOM_ACTIONS)
+_NECROMANCY_START = _BATTLE_START + len(BattleEngine.CHOICES)
+_NECROMANCY_ACTIONS = tuple(
+    range(_NECROMANCY_START, _NECROMANCY_START + len(NECROMANCY_ACTIONS))
+)
+_BEHAVIOR_START = _NECROMANCY_START + len(NECROMANCY_ACTIONS)
+_BEHAVIOR_ACTIONS = tuple(range(_BEHAVIOR_START, len(ACTIONS)))
+_BATTLE_INDEXES = {
+    choice: _BATTLE_START + i for i, choice in enumerate(BattleEngine.CHOICES)
+}
+
+
+class GameEnvironment:
+    """One game at a time, played a decision per step."""
+
+    def __init__(
+        self,
+        length: int = 10,
+        variables: GameVariables = None,
+        max_steps: int = 10_000,
+    ):
+        """Every game is length rooms long and plays by variables, by
+        default those of a game starting now."""
+
+        if len(DungeonMaster.monsters) == 0:
+            DungeonMaster.load_data()
+
+        self._length = length
+        self._variables = variables if variables != None else GameVariables.current()
+        self._max_steps = max_steps
+
+        self._game = None
+        self._player = None
+        self._seed = None
+        self._steps = 0
+        self._phase = ROOM
+
+        # The battle being fought, who started it, and what to do once a
+        # new minion's behavior is answered.
+        self._battle = None
+        self._battle_kind = None
+        self._after_behavior = None
+
+    @property
+    def game(self) -> GameEngine:
+        return self._game
+
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+    @property
+    def phase(self) -> int:
+        return self._phase
+
+    @property
+    def steps(self) -> int:
+        return self._steps
+
+    def reset(self, seed: int = None) -> tuple:
+        """Start a new game from seed, or a random one. Returns the first
+        observation."""
+
+        if seed == None:
+            seed = random.getrandbits(64)
+
+        master = DungeonMaster(rng.RandomStreams(seed), self._variables)
+        master.setup_player("Agent")
+        master.place_runes(self._length)
+
+        self._game = GameEngine(self._length, master=master)
+        self._player = master.player
+        self._seed = seed
+        self._steps = 0
+        self._battle = None
+        self._after_behavior = None
+
+        self._advance()
+        return self.observe()
+
+    def legal_actions(self) -> tuple:
+        """The indexes of the actions step() accepts now."""
+
+        phase = self._phase
+        if phase == ROOM:
+            return _ROOM_ACTIONS
+        if phase == BATTLE:
+            return tuple(_BATTLE_INDEXES[c] for c in self._battle.legal_choices())
+        if phase == NECROMANCY:
+            return _NECROMANCY_ACTIONS
+        return _BEHAVIOR_ACTIONS
+
+    def observe(self) -> tuple:
+        """The game as it stands, in the order of OBSERVATION."""
+
+        player = self._player
+        room = self._game.room
+        battle = self._battle
+        if battle == None:
+            monster_level = monster_hp = 0
+        else:
+            monster = battle.monster
+            monster_level = monster.level
+            monster_hp = monster.hp
+
+        return (
+            self._phase,
+            player.hp,
+            player.max_hp,
+            player.hunger,
+            player.food,
+            player.potions,
+            player.souls,
+            player.runes,
+            player.doom,
+            player.level,
+            player.weapon,
+            player.armor,
+            player.minions_attacking,
+            player.minions_defending,
+            room.max_searches - room.times_searched,
+            self._game.room_count,
+            monster_level,
+            monster_hp,
+        )
+
+    def step(self, action: int) -> tuple:
+        """Take action, an index into ACTIONS that legal_actions() allows.
+
+        Returns (observation, reward, done, info). Once done, info has the
+        "ending" and the "killer", if any, and the game must be reset.
+        """
+
+        game = self._game
+        if game == None or game.ending != None or self._steps >= self._max_steps:
+            raise ValueError("The game is over; reset the environment first.")
+
+        phase = self._phase
+        if phase == ROOM:
+            if not 0 <= action < _BATTLE_START:
+                raise ValueError(f"Not an action of a room: {action}")
+            self._take_room_action(ROOM_ACTIONS[action])
+        elif phase == BATTLE:
+            self._play_round(action)
+        elif phase == NECROMANCY:
+            if action not in _NECROMANCY_ACTIONS:
+                raise ValueError(f"Not an action of necromancy: {action}")
+            self._do_necromancy(ACTIONS[action])
+        else:
+            if action not in _BEHAVIOR_ACTIONS:
+                raise ValueError(f"Not an answer for a new minion: {action}")
+            self._answer_behavior(ACTIONS[action])
+        self._steps += 1
+
+        ending = game.ending
+        if ending == None:
+            if self._steps < self._max_steps:
+                return self.observe(), 0.0, False, {}
+            ending = "stalled"
+
+        reward = 0.0
+        if ending == "victory":
+            reward = 1.0
+        elif ending != "stalled":
+            reward = -1.0
+        return self.observe(), reward, True, {"ending": ending, "killer": game.killer}
+
+    # The phases
+
+    def _take_room_action(self, action: str) -> None:
+        """As GameEngine._take_action, then on to the next decision."""
+
+        game = self._game
+        player = self._player
+
+        match action:
+            case "SEARCH":
+                result = game.search()
+                if result == "skeleton" and player.minion_default == "ask":
+                    self._ask_behavior(self._end_turn)
+                    return
+            case "REST":
+                if not game.can_rest():
+                    game.rest(0)
+                    self._advance()
+                    return
+                game.rest(game.max_rest_hours())
+            case "FIGHT":
+                self._start_battle("SELF")
+                return
+            case "EXPLORE":
+                game.explore()
+            case "ALL_ATTACK":
+                game.manage_army(attack=player.minions_defending)
+            case "ALL_DEFEND":
+                game.manage_army(defend=player.minions_attacking)
+            case "POTION":
+                game.drink_potion()
+                self._advance()
+                return
+            case "SURRENDER":
+                game.surrender()
+                return
+
+        self._end_turn()
+
+    def _play_round(self, action: int) -> None:
+        """As BattleEngine.run, a round at a time."""
+
+        battle = self._battle
+        if not _BATTLE_START <= action < _NECROMANCY_START:
+            raise ValueError(f"Not an action of a battle: {action}")
+        choice = ACTIONS[action]
+        if choice not in battle.legal_choices():
+            raise ValueError(f"Not an action allowed in this battle: {choice}")
+
+        if not battle.play_round(choice):
+            battle.begin_round()
+            return
+
+        outcome = battle.finish()
+        if outcome.won and not battle.final_boss:
+            self._phase = NECROMANCY
+        else:
+            self._end_battle()
+
+    def _do_necromancy(self, action: str) -> None:
+        battle = self._battle
+        if action == "BUTCHER":
+            battle.butcher()
+        else:
+            battle.raise_minion()
+            if self._player.minion_default == "ask":
+                self._ask_behavior(self._end_battle)
+                return
+        self._end_battle()
+
+    def _ask_behavior(self, then) -> None:
+        """The newest minion defends until it is told otherwise; then is
+        called once it is."""
+
+        self._phase = BEHAVIOR
+        self._after_behavior = then
+
+    def _answer_behavior(self, answer: str) -> None:
+        if self._player.answer_minion_behavior(answer) == "attack":
+            self._player.minions[-1].attacking = True
+
+        then = self._after_behavior
+        self._after_behavior = None
+        then()
+
+    # Moving on
+
+    def _start_battle(self, kind: str) -> None:
+        game = self._game
+        monster = game.spawn_monster(kind)
+        self._battle = BattleEngine(self._player, monster, streams=game.master.streams)
+        self._battle_kind = kind
+        self._phase = BATTLE
+        self._battle.begin_round()
+
+    def _end_battle(self) -> None:
+        """As the end of GameEngine._fight, then on to the next decision."""
+
+        game = self._game
+        game.finish_battle(self._battle.monster)
+        self._battle = None
+
+        if self._battle_kind == "SELF" and game.ending == None:
+            self._end_turn()
+        else:
+            self._advance()
+
+    def _end_turn(self) -> None:
+        self._game.end_turn()
+        self._advance()
+
+    def _advance(self) -> None:
+        """On to the next decision: a battle that must be fought, if there
+        is one, or else the next room action."""
+
+        game = self._game
+        self._phase = ROOM
+        if game.ending == None:
+            kind = game.pending_battle()
+            if kind != None:
+                self._start_battle(kind)
@@ -0,0 +1,401 @@
+from battleengine import BattleEngine
+import dm
+from dm import DungeonMaster
+import journal
+from monster import Monster
+from player import Player
+from policies import BattleView, GameView
+from room import Room
+from variables import GameVariables
+
+
+class GameEngine:
+    """The rules of a trip through the dungeon, with no terminal I/O.
+
+    The game state itself (the player, the runes, the random streams) lives
+    on its DungeonMaster, by default the current one, whose setup_player and
+    place_runes must be called first.
+    play_game in project.py is the interactive front-end; run() plays a
+    whole game headlessly under a policy (see policies.py).
+
+    Most actions end the turn; rest and manage_army return True when they
+    do. Ending a turn costs hunger, except after an action that takes no
+    time. Such an action also spares the next one that does.
+    """
+
+    ACTIONS = (
+        "SEARCH",
+        "REST",
+        "FIGHT",
+        "EXPLORE",
+        "MANAGE",
+        "POTION",
+        "SURRENDER",
+    )
+
+    def __init__(self, length: int, listener=None, master: DungeonMaster = None):
+        self._length = length
+        self._listener = listener
+        self._master = master if master != None else dm.get_current()
+        self._variables = self._master.variables
+
+        self._room_count = 1
+        self._room = Room(
+            f"Entryway to the Dungeon of {length} Despairs",
+            streams=self._master.streams,
+            variables=self._variables,
+        )
+
+        self._skip_hunger = False
+
+        self._turns = 0
+        self._battles = 0
+
+        # None while the game goes on, then "victory", "starvation",
+        # "damage" or "surrender".
+        self._ending = None
+        self._killer = None
+
+    @property
+    def master(self) -> DungeonMaster:
+        return self._master
+
+    @property
+    def player(self) -> Player:
+        return self._master.player
+
+    @property
+    def variables(self) -> GameVariables:
+        return self._variables
+
+    @property
+    def length(self) -> int:
+        return self._length
+
+    @property
+    def room(self) -> Room:
+        return self._room
+
+    @property
+    def room_count(self) -> int:
+        return self._room_count
+
+    @property
+    def turns(self) -> int:
+        return self._turns
+
+    @property
+    def battles(self) -> int:
+        return self._battles
+
+    @property
+    def ending(self) -> str:
+        return self._ending
+
+    @property
+    def killer(self) -> str:
+        return self._killer
+
+    def run(self, policy, max_actions: int = 10_000) -> str:
+        """Play until the game ends, asking the policy for every decision.
+
+        The policy sees the game through a GameView. A game still going
+        after max_actions actions ends as "stalled". Returns the ending.
+        """
+
+        view = GameView(self)
+        actions = 0
+        while self._ending == None:
+            if actions >= max_actions:
+                self._ending = "stalled"
+                break
+
+            kind = self.pending_battle()
+            if kind != None:
+                self._fight(policy, view, kind)
+                continue
+
+            actions += 1
+            if self._take_action(policy, view, policy.choose_action(view)):
+                self.end_turn()
+
+        return self._ending
+
+    def _take_action(self, policy, view: GameView, action: str) -> bool:
+        match action:
+            case "SEARCH":
+                self.search(lambda: self._get_behavior(policy, view))
+                return True
+            case "REST":
+                if not self.can_rest():
+                    return self.rest(0)
+                return self.rest(policy.choose_rest_hours(view))
+            case "FIGHT":
+                self._fight(policy, view, "SELF")
+                return self._ending == None
+            case "EXPLORE":
+                self.explore()
+                return True
+            case "MANAGE":
+                return self.manage_army(*policy.choose_army_orders(view))
+            case "POTION":
+                self.drink_potion()
+                return False
+            case "SURRENDER":
+                self.surrender()
+                return False
+            case _:
+                raise ValueError(f"Tried to take an invalid action: {action}")
+
+    def _get_behavior(self, policy, view: GameView) -> str:
+        """What a newly raised minion should do, if the player would be asked."""
+
+        if self.player.minion_default == "ask":
+            return self.player.answer_minion_behavior(
+                policy.choose_minion_behavior(view)
+            )
+        return None
+
+    def _fight(self, policy, view: GameView, kind: str) -> None:
+        monster = self.spawn_monster(kind)
+        battle = BattleEngine(self.player, monster, streams=self._master.streams)
+        battle_view = BattleView(battle)
+        outcome = battle.run(lambda _: policy.choose_battle_action(battle_view))
+
+        if outcome.won and not battle.final_boss:
+            match policy.choose_necromancy(battle_view):
+                case "RAISE":
+                    battle.raise_minion(lambda: self._get_behavior(policy, view))
+                case "BUTCHER":
+                    battle.butcher()
+                case choice:
+                    raise ValueError(
+                        f"Received an unknown choice for necromancy: {choice}"
+                    )
+
+        self.finish_battle(monster)
+
+    def summary(self) -> dict:
+        """How the game went, in plain values: its seed and length, how it
+        ended, how far it got and the player's Stats counters."""
+
+        player = self.player
+        return {
+            "seed": self._master.streams.seed,
+            "length": self._length,
+            "ending": self._ending,
+            "killer": self._killer,
+            "survived": self._ending == "victory",
+            "rooms": self._room_count,
+            "turns": self._turns,
+            "battles": self._battles,
+            "level": player.level,
+            "hp": player.hp,
+            "runes": player.runes,
+            "minions": player.minion_count,
+            "stats": player.stats.as_dict(),
+        }
+
+    # Battles
+
+    def pending_battle(self) -> str:
+        """A battle that must be fought before the player can act, if any.
+
+        "FINAL_BOSS" in the last room, "DOOM" once doom has caught up with
+        the player, otherwise None.
+        """
+
+        if self._room_count == self._length:
+            return "FINAL_BOSS"
+        if self.player.doom >= self._variables.MAX_DOOM:
+            return "DOOM"
+        return None
+
+    def spawn_monster(self, kind: str) -> Monster:
+        """kind is "FINAL_BOSS", or "DOOM" or "SELF" for who started the fight."""
+
+        self._battles += 1
+        if kind == "SELF":
+            self._record_action("FIGHT")
+        if kind == "FINAL_BOSS":
+            return self._master.generate_final_boss()
+        return self._master.generate_monster()
+
+    def finish_battle(self, monster: Monster) -> None:
+        """Settle the game after a battle with monster, once necromancy is done."""
+
+        if monster.name == "Runekeeper":
+            if self.player.hp <= 0:
+                self._ending = "damage"
+                self._killer = monster.name
+            else:
+                self._ending = "victory"
+            return
+
+        self.player.doom = 0
+        if self.player.hp <= 0:
+            self._ending = "damage"
+            self._killer = monster.name
+
+    # Actions
+
+    def can_search(self) -> bool:
+        return self._room.times_searched < self._room.max_searches
+
+    def search(self, choose_behavior=None) -> str:
+        """Search the room; see Room.POSSIBLE_SEARCHES for the results.
+
+        choose_behavior is called for the behavior of a skeleton raised from
+        the search, only if one is found; without it, the player's default
+        applies. Searching a room with nothing left to find returns
+        "exhausted" and takes no time, but still ends the turn.
+        """
+
+        self._record_action("SEARCH")
+
+        if not self.can_search():
+            self._skip_hunger = True
+            return "exhausted"
+
+        result = self._room.search()
+        player = self.player
+
+        match result:
+            case "skeleton":
+                if self._listener is not None:
+                    self._listener("skeleton")
+                behavior = None if choose_behavior == None else choose_behavior()
+                self._master.add_generic_minion(behavior=behavior)
+            case "weapon":
+                player.weapon += 1
+            case "armor":
+                player.armor += 1
+            case "potion":
+                player.potions += 1
+            case "food":
+                player.add_food(1)
+
+        return result
+
+    def can_rest(self) -> bool:
+        return (
+            self.player.hp < self.player.max_hp
+            and self.player.hunger + self._variables.RESTING_HUNGER_RATE < 100
+        )
+
+    def rest_problem(self, hours: int) -> str:
+        """Why resting this long is not allowed: "starve" or "no_benefit".
+
+        None if it is allowed.
+        """
+
+        if hours * 2 >= 100 - self.player.hunger:
+            return "starve"
+        if hours > self.player.max_hp - self.player.hp:
+            return "no_benefit"
+        return None
+
+    def max_rest_hours(self) -> int:
+        """The longest rest that is allowed."""
+
+        return min(
+            (100 - self.player.hunger - 1) // 2, self.player.max_hp - self.player.hp
+        )
+
+    def rest(self, hours: int) -> bool:
+        """Rest, gaining hours HP and twice that in hunger.
+
+        Resting takes no time of its own. A rest that is not allowed, or of
+        0 hours, still ends the turn. If the player cannot rest at all, the
+        turn goes on.
+        """
+
+        self._record_action("REST")
+        self._skip_hunger = True
+
+        if not self.can_rest():
+            return False
+
+        journal.record(journal.REST, hours)
+        if hours != 0 and self.rest_problem(hours) == None:
+            self.player.hp += hours
+            self.player.hunger += hours * 2
+            self._master.increase_doom()
+
+        return True
+
+    def explore(self) -> bool:
+        """Move on to a new room. Returns True if a rune was found there."""
+
+        self._record_action("EXPLORE")
+
+        self._room_count += 1
+        self._room = self._master.generate_room()
+        return self._master.find_rune(self._room_count)
+
+    def manage_army(self, attack: int = 0, defend: int = 0, default: str = None) -> bool:
+        """Move minions between attack and defense, and set the default
+        behavior of new minions. Takes no time, but ends the turn."""
+
+        self._record_action("MANAGE")
+        journal.record(journal.ARMY, attack)
+        journal.record(journal.ARMY, defend)
+        journal.record(journal.ARMY, journal.ARMY_DEFAULTS.index(default))
+
+        if attack > 0:
+            self.player.minions.command_attack(attack)
+        if defend > 0:
+            self.player.minions.command_defend(defend)
+        if default != None:
+            self.player.minion_default = default
+
+        self._skip_hunger = True
+        return True
+
+    def drink_potion(self) -> bool:
+        """Drink a healing potion, taking no time. Returns False if there are none."""
+
+        self._record_action("POTION")
+        self._skip_hunger = True
+
+        if self.player.potions <= 0:
+            return False
+
+        self.player.potions -= 1
+        self.player.hp += self._variables.POTION_VALUE
+        self.player.stats.add_potion_drink()
+        return True
+
+    def surrender(self) -> None:
+        self._record_action("SURRENDER")
+        self._ending = "surrender"
+
+    def _record_action(self, action: str) -> None:
+        journal.record(journal.ACTION, self.ACTIONS.index(action))
+
+    def end_turn(self) -> None:
+        """Time passes: minions recover, hunger and doom grow."""
+
+        self._turns += 1
+
+        self._master.update_minion_stats()
+
+        if self._skip_hunger:
+            self._skip_hunger = False
+            return
+
+        player = self.player
+        player.hunger += self._variables.HUNGER_RATE
+
+        if player.hunger >= self._variables.FOOD_VALUE and player.food > 0:
+            player.food -= 1
+            player.hunger -= self._variables.FOOD_VALUE
+            player.stats.add_ration_eat()
+            if self._listener is not None:
+                self._listener("eat")
+
+        if player.hunger >= 100:
+            self._ending = "starvation"
+            return
+
+        self._master.increase_doom()
@@ -0,0 +1,249 @@
+"""Every finished game, kept in an SQLite database for the leaderboards.
+
+    history.start("history.db")
+    history.record(game.summary(), player="Lucky", source="console")
+
+    py history.py escapes --database history.db --limit 10
+
+A game is one row of the runs table: its seed, dungeon length, ending and
+killer, how far it got, and every Stats counter. record() only puts the
+row on a queue. A background thread writes whatever has queued up in one
+transaction, so a game never waits on the disk, and a simulation's
+thousands of games go in as a few large batches. At exit, the rows still
+queued get at most EXIT_WAIT seconds to be written.
+
+Each leaderboard is a query that an index answers in order, so the top
+rows come back in milliseconds however many games there are.
+"""
+
+import argparse
+import atexit
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+from stats import Stats
+
+DEFAULT_PATH = "history.db"
+
+# The most rows written in one transaction.
+BATCH_SIZE = 1000
+
+# How long exiting waits for rows still queued, in seconds.
+EXIT_WAIT = 1.0
+
+COUNTERS = tuple(Stats().as_dict())
+
+# The columns of a run, after its id, with their types.
+COLUMNS = (
+    ("finished_at", "REAL"),
+    ("source", "TEXT"),
+    ("player", "TEXT"),
+    # Seeds are unsigned 64-bit, too big for an SQLite integer.
+    ("seed", "TEXT"),
+    ("length", "INTEGER"),
+    ("ending", "TEXT"),
+    ("killer", "TEXT"),
+    ("rooms", "INTEGER"),
+    ("turns", "INTEGER"),
+    ("battles", "INTEGER"),
+    ("level", "INTEGER"),
+    ("hp", "INTEGER"),
+    ("runes", "INTEGER"),
+    ("minions", "INTEGER"),
+    *((counter, "INTEGER") for counter in COUNTERS),
+)
+
+# The leaderboards by name: what they show, the games that count and the
+# order they rank in. Each has an index below that gives that order.
+LEADERBOARDS = {
+    "escapes": ("Fastest escapes", "ending = 'victory'", "turns, id"),
+    "minions": ("Most minions raised", "1", "raised DESC, id"),
+    "deepest": (
+        "Deepest dungeons escaped",
+        "ending = 'victory'",
+        "length DESC, turns, id",
+    ),
+}
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, "
+    + ", ".join(f"{name} {kind}" for name, kind in COLUMNS)
+    + ")",
+    "CREATE INDEX IF NOT EXISTS runs_escapes ON runs (ending, turns)",
+    "CREATE INDEX IF NOT EXISTS runs_minions ON runs (raised DESC)",
+    "CREATE INDEX IF NOT EXISTS runs_deepest ON runs (ending, length DESC, turns)",
+)
+
+_INSERT = (
+    f"INSERT INTO runs ({', '.join(name for name, _ in COLUMNS)}) "
+    f"VALUES ({', '.join(f':{name}' for name, _ in COLUMNS)})"
+)
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open the database at path, creating the table and indexes if need be."""
+
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    # Readers can look at the leaderboards while games are written.
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    with connection:
+        for statement in _SCHEMA:
+            connection.execute(statement)
+    return connection
+
+
+def make_row(summary: dict, player: str, source: str) -> dict:
+    """The row of a game summarized by GameEngine.summary(). source says
+    where it was played: "console", "server" or "simulation"."""
+
+    row = {name: summary.get(name) for name, _ in COLUMNS}
+    row.update(summary["stats"])
+    row["finished_at"] = time.time()
+    row["source"] = source
+    row["player"] = player
+    row["seed"] = str(summary["seed"])
+    return row
+
+
+def leaderboard(connection: sqlite3.Connection, name: str, limit: int = 10) -> list:
+    """The top limit rows of the named leaderboard, best first."""
+
+    if name not in LEADERBOARDS:
+        raise ValueError(f"Unknown leaderboard: {name}")
+
+    _, where, order = LEADERBOARDS[name]
+    return connection.execute(
+        f"SELECT * FROM runs WHERE {where} ORDER BY {order} LIMIT ?", (limit,)
+    ).fetchall()
+
+
+class HistoryWriter:
+    """Writes rows to the database at path from a thread of its own."""
+
+    def __init__(self, path: str, batch_size: int = BATCH_SIZE):
+        if batch_size <= 0:
+            raise ValueError(f"Batch size must be positive: {batch_size}")
+
+        self._path = path
+        self._batch_size = batch_size
+        self._queue = queue.SimpleQueue()
+
+        # Connecting once here makes a bad path fail now, not in the thread.
+        connect(path).close()
+
+        self._thread = threading.Thread(
+            target=self._write_batches, name="history", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def write(self, row: dict) -> None:
+        self._queue.put(row)
+
+    def close(self, timeout: float = None) -> bool:
+        """Stop once the rows written so far are in the database, waiting
+        for them up to timeout seconds. False if they were not all in
+        by then."""
+
+        self._queue.put(None)
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _write_batches(self) -> None:
+        connection = connect(self._path)
+        try:
+            stopping = False
+            while not stopping:
+                rows = [self._queue.get()]
+                while len(rows) < self._batch_size:
+                    try:
+                        rows.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                if None in rows:
+                    stopping = True
+                    rows = [row for row in rows if row != None]
+
+                try:
+                    with connection:
+                        connection.executemany(_INSERT, rows)
+                except sqlite3.Error as e:
+                    print(
+                        f"Could not keep {len(rows)} games in {self._path}: {e}",
+                        file=sys.stderr,
+                    )
+        finally:
+            connection.close()
+
+
+# The writer games are recorded with, once started.
+_writer = None
+
+
+def start(path: str = DEFAULT_PATH) -> HistoryWriter:
+    """Record every game that ends from now on in the database at path."""
+
+    global _writer
+    stop()
+    _writer = HistoryWriter(path)
+    atexit.register(stop, EXIT_WAIT)
+    return _writer
+
+
+def stop(timeout: float = None) -> bool:
+    """Write out the games recorded so far, waiting up to timeout seconds,
+    and record no more."""
+
+    global _writer
+    if _writer == None:
+        return True
+
+    atexit.unregister(stop)
+    writer = _writer
+    _writer = None
+    return writer.close(timeout)
+
+
+def record(summary: dict, player: str, source: str) -> None:
+    """Queue a finished game for writing, if the history is started."""
+
+    if _writer != None and summary["ending"] != None:
+        _writer.write(make_row(summary, player, source))
+
+
+def main():
+    args = parse_args()
+
+    connection = connect(args.database)
+    rows = leaderboard(connection, args.leaderboard, args.limit)
+    connection.close()
+
+    print(LEADERBOARDS[args.leaderboard][0])
+    for rank, row in enumerate(rows, 1):
+        print(
+            f"{rank:>4}. {row['player']:<20}{row['length']:>4} rooms"
+            f"{row['turns']:>6} turns{row['raised']:>5} raised  {row['ending']}"
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Show a leaderboard of past games.")
+    parser.add_argument(
+        "leaderboard", nargs="?", choices=sorted(LEADERBOARDS), default="escapes"
+    )
+    parser.add_argument("--database", default=DEFAULT_PATH)
+    parser.add_argument("--limit", type=int, default=10)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
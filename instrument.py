@@ -0,0 +1,190 @@
+"""Named timing spans around the phases of a turn and of a battle.
+
+    with instrument.span("battle.monster_attack"):
+        self.do_monster_attack()
+
+Spans do nothing until instrument.enable() is called; a disabled span is
+one shared object that is entered and left. Once enabled, every span
+records its time on the monotonic clock, in nanoseconds, into a ring
+buffer of its own name. A buffer keeps only the latest timings, so
+memory stays fixed however long the process runs.
+
+summary() gives the count and p50/p95/p99 of every span, and dump() prints
+them. Run `py project.py --profile` to see them when the game exits.
+"""
+
+import functools
+import math
+import sys
+import time
+from array import array
+
+
+class RingBuffer:
+    """The latest capacity values added, in a fixed block of memory."""
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError(f"Ring buffer capacity must be positive: {capacity}")
+
+        self._values = array("q", bytes(8 * capacity))
+        self._capacity = capacity
+        self._count = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def count(self) -> int:
+        """How many values were ever added, including those overwritten."""
+        return self._count
+
+    def add(self, value: int) -> None:
+        self._values[self._count % self._capacity] = value
+        self._count += 1
+
+    def values(self) -> list:
+        """The values still kept, oldest first."""
+
+        if self._count <= self._capacity:
+            return self._values[: self._count].tolist()
+        start = self._count % self._capacity
+        return (self._values[start:] + self._values[:start]).tolist()
+
+
+class _Span:
+    __slots__ = ("_timings", "_start")
+
+    def __init__(self, timings: RingBuffer):
+        self._timings = timings
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self._timings.add(time.perf_counter_ns() - self._start)
+        return False
+
+
+class _NoSpan:
+    """What span() gives while instrumentation is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+_enabled = False
+_capacity = 4096
+
+# A RingBuffer of timings by span name.
+_timings = {}
+
+
+def enable(capacity: int = 4096) -> None:
+    """Start timing spans, keeping the latest capacity timings of each."""
+
+    global _enabled, _capacity
+    if capacity != _capacity:
+        _timings.clear()
+    _capacity = capacity
+    _enabled = True
+
+
+def disable() -> None:
+    """Stop timing spans. Timings taken so far are kept."""
+
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    """Forget every timing taken so far."""
+
+    _timings.clear()
+
+
+def span(name: str):
+    """A context manager that times its block under name."""
+
+    if not _enabled:
+        return _NO_SPAN
+
+    timings = _timings.get(name)
+    if timings == None:
+        timings = _timings[name] = RingBuffer(_capacity)
+    return _Span(timings)
+
+
+def timed(name: str):
+    """Decorate a function to time every call under name."""
+
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def summary() -> dict:
+    """{span name: {count, p50, p95, p99, max}}, times in milliseconds.
+
+    count is every time the span was entered; the percentiles and max cover
+    the timings still in its ring buffer.
+    """
+
+    result = {}
+    for name, timings in sorted(_timings.items()):
+        values = sorted(timings.values())
+        result[name] = {
+            "count": timings.count,
+            "p50": _percentile(values, 50) / 1e6,
+            "p95": _percentile(values, 95) / 1e6,
+            "p99": _percentile(values, 99) / 1e6,
+            "max": values[-1] / 1e6,
+        }
+    return result
+
+
+def dump(file=None) -> None:
+    """Print summary() as a table, to stderr unless file is given."""
+
+    if file == None:
+        file = sys.stderr
+
+    print(
+        f"\n{'span':<28}{'count':>9}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}"
+        f"{'max ms':>11}",
+        file=file,
+    )
+    for name, row in summary().items():
+        print(
+            f"{name:<28}{row['count']:>9}{row['p50']:>11.3f}{row['p95']:>11.3f}"
+            f"{row['p99']:>11.3f}{row['max']:>11.3f}",
+            file=file,
+        )
+
+
+def _percentile(values: list, percent: int) -> int:
+    """The nearest-rank percentile of sorted values."""
+
+    rank = math.ceil(percent / 100 * len(values))
+    return values[max(rank, 1) - 1]
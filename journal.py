@@ -0,0 +1,251 @@
+"""A compact record of one game: its seed, its setup, the variables it was
+played by and every decision.
+
+Decisions are recorded where the engines act on them, in the order
+GameEngine.run asks a policy for them, so a journal made at the keyboard
+can be played back headlessly (see replay.py). Each decision is one
+varint, its kind in the low three bits and its value, zigzag-encoded
+so that it may be negative, above them:
+
+    ACTION      index into GameEngine.ACTIONS
+    BATTLE      index into BattleEngine.CHOICES
+    NECROMANCY  0 to raise, 1 to butcher
+    BEHAVIOR    index into Player.BEHAVIOR_ANSWERS
+    REST        hours rested
+    ARMY        three in a row: minions to attack, to defend, and the new
+                default behavior as an index into ARMY_DEFAULTS
+
+When the game is over, the final state of the player is stored as well so
+a replay can check that it ended up in the same place.
+"""
+
+import json
+
+from variables import GameVariables
+
+(
+    ACTION,
+    BATTLE,
+    NECROMANCY,
+    BEHAVIOR,
+    REST,
+    ARMY,
+) = range(6)
+
+ARMY_DEFAULTS = (None, "ask", "attack", "defend")
+
+MAGIC = b"NTJ"
+# 2: searches draw from loot tables, so a seed no longer plays out as in 1.
+# 3: the game's variables are kept, as JSON, after the length.
+VERSION = 3
+
+# The player fields kept as the final state, in order.
+PLAYER_FIELDS = (
+    "hp",
+    "max_hp",
+    "level",
+    "hunger",
+    "food",
+    "potions",
+    "souls",
+    "runes",
+    "doom",
+    "weapon",
+    "armor",
+    "minion_count",
+    "minions_attacking",
+    "minions_defending",
+)
+
+
+class Journal:
+    def __init__(self, seed: int, name: str, length: int, variables: GameVariables):
+        self._seed = seed
+        self._name = name
+        self._length = length
+        self._variables = variables
+
+        self._decisions = bytearray()
+        self._count = 0
+
+        self._final_state = None
+
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def length(self) -> int:
+        return self._length
+
+    @property
+    def variables(self) -> GameVariables:
+        """The variables the game was played by."""
+        return self._variables
+
+    @property
+    def count(self) -> int:
+        """How many decisions were recorded."""
+        return self._count
+
+    @property
+    def final_state(self) -> dict:
+        """The player's state when the journal was closed, or None."""
+        return self._final_state
+
+    def record(self, kind: int, value: int) -> None:
+        _write_varint(self._decisions, (_zigzag(value) << 3) | kind)
+        self._count += 1
+
+    def close(self, player) -> None:
+        self._final_state = get_player_state(player)
+
+    def decisions(self):
+        """Yield every decision as (kind, value)."""
+
+        data = self._decisions
+        pos = 0
+        for _ in range(self._count):
+            entry, pos = _read_varint(data, pos)
+            yield entry & 7, _unzigzag(entry >> 3)
+
+    # Encoding
+
+    def to_bytes(self) -> bytes:
+        data = bytearray(MAGIC)
+        data.append(VERSION)
+
+        _write_varint(data, self._seed)
+        name = self._name.encode()
+        _write_varint(data, len(name))
+        data += name
+        _write_varint(data, self._length)
+        variables = self._variables.as_json().encode()
+        _write_varint(data, len(variables))
+        data += variables
+
+        _write_varint(data, self._count)
+        _write_varint(data, len(self._decisions))
+        data += self._decisions
+
+        if self._final_state == None:
+            data.append(0)
+        else:
+            data.append(1)
+            for field in PLAYER_FIELDS:
+                _write_varint(data, _zigzag(self._final_state[field]))
+
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Journal":
+        if data[:3] != MAGIC:
+            raise ValueError("Not a game journal.")
+        if data[3] != VERSION:
+            raise ValueError(f"Unsupported journal version: {data[3]}")
+
+        pos = 4
+        seed, pos = _read_varint(data, pos)
+        size, pos = _read_varint(data, pos)
+        name = data[pos : pos + size].decode()
+        pos += size
+        length, pos = _read_varint(data, pos)
+        size, pos = _read_varint(data, pos)
+        variables = GameVariables.from_dict(json.loads(data[pos : pos + size]))
+        pos += size
+
+        journal = cls(seed, name, length, variables)
+
+        journal._count, pos = _read_varint(data, pos)
+        size, pos = _read_varint(data, pos)
+        journal._decisions = bytearray(data[pos : pos + size])
+        pos += size
+
+        if data[pos] == 1:
+            pos += 1
+            state = {}
+            for field in PLAYER_FIELDS:
+                value, pos = _read_varint(data, pos)
+                state[field] = _unzigzag(value)
+            journal._final_state = state
+
+        return journal
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "Journal":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def get_player_state(player) -> dict:
+    return {field: getattr(player, field) for field in PLAYER_FIELDS}
+
+
+# The journal being recorded, if any.
+
+_journal = None
+
+
+def start(seed: int, name: str, length: int, variables: GameVariables) -> Journal:
+    """Record every decision from now on into a new journal."""
+
+    global _journal
+    _journal = Journal(seed, name, length, variables)
+    return _journal
+
+
+def stop(player) -> Journal:
+    """Stop recording, keeping the player's final state. Returns the journal."""
+
+    global _journal
+    journal, _journal = _journal, None
+    if journal != None:
+        journal.close(player)
+    return journal
+
+
+def is_recording() -> bool:
+    return _journal != None
+
+
+def record(kind: int, value: int) -> None:
+    if _journal != None:
+        _journal.record(kind, value)
+
+
+# Varints
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+def _write_varint(data: bytearray, value: int) -> None:
+    while value > 0x7F:
+        data.append((value & 0x7F) | 0x80)
+        value >>= 7
+    data.append(value)
+
+
+def _read_varint(data, pos: int) -> tuple:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
@@ -0,0 +1,173 @@
+"""What searching a room can find, by room type, read from data/loot.txt.
+
+Each line of the file is a room type followed by what can be found there
+and how likely it is, as weights relative to each other:
+
+    generic:  skeleton 1, food 1, weapon 1, armor 1, potion 1
+    kitchen:  food 1
+
+A room type added to the file, with a rooms_<type>.txt of names beside it,
+turns up in the dungeon without any change to the code. Lines starting
+with # are comments.
+
+Every table is turned into an alias table (Vose's method) when it is
+loaded, so a draw costs one random() call however many items the table
+has and whatever their weights. Like the word lists, the file is read once
+per process and checked for changes at most every
+wordtables.RECHECK_SECONDS.
+"""
+
+import os
+import time
+
+import wordtables
+
+LOOT_FILE = "data/loot.txt"
+
+# Everything a search can find; GameEngine.search knows what to do with each.
+ITEMS = ("skeleton", "food", "weapon", "armor", "potion")
+
+
+class LootTable:
+    """The items of one room type with their weights, ready to draw from."""
+
+    def __init__(self, weights: dict):
+        if len(weights) == 0:
+            raise ValueError("A loot table needs at least one item.")
+        for item, weight in weights.items():
+            if item not in ITEMS:
+                raise ValueError(f"Loot table has an unknown item: {item}")
+            if weight <= 0:
+                raise ValueError(f"Loot table weight must be positive: {item}")
+
+        self._weights = dict(weights)
+        self._items = tuple(weights)
+        self._chances, self._aliases = _build_alias(list(weights.values()))
+
+    @property
+    def items(self) -> tuple:
+        return self._items
+
+    def probability(self, item: str) -> float:
+        """The chance of drawing item."""
+
+        return self._weights.get(item, 0) / sum(self._weights.values())
+
+    def get_alias_table(self) -> tuple:
+        """(items, chances, aliases): the table draw() reads, for drawing
+        from many games at once."""
+
+        return self._items, self._chances, self._aliases
+
+    def draw(self, stream) -> str:
+        """One item, picked with a single stream.random() call.
+
+        The whole part of random() * size picks a column of the table and
+        the fraction decides between the column's item and its alias.
+        """
+
+        position = stream.random() * len(self._items)
+        column = int(position)
+        if position - column < self._chances[column]:
+            return self._items[column]
+        return self._items[self._aliases[column]]
+
+
+def _build_alias(weights: list) -> tuple:
+    """The chance of keeping each column, and the column to use otherwise."""
+
+    size = len(weights)
+    total = sum(weights)
+    scaled = [weight * size / total for weight in weights]
+
+    chances = [1.0] * size
+    aliases = list(range(size))
+
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        less = small.pop()
+        more = large.pop()
+
+        chances[less] = scaled[less]
+        aliases[less] = more
+
+        scaled[more] -= 1.0 - scaled[less]
+        if scaled[more] < 1.0:
+            small.append(more)
+        else:
+            large.append(more)
+
+    # Whatever is left over is 1 up to rounding, and never needs its alias.
+    return tuple(chances), tuple(aliases)
+
+
+# The tables of every room type, in the order of the file, the path,
+# modification time and size of the file they were read from, and when
+# that was last checked.
+_tables = {}
+_version = None
+_checked_at = None
+
+
+def load(path: str = LOOT_FILE) -> None:
+    """Read the loot tables from path, unless it has not changed since."""
+
+    global _tables, _version, _checked_at
+
+    now = time.monotonic()
+    if (
+        _checked_at != None
+        and _version[0] == path
+        and now - _checked_at < wordtables.RECHECK_SECONDS
+    ):
+        return
+
+    status = os.stat(path)
+    version = (path, status.st_mtime_ns, status.st_size)
+    if version != _version:
+        with open(path) as f:
+            _tables = _parse(f, path)
+        _version = version
+    _checked_at = now
+
+
+def _parse(lines, path: str) -> dict:
+    tables = {}
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if line == "" or line.startswith("#"):
+            continue
+
+        room_type, _, entries = line.partition(":")
+        room_type = room_type.strip()
+        weights = {}
+        try:
+            for entry in entries.split(","):
+                item, weight = entry.split()
+                weights[item] = float(weight)
+            tables[room_type] = LootTable(weights)
+        except ValueError as e:
+            raise ValueError(f"{path}, line {number}: {e}") from None
+
+    if "generic" not in tables:
+        raise ValueError(f"{path} has no loot table for generic rooms.")
+    return tables
+
+
+def get_table(room_type: str) -> LootTable:
+    if len(_tables) == 0:
+        load()
+
+    try:
+        return _tables[room_type]
+    except KeyError:
+        raise ValueError(f"No loot table for room type {room_type}.") from None
+
+
+def get_room_types() -> tuple:
+    """Every room type with a loot table, generic first."""
+
+    if len(_tables) == 0:
+        load()
+    return ("generic", *(t for t in _tables if t != "generic"))
@@ -0,0 +1,182 @@
+"""Monte Carlo tree search over the choices of a battle, for fights too big
+or too long for battlesolver to work out exactly, like the Runekeeper with
+an army at the player's back.
+
+    search = BattleSearch(rules, random.Random(seed))
+    choice = search.choose(state, budget=0.005)
+
+Battles are played on battlesolver's model (see get_rules and get_state),
+a round at a time: resolve() gives every way a round can go, and the
+search draws one of them. Each iteration walks down from the current
+state, picking choices by UCB1 until it reaches a state it has not seen,
+plays the battle out from there with random choices, and counts a win or
+a loss for every choice on the way.
+
+Statistics are kept in a transposition table keyed by state, not in a
+tree: the same state reached by different orders of choices shares them,
+and so does the next decision of the same battle, which the search has
+already looked into.
+"""
+
+import math
+import random
+import time
+
+import battlesolver
+
+# How long a choice may take by default, in seconds.
+BUDGET = 0.005
+
+# Weight of exploring little-tried choices against exploiting good ones.
+EXPLORATION = 1.0
+
+# Rounds after which a playout counts as a loss, for the rare battle where
+# neither side can hurt the other.
+MAX_ROUNDS = 200
+
+# States kept in the table before it is cleared.
+TABLE_SIZE = 200_000
+
+
+class _Node:
+    """The statistics of one state: tries and wins of each legal choice."""
+
+    __slots__ = ("visits", "choices", "tries", "wins")
+
+    def __init__(self, choices: list):
+        self.visits = 0
+        self.choices = choices
+        self.tries = [0] * len(choices)
+        self.wins = [0.0] * len(choices)
+
+    def select(self) -> int:
+        """The index of the choice to try next, by UCB1."""
+
+        tries = self.tries
+        if 0 in tries:
+            return tries.index(0)
+
+        scale = EXPLORATION * math.sqrt(math.log(self.visits))
+        wins = self.wins
+        best = 0
+        best_score = -1.0
+        for i in range(len(tries)):
+            score = wins[i] / tries[i] + scale / math.sqrt(tries[i])
+            if score > best_score:
+                best = i
+                best_score = score
+        return best
+
+
+class BattleSearch:
+    """A search for the choices of battles with the same rules.
+
+    rand is where the search's own rolls come from, never the game's
+    streams, so searching does not change how the battle goes.
+    """
+
+    def __init__(self, rules: tuple, rand: random.Random):
+        self._rules = rules
+        self._rand = rand
+        self._table = {}
+
+    @property
+    def rules(self) -> tuple:
+        return self._rules
+
+    @property
+    def table_size(self) -> int:
+        return len(self._table)
+
+    def choose(self, state: tuple, budget: float = BUDGET, iterations: int = None):
+        """The most tried choice from state after searching for budget
+        seconds, or for iterations iterations if they run out first."""
+
+        choices = battlesolver.legal_choices(self._rules, state)
+        if len(choices) == 1:
+            return choices[0]
+
+        if len(self._table) > TABLE_SIZE:
+            self._table.clear()
+
+        deadline = time.perf_counter() + budget
+        done = 0
+        while iterations == None or done < iterations:
+            self._iterate(state)
+            done += 1
+            if time.perf_counter() >= deadline:
+                break
+
+        node = self._table[state]
+        best = max(
+            range(len(node.choices)),
+            key=lambda i: (node.tries[i], node.wins[i]),
+        )
+        return node.choices[best]
+
+    def win_rates(self, state: tuple) -> dict:
+        """The share of searched playouts won after each choice from state."""
+
+        node = self._table.get(state)
+        if node == None:
+            return {}
+        return {
+            choice: node.wins[i] / node.tries[i]
+            for i, choice in enumerate(node.choices)
+            if node.tries[i] > 0
+        }
+
+    def _iterate(self, state: tuple) -> None:
+        table = self._table
+        path = []
+
+        while True:
+            node = table.get(state)
+            if node == None:
+                table[state] = _Node(battlesolver.legal_choices(self._rules, state))
+                value = self._play_out(state)
+                break
+
+            i = node.select()
+            path.append((node, i))
+            result = self._step(state, node.choices[i])
+            if type(result) is not tuple:
+                value = result
+                break
+            if len(path) >= MAX_ROUNDS:
+                value = 0.0
+                break
+            state = result
+
+        for node, i in path:
+            node.visits += 1
+            node.tries[i] += 1
+            node.wins[i] += value
+
+    def _step(self, state: tuple, choice: str):
+        """One round drawn at random: the next state, or 1.0 or 0.0 once
+        the battle is won or lost."""
+
+        roll = self._rand.random()
+        outcomes = battlesolver.resolve(self._rules, state, choice)
+        for chance, result in outcomes:
+            roll -= chance
+            if roll < 0.0:
+                return result
+        return outcomes[-1][1]
+
+    def _play_out(self, state: tuple) -> float:
+        """Play the battle out with random choices; 1.0 for a win."""
+
+        rules = self._rules
+        choose = self._rand.choice
+        for _ in range(MAX_ROUNDS):
+            # Fleeing never wins, so playouts that flee say nothing.
+            choices = battlesolver.legal_choices(rules, state)
+            if choices[-1] == "TRY_FLEE":
+                choices.pop()
+
+            state = self._step(state, choose(choices))
+            if type(state) is not tuple:
+                return state
+        return 0.0
@@ -19,6 +19,10 @@ class Minion:
         self._attacking = False
         self._defending = True
 
+        # Set by the MinionRoster this minion joins.
+        self._roster = None
+        self._seat = None
+
     @property
     def name(self) -> str:
         return self._name
@@ -41,7 +45,10 @@ class Minion:
 
     @hp.setter
     def hp(self, new_hp) -> int:
+        old_hp = self._hp
         self._hp = new_hp
+        if self._roster is not None:
+            self._roster._hp_changed(self, old_hp)
 
     @property
     def damage(self) -> int:
@@ -49,9 +56,12 @@ class Minion:
 
     @damage.setter
     def damage(self, amt) -> None:
-        self._damage = amt
-        if self._damage <= 0:
+        if amt <= 0:
             raise ValueError("Minion tried to set an invalid damage.")
+        old_damage = self._damage
+        self._damage = amt
+        if self._roster is not None:
+            self._roster._damage_changed(self, old_damage)
 
     @property
     def attacking(self) -> bool:
@@ -63,10 +73,19 @@ class Minion:
 
     @attacking.setter
     def attacking(self, mode: bool) -> None:
-        self._attacking = mode
-        self._defending = not mode
+        self._set_role(attacking=mode)
 
     @defending.setter
     def defending(self, mode: bool) -> None:
-        self._defending = mode
-        self._attacking = not mode
+        self._set_role(attacking=not mode)
+
+    def _set_role(self, attacking: bool) -> None:
+        if attacking == self._attacking:
+            return
+
+        if self._roster is not None:
+            self._roster._leave_role(self)
+        self._attacking = attacking
+        self._defending = not attacking
+        if self._roster is not None:
+            self._roster._join_role(self)
@@ -6,6 +6,8 @@ class Monster:
     Its name is purely flavor text, no monster is different aside from their level.
     """
 
+    __slots__ = ("_name", "_level", "_hp", "_damage", "_pained", "_dead")
+
     def __init__(self, name, level=1, health_ratio=3, damage_ratio=1):
         self._name = name
         self._level = level if level > 1 else 1
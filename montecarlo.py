@@ -0,0 +1,384 @@
+import numpy as np
+
+from battleengine import BattleEngine
+from monster import Monster
+from player import Player
+
+
+# Action codes, in the same order as BattleEngine.CHOICES.
+(
+    ATTACK,
+    CAST_PAIN,
+    CAST_VAMPIRIC_TOUCH,
+    CAST_DEATH_BOLT,
+    CAST_BONE_SPIRIT,
+    DRINK_POTION,
+    COMMAND_MINION_ATTACK,
+    COMMAND_MINION_DEFEND,
+    TRY_DODGE,
+    TRY_FLEE,
+) = range(len(BattleEngine.CHOICES))
+
+
+class BatchState:
+    """The fights still in progress, as seen by a batch policy.
+
+    Per-fight values are arrays with one entry per fight in progress. The
+    minion arrays have one row per fight and one column per minion, in the
+    same order as Player.minions. Everything the fights share (weapon,
+    armor, levels) is a plain number.
+    """
+
+    def __init__(self, player: Player, monster: Monster, rng):
+        self.rng = rng
+
+        self.weapon = player.weapon
+        self.armor = player.armor
+        self.level = player.level
+        self.max_hp = player.max_hp
+        self.monster_level = monster.level
+        self.final_boss = monster.name == "Runekeeper"
+
+        self.player_hp = None
+        self.monster_hp = None
+        self.souls = None
+        self.potions = None
+        self.minion_hp = None
+        self.minion_attacking = None
+
+    @property
+    def size(self) -> int:
+        return len(self.player_hp)
+
+    def legal_mask(self):
+        """A (fights, actions) boolean array of the actions each fight may take."""
+
+        mask = np.ones((self.size, len(BattleEngine.CHOICES)), dtype=bool)
+        mask[:, CAST_BONE_SPIRIT] = self.souls > 0
+        mask[:, DRINK_POTION] = self.potions > 0
+        defending = ~self.minion_attacking & (self.minion_hp > 0)
+        mask[:, COMMAND_MINION_ATTACK] = defending.any(axis=1)
+        mask[:, COMMAND_MINION_DEFEND] = self.minion_attacking.any(axis=1)
+        if self.final_boss:
+            mask[:, TRY_FLEE] = False
+        return mask
+
+
+class BatchOutcome:
+    """Per-fight results of resolve_battles, one array entry per fight."""
+
+    def __init__(self, n: int):
+        self.won = np.zeros(n, dtype=bool)
+        self.fled = np.zeros(n, dtype=bool)
+        self.player_dead = np.zeros(n, dtype=bool)
+        self.turns = np.zeros(n, dtype=np.int32)
+        self.player_hp = np.zeros(n, dtype=np.int32)
+        self.monster_hp = np.zeros(n, dtype=np.int32)
+        self.souls = np.zeros(n, dtype=np.int32)
+        self.potions = np.zeros(n, dtype=np.int32)
+        self.minions_fallen = np.zeros(n, dtype=np.int32)
+        self.damage_dealt_personal = np.zeros(n, dtype=np.int32)
+        self.damage_dealt_minions = np.zeros(n, dtype=np.int32)
+        self.damage_taken_personal = np.zeros(n, dtype=np.int32)
+        self.damage_taken_minions = np.zeros(n, dtype=np.int32)
+        self.damage_deflected = np.zeros(n, dtype=np.int32)
+        self.damage_dodged = np.zeros(n, dtype=np.int32)
+
+    @property
+    def win_rate(self) -> float:
+        return float(self.won.mean())
+
+    @property
+    def flee_rate(self) -> float:
+        return float(self.fled.mean())
+
+    @property
+    def death_rate(self) -> float:
+        return float(self.player_dead.mean())
+
+
+# Batch policies. Each takes a BatchState and returns an array of action codes.
+
+
+def attack_policy(state: BatchState):
+    return np.full(state.size, ATTACK, dtype=np.int8)
+
+
+def dodge_policy(state: BatchState):
+    return np.full(state.size, TRY_DODGE, dtype=np.int8)
+
+
+def random_policy(state: BatchState):
+    """Pick uniformly among the legal actions of each fight."""
+
+    weights = state.legal_mask() * state.rng.random((state.size, len(BattleEngine.CHOICES)))
+    return weights.argmax(axis=1).astype(np.int8)
+
+
+def resolve_battles(
+    player: Player,
+    monster: Monster,
+    n: int,
+    policy=attack_policy,
+    seed=None,
+    max_rounds: int = 1000,
+    chunk_size: int = 1_000_000,
+) -> BatchOutcome:
+    """Simulate n independent fights between copies of player and monster.
+
+    Follows the same rules as BattleEngine, but every fight advances in
+    lockstep as NumPy arrays. The player and monster are only read, never
+    changed, and Stats are left alone. Fights still going after max_rounds
+    are reported as neither won, fled nor lost.
+    """
+
+    if n <= 0:
+        raise ValueError("Can't resolve a non-positive number of battles.")
+
+    rng = np.random.default_rng(seed)
+    outcome = BatchOutcome(n)
+
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        _resolve_chunk(player, monster, policy, rng, outcome, start, stop, max_rounds)
+
+    return outcome
+
+
+def _spell_damage(weapon: int, ratio) -> int:
+    damage = round(weapon / ratio)
+    if damage <= 0:
+        damage = 1
+    return damage
+
+
+def _resolve_chunk(player, monster, policy, rng, outcome, start, stop, max_rounds):
+    n = stop - start
+    state = BatchState(player, monster, rng)
+
+    weapon = state.weapon
+    armor = state.armor
+    final_boss = state.final_boss
+    variables = player.variables
+
+    # Everything that only depends on weapon and levels is the same for
+    # every fight, so it is worked out once with the scalar rules.
+    pain_damage = 0 if weapon == 1 else _spell_damage(weapon, variables.SPELL_PAIN_RATIO)
+    vampiric_damage = (
+        1 if weapon == 1 else _spell_damage(weapon, variables.SPELL_VAMPIRIC_TOUCH_RATIO)
+    )
+    death_bolt_damage = _spell_damage(weapon, variables.SPELL_DEATH_BOLT_RATIO)
+
+    monster_damage = monster.damage
+    pained_damage = monster.damage / variables.SPELL_PAIN_RATIO
+    pained_damage = 0 if pained_damage < 1 else round(pained_damage)
+
+    # As in BattleEngine, the chances used by the rolls are not clamped at 0.
+    flee_chance = (
+        variables.FLEE_BASE_CHANCE
+        + (player.level - monster.level) * variables.FLEE_LEVEL_VARIANCE
+    )
+    dodge_chance = (
+        variables.DODGE_BASE_CHANCE
+        - (monster.level - player.level) * variables.DODGE_LEVEL_VARIANCE
+    )
+
+    minion_damage = np.array([m.damage for m in player.minions], dtype=np.int32)
+    minion_max_hp = np.array([m.max_hp for m in player.minions], dtype=np.int32)
+    first_minion_damage = minion_damage[0] if len(minion_damage) > 0 else 0
+
+    # Working arrays for the fights still in progress. ids maps them back
+    # to their slot in the outcome.
+    ids = np.arange(start, stop)
+    php = np.full(n, player.hp, dtype=np.int32)
+    mhp = np.full(n, monster.hp, dtype=np.int32)
+    souls = np.full(n, player.souls, dtype=np.int32)
+    potions = np.full(n, player.potions, dtype=np.int32)
+    hp = np.tile(np.array([m.hp for m in player.minions], dtype=np.int32), (n, 1))
+    attacking = np.tile(
+        np.array([m.attacking for m in player.minions], dtype=bool), (n, 1)
+    )
+
+    turns = np.zeros(n, dtype=np.int32)
+    fallen = np.zeros(n, dtype=np.int32)
+    dealt_personal = np.zeros(n, dtype=np.int32)
+    dealt_minions = np.zeros(n, dtype=np.int32)
+    taken_personal = np.zeros(n, dtype=np.int32)
+    taken_minions = np.zeros(n, dtype=np.int32)
+    deflected = np.zeros(n, dtype=np.int32)
+    dodged = np.zeros(n, dtype=np.int32)
+
+    for _ in range(max_rounds):
+        k = len(ids)
+        if k == 0:
+            break
+
+        state.player_hp = php
+        state.monster_hp = mhp
+        state.souls = souls
+        state.potions = potions
+        state.minion_hp = hp
+        state.minion_attacking = attacking
+
+        action = np.asarray(policy(state))
+        turns += 1
+
+        pained = np.zeros(k, dtype=bool)
+        dodging = action == TRY_DODGE
+        won = np.zeros(k, dtype=bool)
+        soul = np.zeros(k, dtype=bool)
+        fled = np.zeros(k, dtype=bool)
+
+        # 1. The player's choice resolves.
+
+        m = action == ATTACK
+        mhp[m] -= weapon
+        dealt_personal[m] += weapon
+
+        m = action == CAST_PAIN
+        pained = m
+        mhp[m] -= pain_damage
+        dealt_personal[m] += pain_damage
+
+        m = action == CAST_VAMPIRIC_TOUCH
+        php[m] = np.minimum(php[m] + vampiric_damage, state.max_hp)
+        mhp[m] -= vampiric_damage
+        dealt_personal[m] += vampiric_damage
+
+        m = action == CAST_DEATH_BOLT
+        php[m] = np.maximum(php[m] - weapon, 0)
+        mhp[m] -= death_bolt_damage
+        dealt_personal[m] += death_bolt_damage
+        taken_personal[m] += weapon
+
+        m = action == CAST_BONE_SPIRIT
+        souls[m] -= 1
+        if final_boss:
+            mhp[m] -= state.level + weapon + souls[m]
+        else:
+            won |= m
+
+        m = action == DRINK_POTION
+        potions[m] -= 1
+        php[m] = np.minimum(php[m] + variables.POTION_VALUE, state.max_hp)
+
+        m = action == COMMAND_MINION_ATTACK
+        if m.any():
+            rows = np.flatnonzero(m)
+            cols = (~attacking[rows]).argmax(axis=1)
+            attacking[rows, cols] = True
+
+        m = action == COMMAND_MINION_DEFEND
+        if m.any():
+            rows = np.flatnonzero(m)
+            cols = attacking[rows].argmax(axis=1)
+            attacking[rows, cols] = False
+
+        m = action == TRY_FLEE
+        if m.any():
+            fled = m & (rng.integers(0, 101, size=k) < flee_chance)
+
+        # 2. and 3. Bone Spirit, fleeing, or the player's blow ends the fight.
+
+        live = ~(won | fled)
+        killed = live & (mhp <= 0)
+        won |= killed
+        soul |= killed
+        live &= ~killed
+
+        # 4. and 5. Attacking minions strike.
+
+        if minion_damage.size > 0:
+            attackers = attacking.sum(axis=1)
+            damage = np.where(
+                attackers == 1, first_minion_damage, attacking @ minion_damage
+            )
+            damage = np.where(live, damage, 0)
+            mhp -= damage
+            dealt_minions += damage
+
+            killed = live & (mhp <= 0)
+            won |= killed
+            soul |= killed
+            live &= ~killed
+
+        # 6. The monster attacks.
+
+        incoming = np.where(pained, pained_damage, monster_damage)
+        striking = live & ~(pained & (incoming == 0))
+        if armor > 0:
+            deflected[striking] += armor
+            incoming = incoming - armor
+        incoming = np.where(striking, np.maximum(incoming, 0), 0)
+
+        if minion_damage.size > 0:
+            # Defending minions soak the blow in roster order: every
+            # defender whose running total of hp fits inside the blow
+            # falls, and the first one past it is struck for the rest.
+            defending = ~attacking & (hp > 0)
+            pool = np.where(defending, hp, 0)
+            total = np.cumsum(pool, axis=1)
+            before = total - pool
+            reach = incoming[:, None]
+            touched = defending & (before < reach)
+            hp -= np.where(touched, reach - before, 0)
+            fallen += (touched & (total <= reach)).sum(axis=1)
+            absorbed = np.minimum(incoming, total[:, -1])
+            taken_minions += absorbed
+            incoming = incoming - absorbed
+
+        hit = incoming > 0
+        if hit.any():
+            evaded = hit & dodging & (rng.integers(0, 101, size=k) < dodge_chance)
+            dodged[evaded] += incoming[evaded]
+            struck = hit & ~evaded
+            taken_personal[struck] += incoming[struck]
+            php[struck] = np.maximum(php[struck] - incoming[struck], 0)
+
+        dead = live & (php <= 0)
+
+        # Record finished fights and drop them from the working arrays.
+
+        done = won | fled | dead
+        if done.any():
+            souls[soul] += 1
+
+            d = ids[done]
+            outcome.won[d] = won[done]
+            outcome.fled[d] = fled[done]
+            outcome.player_dead[d] = dead[done]
+            _store(outcome, d, done, php, mhp, souls, potions, turns, fallen,
+                   dealt_personal, dealt_minions, taken_personal, taken_minions,
+                   deflected, dodged)
+
+            keep = ~done
+            ids = ids[keep]
+            php, mhp, souls, potions = php[keep], mhp[keep], souls[keep], potions[keep]
+            hp, attacking = hp[keep], attacking[keep]
+            turns, fallen = turns[keep], fallen[keep]
+            dealt_personal, dealt_minions = dealt_personal[keep], dealt_minions[keep]
+            taken_personal, taken_minions = taken_personal[keep], taken_minions[keep]
+            deflected, dodged = deflected[keep], dodged[keep]
+
+    if len(ids) > 0:
+        everything = np.ones(len(ids), dtype=bool)
+        _store(outcome, ids, everything, php, mhp, souls, potions, turns, fallen,
+               dealt_personal, dealt_minions, taken_personal, taken_minions,
+               deflected, dodged)
+
+
+def _store(outcome, d, mask, php, mhp, souls, potions, turns, fallen,
+           dealt_personal, dealt_minions, taken_personal, taken_minions,
+           deflected, dodged) -> None:
+    outcome.player_hp[d] = php[mask]
+    outcome.monster_hp[d] = mhp[mask]
+    outcome.souls[d] = souls[mask]
+    outcome.potions[d] = potions[mask]
+    outcome.turns[d] = turns[mask]
+    outcome.minions_fallen[d] = fallen[mask]
+    outcome.damage_dealt_personal[d] = dealt_personal[mask]
+    outcome.damage_dealt_minions[d] = dealt_minions[mask]
+    outcome.damage_taken_personal[d] = taken_personal[mask]
+    outcome.damage_taken_minions[d] = taken_minions[mask]
+    outcome.damage_deflected[d] = deflected[mask]
+    outcome.damage_dodged[d] = dodged[mask]
@@ -1,12 +1,27 @@
+import journal
 from minion import Minion
+from roster import MinionRoster
+from stats import Stats
 import util
-from variables import Variables
+from variables import GameVariables
 
 
 class Player:
-    def __init__(self, name):
+    # The answers to _ask_minion_behavior, in menu order.
+    BEHAVIOR_ANSWERS = ("attack", "defend", "always_attack", "always_defend")
+
+    def __init__(self, name, army: str = None, variables: GameVariables = None):
+        """army picks how minions are stored: "objects" (one Minion each) or
+        "arrays" (NumPy arrays, for very large armies). Defaults to
+        MINION_ARMY of the game's variables, which are those of a game
+        starting now unless given."""
+
+        if variables == None:
+            variables = GameVariables.current()
+        self._variables = variables
+
         self._name = name
-        self._minions = []
+        self._minions = self._make_roster(army or variables.MINION_ARMY)
         self._food = 0
         self._hunger = 0
         self._level = 1
@@ -16,7 +31,7 @@ class Player:
 
         self._doom = 0
 
-        self._max_hp = Variables.PLAYER_MAX_HP
+        self._max_hp = variables.PLAYER_MAX_HP
         self._hp = self._max_hp
 
         self._dodging = False
@@ -26,6 +41,21 @@ class Player:
 
         self._minion_default = "ask"
 
+        self._stats = Stats()
+
+    @staticmethod
+    def _make_roster(army: str):
+        match army:
+            case "objects":
+                return MinionRoster()
+            case "arrays":
+                # Only needed, and NumPy only imported, for array armies.
+                from arrayroster import ArrayMinionRoster
+
+                return ArrayMinionRoster()
+            case _:
+                raise ValueError(f"Unknown minion army storage: {army}")
+
     @property
     def minion_default(self) -> str:
         return self._minion_default
@@ -148,7 +178,16 @@ class Player:
         return self._name
 
     @property
-    def minions(self) -> list:
+    def stats(self) -> Stats:
+        return self._stats
+
+    @property
+    def variables(self) -> GameVariables:
+        """The variables of the player's game."""
+        return self._variables
+
+    @property
+    def minions(self):
         return self._minions
 
     @property
@@ -193,106 +232,128 @@ class Player:
 
         return weapon_str
 
-    def add_minion(self, minion: Minion, silent=False) -> None:
-        if not silent:
-            match self.minion_default:
-                case "ask":
-                    behavior = self._ask_minion_behavior()
-                    match behavior:
-                        case "attack":
-                            minion.attacking = True
-                        case "defend":
-                            minion.defending = True
-                        case _:
-                            raise ValueError(
-                                f"add_minion tried to set an unusual behavior: {behavior}"
-                            )
+    def add_minion(self, minion: Minion, silent=False, behavior: str = None) -> None:
+        """Add a minion to the army.
+
+        A silent add always defends. Otherwise behavior decides, falling back
+        to the minion default. When that is "ask", the minion defends until
+        the caller asks the player with ask_new_minion_behavior().
+        """
+
+        if silent:
+            minion.defending = True
+        else:
+            if behavior is None:
+                behavior = self.minion_default
+            if behavior == "ask":
+                behavior = "defend"
+
+            match behavior:
                 case "attack":
                     minion.attacking = True
                 case "defend":
                     minion.defending = True
                 case _:
                     raise ValueError(
-                        f"add_minion tried to set an unusual behavior: {self.minion_default}"
+                        f"add_minion tried to set an unusual behavior: {behavior}"
                     )
-        else:
-            minion.defending = True
-        self._minions.append(minion)
+        self._minions.add(minion)
+
+    def _print_current_minion_roster(self, leave_out_newest=False) -> None:
+        defending = self.minions_defending
+        if leave_out_newest:
+            # The newest minion defends only until it is told what to do.
+            defending -= 1
 
-    def _print_current_minion_roster(self) -> None:
-        print(
+        util.say(
             f"You currently have {self.minions_attacking} {util.make_plural('minion', self.minions_attacking)} attacking."
         )
-        print(
-            f"You currently have {self.minions_defending} {util.make_plural('minion', self.minions_defending)} defending."
+        util.say(
+            f"You currently have {defending} {util.make_plural('minion', defending)} defending."
         )
 
-    def _ask_minion_behavior(self) -> str:
+    async def ask_new_minion_behavior(self) -> None:
+        """Ask what the newest minion, added while the default was "ask",
+        will do."""
+
+        if await self._ask_minion_behavior() == "attack":
+            self._minions[-1].attacking = True
+
+    async def _ask_minion_behavior(self) -> str:
         """Set the new minion into either attack or defend mode.
 
         Returns a str: attack or defend.
         """
 
-        print("\nWhat will the new minion do?\n")
+        util.say("\nWhat will the new minion do?\n")
 
-        self._print_current_minion_roster()
+        self._print_current_minion_roster(leave_out_newest=True)
 
-        print("\n1. Attack")
-        print("2. Defend")
-        print("3. Attack, and don't ask again")
-        print("4. Defend, and don't ask again")
+        util.say("\n1. Attack")
+        util.say("2. Defend")
+        util.say("3. Attack, and don't ask again")
+        util.say("4. Defend, and don't ask again")
 
-        choice = util.prompt_for_number_safely("\nChoice: ", 4)
+        choice = await util.prompt_for_number_safely("\nChoice: ", 4)
 
         match choice:
-            case 1:
-                print("\nThe minion joins your attacking force.")
-                return "attack"
-            case 2:
-                print("\nThe minion joins your defending ranks.")
-                return "defend"
-            case 3:
-                print("\nThe minion joins your attacking force.")
+            case 1 | 3:
+                util.say("\nThe minion joins your attacking force.")
+            case 2 | 4:
+                util.say("\nThe minion joins your defending ranks.")
+
+        return self.answer_minion_behavior(self.BEHAVIOR_ANSWERS[choice - 1])
+
+    def answer_minion_behavior(self, answer: str) -> str:
+        """Settle the question of _ask_minion_behavior with one of
+        BEHAVIOR_ANSWERS. The "always" answers also become the default.
+
+        Returns a str: attack or defend.
+        """
+
+        if answer not in self.BEHAVIOR_ANSWERS:
+            raise ValueError(f"Invalid minion behavior answer: {answer}")
+
+        journal.record(journal.BEHAVIOR, self.BEHAVIOR_ANSWERS.index(answer))
+
+        match answer:
+            case "always_attack":
                 self.minion_default = "attack"
                 return "attack"
-            case 4:
-                print("\nThe minion joins your defending ranks.")
+            case "always_defend":
                 self.minion_default = "defend"
                 return "defend"
+            case _:
+                return answer
 
-    def _prompt_for_default_behavior(self) -> None:
+    async def _prompt_for_default_behavior(self) -> str:
         """As _ask_minion_behavior.
 
-        Sets ask, attack, or defend."""
+        Returns the new default: ask, attack, or defend."""
 
-        print("\nWhat will new minions do?\n")
+        util.say("\nWhat will new minions do?\n")
 
         self._print_current_minion_roster()
 
-        print("\n1. Ask for minion behavior every time.")
-        print("2. All new minions will attack.")
-        print("3. All new minions will defend.")
+        util.say("\n1. Ask for minion behavior every time.")
+        util.say("2. All new minions will attack.")
+        util.say("3. All new minions will defend.")
 
-        choice = util.prompt_for_number_safely("\nChoice: ", 3)
+        choice = await util.prompt_for_number_safely("\nChoice: ", 3)
 
         match choice:
             case 1:
-                print("\nNew minions will ask for behavior every time.")
-                self.minion_default = "ask"
+                util.say("\nNew minions will ask for behavior every time.")
+                return "ask"
             case 2:
-                print("\nNew minions will now always attack.")
-                self.minion_default = "attack"
+                util.say("\nNew minions will now always attack.")
+                return "attack"
             case 3:
-                print("\nNew minions will now always defend.")
-                self.minion_default = "defend"
+                util.say("\nNew minions will now always defend.")
+                return "defend"
 
     def destroy_minion(self, minion: Minion) -> None:
-        if minion in self._minions:
-            self._minions.remove(minion)
-        else:
-            raise ValueError(
-                "Tried to remove a minion that wasn't already in the minions list."
-            )
+        self._minions.remove(minion)
 
     def heal(self, amt) -> None:
         self.hp += amt
@@ -319,29 +380,14 @@ class Player:
     def level_up(self) -> None:
         """Called on winning a battle."""
 
-        self.level += 1
-        self.max_hp += 1
+        self._level += 1
+        self._max_hp += 1
 
     @property
     def minions_attacking(self) -> int:
-        return self._get_attacking_minion_count()
+        return self._minions.attacking_count
 
     @property
     def minions_defending(self) -> int:
-        return self._get_defending_minion_count()
-
-    def _get_attacking_minion_count(self) -> int:
-        count = 0
-        if self.minion_count > 0:
-            for minion in self.minions:
-                if minion.attacking:
-                    count += 1
-        return count
-
-    def _get_defending_minion_count(self) -> int:
-        count = 0
-        if self.minion_count > 0:
-            for minion in self.minions:
-                if minion.defending and minion.hp > 0:
-                    count += 1
-        return count
+        """Defending minions that are still standing."""
+        return self._minions.defending_count
@@ -0,0 +1,480 @@
+"""Automated players, for headless runs through GameEngine.run.
+
+A policy is asked for every decision the interactive game would prompt
+the player for. It sees the game through a GameView, and a battle through
+a BattleView: read-only stand-ins for the engines that let it look at
+everything a player could see and change nothing. A view is made once per
+game or battle, so a decision costs no more than the attribute lookups
+the policy itself makes.
+
+    cautious    searches every room and heals up before moving on
+    aggressive  looks for a fight in every room and attacks with everything
+    minions     raises every corpse it can and keeps its army defending
+    random      picks any allowed choice at random
+    mcts        plays as cautious, but searches every battle (see mcts.py)
+"""
+
+from abc import ABC, abstractmethod
+import random
+
+import battlesolver
+import mcts
+import rng
+from variables import GameVariables
+
+
+class PlayerView:
+    """What a policy can see of the player."""
+
+    __slots__ = ("_player",)
+
+    def __init__(self, player):
+        self._player = player
+
+    @property
+    def name(self) -> str:
+        return self._player.name
+
+    @property
+    def hp(self) -> int:
+        return self._player.hp
+
+    @property
+    def max_hp(self) -> int:
+        return self._player.max_hp
+
+    @property
+    def level(self) -> int:
+        return self._player.level
+
+    @property
+    def food(self) -> int:
+        return self._player.food
+
+    @property
+    def hunger(self) -> int:
+        return self._player.hunger
+
+    @property
+    def doom(self) -> int:
+        return self._player.doom
+
+    @property
+    def runes(self) -> int:
+        return self._player.runes
+
+    @property
+    def potions(self) -> int:
+        return self._player.potions
+
+    @property
+    def souls(self) -> int:
+        return self._player.souls
+
+    @property
+    def armor(self) -> int:
+        return self._player.armor
+
+    @property
+    def weapon(self) -> int:
+        return self._player.weapon
+
+    @property
+    def minion_default(self) -> str:
+        return self._player.minion_default
+
+    @property
+    def minion_count(self) -> int:
+        return self._player.minion_count
+
+    @property
+    def minions_attacking(self) -> int:
+        return self._player.minions_attacking
+
+    @property
+    def minions_defending(self) -> int:
+        return self._player.minions_defending
+
+
+class MonsterView:
+    """What a policy can see of the monster in a battle."""
+
+    __slots__ = ("_monster",)
+
+    def __init__(self, monster):
+        self._monster = monster
+
+    @property
+    def name(self) -> str:
+        return self._monster.name
+
+    @property
+    def level(self) -> int:
+        return self._monster.level
+
+    @property
+    def hp(self) -> int:
+        return self._monster.hp
+
+    @property
+    def damage(self) -> int:
+        return self._monster.damage
+
+
+class GameView:
+    """What a policy can see of a game between battles."""
+
+    __slots__ = ("_game", "_player")
+
+    def __init__(self, game):
+        self._game = game
+        self._player = PlayerView(game.player)
+
+    @property
+    def player(self) -> PlayerView:
+        return self._player
+
+    @property
+    def variables(self) -> GameVariables:
+        return self._game.variables
+
+    @property
+    def seed(self) -> int:
+        """The master seed of the game."""
+        return self._game.master.streams.seed
+
+    @property
+    def length(self) -> int:
+        return self._game.length
+
+    @property
+    def room_count(self) -> int:
+        return self._game.room_count
+
+    @property
+    def room_type(self) -> str:
+        return self._game.room.room_type
+
+    @property
+    def turns(self) -> int:
+        return self._game.turns
+
+    @property
+    def battles(self) -> int:
+        return self._game.battles
+
+    def can_search(self) -> bool:
+        return self._game.can_search()
+
+    def can_rest(self) -> bool:
+        return self._game.can_rest()
+
+    def max_rest_hours(self) -> int:
+        return self._game.max_rest_hours()
+
+
+class BattleView:
+    """What a policy can see of a battle in progress."""
+
+    __slots__ = ("_battle", "_player", "_monster")
+
+    def __init__(self, battle):
+        self._battle = battle
+        self._player = PlayerView(battle.player)
+        self._monster = MonsterView(battle.monster)
+
+    @property
+    def player(self) -> PlayerView:
+        return self._player
+
+    @property
+    def monster(self) -> MonsterView:
+        return self._monster
+
+    @property
+    def variables(self) -> GameVariables:
+        return self._battle.variables
+
+    @property
+    def seed(self) -> int:
+        """The master seed of the game."""
+        return self._battle.streams.seed
+
+    @property
+    def final_boss(self) -> bool:
+        return self._battle.final_boss
+
+    @property
+    def turns(self) -> int:
+        """Rounds played so far, counting the one being decided."""
+        return self._battle.outcome.turns
+
+    def legal_choices(self) -> list:
+        return self._battle.legal_choices()
+
+    def get_flee_chance(self) -> int:
+        return self._battle.get_flee_chance()
+
+    def get_dodge_chance(self) -> int:
+        return self._battle.get_dodge_chance()
+
+    def snapshot(self) -> tuple:
+        """The battle as battlesolver's (rules, state) tuples, for policies
+        that play it forward in their heads."""
+
+        battle = self._battle
+        return (
+            battlesolver.get_rules(battle.player, battle.monster),
+            battlesolver.get_state(battle.player, battle.monster),
+        )
+
+
+class Policy(ABC):
+    """Makes every decision of a game played by GameEngine.run.
+
+    Each choose_ method is asked at the point where the interactive game
+    would prompt the player, with a GameView or a BattleView. Subclasses
+    must at least pick the room action and the battle action; the other
+    decisions have plain defaults.
+    """
+
+    @abstractmethod
+    def choose_action(self, game: GameView) -> str:
+        """One of GameEngine.ACTIONS."""
+
+    def choose_rest_hours(self, game: GameView) -> int:
+        return game.max_rest_hours()
+
+    def choose_army_orders(self, game: GameView) -> tuple:
+        """(minions to send attacking, minions to pull back to defend,
+        new default behavior or None)."""
+        return 0, 0, None
+
+    def choose_minion_behavior(self, game: GameView) -> str:
+        """"attack" or "defend", for a new minion when the default is to ask."""
+        return "defend"
+
+    @abstractmethod
+    def choose_battle_action(self, battle: BattleView) -> str:
+        """One of BattleEngine.CHOICES that battle.legal_choices() allows."""
+
+    def choose_necromancy(self, battle: BattleView) -> str:
+        """"RAISE" or "BUTCHER" the slain monster."""
+        return "RAISE"
+
+
+class CautiousPolicy(Policy):
+    """Searches every room, heals up before moving on and fights with its weapon.
+
+    A simple baseline for measuring how often a sensible run survives.
+    """
+
+    def choose_action(self, game: GameView) -> str:
+        player = game.player
+
+        if player.hp <= player.max_hp // 2 and player.potions > 0:
+            return "POTION"
+        if game.can_rest() and player.hunger < 60:
+            return "REST"
+        if game.can_search():
+            return "SEARCH"
+        return "EXPLORE"
+
+    def choose_battle_action(self, battle: BattleView) -> str:
+        player = battle.player
+
+        if player.hp <= 3 and player.potions > 0:
+            return "DRINK_POTION"
+        if (
+            player.souls > 0
+            and not battle.final_boss
+            and battle.monster.level > player.level
+        ):
+            return "CAST_BONE_SPIRIT"
+        return "ATTACK"
+
+    def choose_necromancy(self, battle: BattleView) -> str:
+        player = battle.player
+
+        if player.food == 0 and player.hunger >= 50:
+            return "BUTCHER"
+        return "RAISE"
+
+
+class AggressivePolicy(Policy):
+    """Looks for a fight in every room before moving on, and sends every
+    minion to attack. Only stops to heal when badly hurt."""
+
+    def __init__(self):
+        # The game and room last fought in, as (seed, room count).
+        self._fought_in = None
+
+    def choose_action(self, game: GameView) -> str:
+        player = game.player
+
+        if player.minion_default != "attack" or player.minions_defending > 0:
+            return "MANAGE"
+        if player.hp <= player.max_hp // 3 and player.potions > 0:
+            return "POTION"
+        if player.hp <= player.max_hp // 2 and game.can_rest():
+            return "REST"
+
+        room = (game.seed, game.room_count)
+        if self._fought_in != room:
+            self._fought_in = room
+            return "FIGHT"
+        return "EXPLORE"
+
+    def choose_army_orders(self, game: GameView) -> tuple:
+        return game.player.minions_defending, 0, "attack"
+
+    def choose_minion_behavior(self, game: GameView) -> str:
+        return "attack"
+
+    def choose_battle_action(self, battle: BattleView) -> str:
+        player = battle.player
+
+        if player.hp <= 2 and player.potions > 0:
+            return "DRINK_POTION"
+        if player.minions_defending > 0:
+            return "COMMAND_MINION_ATTACK"
+        if player.souls > 0 and battle.monster.level >= player.level + 2:
+            if not battle.final_boss:
+                return "CAST_BONE_SPIRIT"
+        return "ATTACK"
+
+
+class MinionMaximizerPolicy(Policy):
+    """Builds the biggest army it can: searches every room for skeletons,
+    fights once a room for a corpse to raise and keeps every minion
+    defending, so that they take the blows instead of each other."""
+
+    def __init__(self):
+        # The game and room last fought in, as (seed, room count).
+        self._fought_in = None
+
+    def choose_action(self, game: GameView) -> str:
+        player = game.player
+
+        if player.minion_default != "defend" or player.minions_attacking > 0:
+            return "MANAGE"
+        if player.hp <= player.max_hp // 2 and player.potions > 0:
+            return "POTION"
+        if game.can_rest() and player.hunger < 60:
+            return "REST"
+        if game.can_search():
+            return "SEARCH"
+
+        room = (game.seed, game.room_count)
+        if self._fought_in != room and player.hp > player.max_hp // 2:
+            self._fought_in = room
+            return "FIGHT"
+        return "EXPLORE"
+
+    def choose_army_orders(self, game: GameView) -> tuple:
+        return 0, game.player.minions_attacking, "defend"
+
+    def choose_battle_action(self, battle: BattleView) -> str:
+        player = battle.player
+
+        if player.hp <= 3 and player.potions > 0:
+            return "DRINK_POTION"
+        if player.hp <= 2 and not battle.final_boss:
+            return "TRY_FLEE"
+        if player.minions_attacking > 0:
+            return "COMMAND_MINION_DEFEND"
+        return "ATTACK"
+
+    def choose_necromancy(self, battle: BattleView) -> str:
+        player = battle.player
+
+        # Only eat the corpse to keep from starving.
+        if player.food == 0 and player.hunger >= 80:
+            return "BUTCHER"
+        return "RAISE"
+
+
+class RandomPolicy(Policy):
+    """Picks any choice that is allowed, at random, but never surrenders.
+
+    Its rolls come from a random.Random of its own, seeded from the game's
+    master seed, so a game played by it can be played again exactly
+    without it taking rolls from the game's streams.
+    """
+
+    # The room actions, less surrender.
+    ACTIONS = ("SEARCH", "REST", "FIGHT", "EXPLORE", "MANAGE", "POTION")
+
+    def __init__(self):
+        self._seed = None
+        self._random = None
+
+    def _get_random(self, view) -> random.Random:
+        if view.seed != self._seed:
+            self._seed = view.seed
+            self._random = random.Random(rng.derive_seed(view.seed, "policy"))
+        return self._random
+
+    def choose_action(self, game: GameView) -> str:
+        return self._get_random(game).choice(self.ACTIONS)
+
+    def choose_rest_hours(self, game: GameView) -> int:
+        return self._get_random(game).randint(0, max(game.max_rest_hours(), 0))
+
+    def choose_army_orders(self, game: GameView) -> tuple:
+        rand = self._get_random(game)
+        player = game.player
+        return (
+            rand.randint(0, player.minions_defending),
+            rand.randint(0, player.minions_attacking),
+            rand.choice((None, "ask", "attack", "defend")),
+        )
+
+    def choose_minion_behavior(self, game: GameView) -> str:
+        return self._get_random(game).choice(("attack", "defend"))
+
+    def choose_battle_action(self, battle: BattleView) -> str:
+        return self._get_random(battle).choice(battle.legal_choices())
+
+    def choose_necromancy(self, battle: BattleView) -> str:
+        return self._get_random(battle).choice(("RAISE", "BUTCHER"))
+
+
+class MCTSPolicy(CautiousPolicy):
+    """Plays as CautiousPolicy, except that battle choices come from a
+    Monte Carlo tree search of up to budget seconds, or iterations
+    iterations, a choice.
+
+    The search is seeded from the game's master seed, so with a number of
+    iterations and no time limit its games can be played again exactly.
+    """
+
+    def __init__(self, budget: float = mcts.BUDGET, iterations: int = None):
+        self._budget = budget
+        self._iterations = iterations
+        self._seed = None
+        self._random = None
+        self._search = None
+
+    def choose_battle_action(self, battle: BattleView) -> str:
+        rules, state = battle.snapshot()
+
+        # A new search for a new game or other rules; the same rules give
+        # the same battle, whose table still holds.
+        if battle.seed != self._seed or self._search.rules != rules:
+            if battle.seed != self._seed:
+                self._seed = battle.seed
+                self._random = random.Random(rng.derive_seed(battle.seed, "mcts"))
+            self._search = mcts.BattleSearch(rules, self._random)
+
+        return self._search.choose(state, self._budget, self._iterations)
+
+
+# Policies that can be picked by name, e.g. from the command line.
+POLICIES = {
+    "cautious": CautiousPolicy,
+    "aggressive": AggressivePolicy,
+    "minions": MinionMaximizerPolicy,
+    "random": RandomPolicy,
+    "mcts": MCTSPolicy,
+}
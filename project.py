@@ -1,24 +1,206 @@
+import argparse
+import atexit
+import os
+import signal
+import sqlite3
 import sys
-
+import time
+
+import dm
+import history
+import instrument
+import journal
+import rng
+import savegame
 import util
+import variables
 
 from battlemaster import BattleMaster
-from dm import DM
+from dm import DM, DungeonMaster
+from gameengine import GameEngine
+from journal import Journal
+from replay import replay
 from room import Room
-from stats import Stats
-from variables import Variables
 
 
 def main():
-    print_intro()
-    name = get_name()
-    length = get_dungeon_length()
+    args = parse_args()
+
+    if args.profile:
+        start_profiling()
+
+    if args.variables:
+        use_variables(args.variables)
+
+    if args.history:
+        use_history(args.history)
+
+    if args.replay:
+        replay_journals(args.replay)
+        return
+
+    BattleMaster.show_advisor = args.advisor
+    util.run_console(play(args))
+
+
+async def play(args: argparse.Namespace) -> None:
+    """Play a game at the console, a new one or one loaded from a snapshot."""
+
+    if args.load:
+        game = savegame.load(args.load, listener=_narrate)
+    else:
+        game = await start_game(args.seed)
+        if args.record:
+            journal.start(
+                game.master.streams.seed,
+                game.player.name,
+                game.length,
+                game.master.variables,
+            )
+
+    try:
+        await play_game(game, args.save)
+    finally:
+        history.record(game.summary(), game.player.name, "console")
+        if args.record:
+            journal.stop(game.player).save(args.record)
+        # A finished game is not left behind to be carried on.
+        if args.save and game.ending != None and os.path.exists(args.save):
+            os.remove(args.save)
+
+
+async def start_game(seed: int = None) -> GameEngine:
+    """Ask the player for their name and the length of the dungeon, and set
+    up a new game from the master seed (a random one if None).
+
+    The game's DungeonMaster becomes the current one.
+    """
+
+    master = DungeonMaster(rng.RandomStreams(seed))
+    dm.use(master)
+
+    await print_intro()
+    name = await get_name()
+    length = await get_dungeon_length()
 
     # name = "Lucky"
     # length = 10
 
-    if setup_game(name, length):
-        play_game(length)
+    setup_game(name, length)
+    return GameEngine(length, listener=_narrate, master=master)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="The Necromancer's Trial")
+    parser.add_argument(
+        "--advisor",
+        action="store_true",
+        help="show the action with the best chance of winning during battles",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="master seed; the same seed and the same choices replay the same game",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="JOURNAL",
+        help="record the seed and every choice of this game to a journal file",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="JOURNAL",
+        nargs="+",
+        help="play recorded journals back at full speed and check how they end",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time each phase of a turn and of a battle, and print p50/p95/p99 on exit",
+    )
+    parser.add_argument(
+        "--save",
+        metavar="SNAPSHOT",
+        help="keep a snapshot of the game in this file, updated after every action",
+    )
+    parser.add_argument(
+        "--load",
+        metavar="SNAPSHOT",
+        help="carry on the game saved in a snapshot file",
+    )
+    parser.add_argument(
+        "--variables",
+        metavar="FILE",
+        help="play by the variables of a TOML or JSON file (see variables.py)",
+    )
+    parser.add_argument(
+        "--history",
+        metavar="DATABASE",
+        help="keep every finished game in this SQLite database (see history.py)",
+    )
+
+    args = parser.parse_args()
+    if args.load and (args.seed != None or args.record):
+        parser.error("a loaded game cannot take --seed or --record")
+    return args
+
+
+def use_variables(path: str) -> None:
+    """Play new games by the variables of path, or exit if it is invalid."""
+
+    try:
+        variables.use_file(path)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Cannot use the variables of {path}: {e}")
+
+
+def use_history(path: str) -> None:
+    """Record finished games in the database at path, or exit if it cannot
+    be opened."""
+
+    try:
+        history.start(path)
+    except (OSError, sqlite3.Error) as e:
+        sys.exit(f"Cannot keep the history in {path}: {e}")
+
+
+def start_profiling() -> None:
+    """Time every instrumented span and print the summary on exit. On
+    systems with SIGUSR1, that signal prints it on demand."""
+
+    instrument.enable()
+    atexit.register(instrument.dump)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: instrument.dump())
+
+
+def replay_journals(paths: list) -> None:
+    """Replay each journal without printing the game, and report any whose
+    final player state differs from the recorded one."""
+
+    failed = 0
+    for path in paths:
+        recorded = Journal.load(path)
+
+        start = time.perf_counter()
+        try:
+            differences = replay(recorded)
+        except ValueError as e:
+            differences = {"error": str(e)}
+        elapsed = time.perf_counter() - start
+
+        if differences:
+            failed += 1
+            print(f"{path}: MISMATCH after {recorded.count} decisions")
+            for field, values in differences.items():
+                print(f"\t{field}: {values}")
+        else:
+            print(f"{path}: OK ({recorded.count} decisions, {elapsed * 1000:.1f} ms)")
+
+    print(f"\n{len(paths) - failed} of {len(paths)} journals replayed the same.")
+    if failed > 0:
+        sys.exit(1)
 
 
 def setup_game(player_name: str, dungeon_length: int):
@@ -30,471 +212,469 @@ def setup_game(player_name: str, dungeon_length: int):
     return True
 
 
-def play_game(length: int) -> None:
-    room_count = 1
-    room = Room(f"Entryway to the Dungeon of {length} Despairs")
+async def play_game(game: GameEngine, save_path: str = None) -> None:
+    """The interactive front-end over a GameEngine. With save_path, the
+    game is saved there whenever the player is about to choose an action."""
 
     while True:
-        skip_hunger = False
         while True:
             util.clear()
 
-            if room_count == length:
-                _do_final_boss()
+            with instrument.span("turn.battle"):
+                match game.pending_battle():
+                    case "FINAL_BOSS":
+                        await _do_final_boss(game)
+                    case "DOOM":
+                        await do_battle(game)
 
-            if DM.player.doom >= 100:
-                do_battle()
+            if save_path != None:
+                with instrument.span("turn.save"):
+                    savegame.save(game, save_path)
 
-            print(f"You are {DM.player.name} the Necromancer.")
-            if room_count == 1:
-                print(f"You stand in the {room.name}.")
-            else:
-                print(
-                    f"You stand in the {room.name}, {room_count} rooms deep into the dungeon."
-                )
+            with instrument.span("turn.render"):
+                room = game.room
+                room_count = game.room_count
 
-            if room.times_searched > 0:
-                search_str = f"You have searched this room {room.times_searched}"
-                if room.times_searched == 1:
-                    search_str += " time."
+                util.say(f"You are {DM.player.name} the Necromancer.")
+                if room_count == 1:
+                    util.say(f"You stand in the {room.name}.")
                 else:
-                    search_str += " times."
-                print(search_str)
+                    util.say(
+                        f"You stand in the {room.name}, {room_count} rooms deep into the dungeon."
+                    )
+
+                if room.times_searched > 0:
+                    search_str = f"You have searched this room {room.times_searched}"
+                    if room.times_searched == 1:
+                        search_str += " time."
+                    else:
+                        search_str += " times."
+                    util.say(search_str)
 
-            DM.print_player_info(room_count)
+                DM.print_player_info(room_count)
 
-            if (feeling := DM.get_bad_feeling()) != "":
-                print(f"{feeling}")
+                if (feeling := DM.get_bad_feeling()) != "":
+                    util.say(f"{feeling}")
 
-            # CHOICES
-            # 1. Search the room.
-            # 2. Rest here a while.
-            # 3. Look for a fight.
-            # 4. Continue exploring.
-            # 5. Manage your undead army.
-            # 6. Drink a healing potion.
-            # Q. Surrender.
+                # CHOICES
+                # 1. Search the room.
+                # 2. Rest here a while.
+                # 3. Look for a fight.
+                # 4. Continue exploring.
+                # 5. Manage your undead army.
+                # 6. Drink a healing potion.
+                # Q. Surrender.
 
-            print_choices(room)
+                print_choices(room)
 
             try:
-                choice = input("\nChoose an option: ")
-                try:
-                    choice = int(choice)
-                    match choice:
-                        case 1:
-                            # search the room
-                            if room.times_searched < room.max_searches:
-                                print("\nYou search the room...")
-                                print(do_search_result(room.search()))
-                                util.continue_prompt()
-                                break
-                            else:
-                                print(
-                                    "\nYou have searched the room enough times that you don't think you will find anything else here."
-                                )
-                                util.continue_prompt()
-                                skip_hunger = True
+                with instrument.span("turn.input"):
+                    choice = await util.read_line("\nChoose an option: ")
+                with instrument.span("turn.action"):
+                    try:
+                        choice = int(choice)
+                        match choice:
+                            case 1:
+                                # search the room
+                                if game.can_search():
+                                    util.say("\nYou search the room...")
+                                    result = game.search()
+                                    if (
+                                        result == "skeleton"
+                                        and DM.player.minion_default == "ask"
+                                    ):
+                                        await DM.player.ask_new_minion_behavior()
+                                    util.say(do_search_result(result))
+                                else:
+                                    game.search()
+                                    util.say(
+                                        "\nYou have searched the room enough times that you don't think you will find anything else here."
+                                    )
+                                await util.continue_prompt()
                                 break
-                        case 2:
-                            # rest
-                            if (
-                                DM.player.hp < DM.player.max_hp
-                                and DM.player.hunger + Variables.RESTING_HUNGER_RATE
-                                < 100
-                            ):
-                                print("\nYou prepare to rest your weary bones...\n")
-                                while True:
-                                    try:
-                                        print(
-                                            "How long do you want to rest? You will gain that much in HP and twice that hunger."
+                            case 2:
+                                # rest
+                                if game.can_rest():
+                                    util.say(
+                                        "\nYou prepare to rest your weary bones...\n"
+                                    )
+                                    wait_time = await _ask_rest_length(game)
+                                    game.rest(wait_time)
+                                    if wait_time != 0:
+                                        util.say("\nYou rest for a while...")
+                                        util.say(f"HP increases to {DM.player.hp}.")
+                                        util.say(
+                                            f"Hunger increases to {DM.player.hunger}%."
                                         )
-                                        print(
-                                            f"You are at {DM.player.hp} of {DM.player.max_hp} possible health."
+                                        await util.continue_prompt()
+                                    break
+                                else:
+                                    if DM.player.hp == DM.player.max_hp:
+                                        util.say(
+                                            "\nYou need no rest; you are fully healthy."
                                         )
-                                        print(f"You are at {DM.player.hunger}% hunger.")
-                                        wait_time = input(
-                                            "\nRest length (0 to cancel): "
+                                    if (
+                                        DM.player.hunger + game.variables.RESTING_HUNGER_RATE
+                                        >= 100
+                                    ):
+                                        util.say(
+                                            "\nYou have no time to wait -- you are about to starve to death!"
                                         )
-                                        try:
-                                            wait_time = int(wait_time)
-                                            if wait_time == 0:
-                                                print("\nYou decide against resting.")
-                                                util.continue_prompt()
-                                                break
-                                            else:
-                                                starvation = 100 - DM.player.hunger
-                                                hp_diff = (
-                                                    DM.player.max_hp - DM.player.hp
-                                                )
-                                                if (wait_time * 2) >= starvation:
-                                                    print(
-                                                        "\nYou can't wait that long -- you'll starve to death!"
-                                                    )
-                                                elif wait_time > hp_diff:
-                                                    print(
-                                                        "\nYou will not benefit from resting for that long."
-                                                    )
-                                                else:
-                                                    print("\nYou rest for a while...")
-                                                    DM.player.hp += wait_time
-                                                    DM.player.hunger += wait_time * 2
-                                                    print(
-                                                        f"HP increases to {DM.player.hp}."
-                                                    )
-                                                    print(
-                                                        f"Hunger increases to {DM.player.hunger}%."
-                                                    )
-                                                    DM.increase_doom()
-                                                    util.continue_prompt()
-                                                    break
-                                        except ValueError:
-                                            print("Unknown input.")
-                                    except (EOFError, ValueError):
-                                        print("You decide against resting.")
-                                    util.continue_prompt()
-                                    break
-                                skip_hunger = True
+                                    await util.continue_prompt()
+                                    game.rest(0)
+                            case 3:
+                                # start fight
+                                await do_battle(game, self_triggered=True)
                                 break
-                            else:
-                                if DM.player.hp == DM.player.max_hp:
-                                    print("\nYou need no rest; you are fully healthy.")
-                                if (
-                                    DM.player.hunger + Variables.RESTING_HUNGER_RATE
-                                    >= 100
-                                ):
-                                    print(
-                                        "\nYou have no time to wait -- you are about to starve to death!"
-                                    )
-                                util.continue_prompt()
-                                skip_hunger = True
-                        case 3:
-                            # start fight
-                            do_battle(self_triggered=True)
-                            break
-                        case 4:
-                            # continue exploring
-                            util.clear()
-                            print("You delve deeper into the dungeon.")
-                            room_count += 1
-                            room = DM.generate_room()
-                            print(
-                                f"You find yourself entering a new room: the {room.name}."
-                            )
-                            give_room_hints(room.room_type)
-                            DM.try_find_rune(room_count)
-                            util.continue_prompt()
-                            break
-                        case 5:
-                            # manage undead ratios
-                            manage_undead_ratio()
-                            skip_hunger = True
-                            break
-                        case 6:
-                            # drink a healing potion
-                            if DM.player.potions > 0:
+                            case 4:
+                                # continue exploring
                                 util.clear()
-                                print(
-                                    "You pop the cork of a healing potion and take a swig. Refreshing!"
+                                util.say("You delve deeper into the dungeon.")
+                                found_rune = game.explore()
+                                util.say(
+                                    f"You find yourself entering a new room: the {game.room.name}."
                                 )
-                                DM.player.potions -= 1
-                                DM.player.hp += Variables.POTION_VALUE
-                                Stats.add_potion_drink()
-                                print(
-                                    f"\nYou gain {Variables.POTION_VALUE} health, bringing your health to {DM.player.hp} out of a maximum possible {DM.player.max_hp}."
-                                )
-                            else:
-                                print("\nUnfortunately, you have no healing potions.")
-                            skip_hunger = True
-                            util.continue_prompt()
-                        case _:
-                            print("Unknown choice.")
-                except ValueError:
-                    if choice.lower() == "q":
-                        util.close(DM.player.name)
-                    else:
-                        print("Unknown choice.")
+                                give_room_hints(game.room.room_type)
+                                if found_rune:
+                                    DM.print_rune_found()
+                                await util.continue_prompt()
+                                break
+                            case 5:
+                                # manage undead ratios
+                                if not await manage_undead_ratio(game):
+                                    game.manage_army()
+                                break
+                            case 6:
+                                # drink a healing potion
+                                if game.drink_potion():
+                                    util.clear()
+                                    util.say(
+                                        "You pop the cork of a healing potion and take a swig. Refreshing!"
+                                    )
+                                    util.say(
+                                        f"\nYou gain {game.variables.POTION_VALUE} health, bringing your health to {DM.player.hp} out of a maximum possible {DM.player.max_hp}."
+                                    )
+                                else:
+                                    util.say(
+                                        "\nUnfortunately, you have no healing potions."
+                                    )
+                                await util.continue_prompt()
+                            case _:
+                                util.say("Unknown choice.")
+                    except ValueError:
+                        if choice.lower() == "q":
+                            game.surrender()
+                            util.close(DM.player.name)
+                        else:
+                            util.say("Unknown choice.")
             except (EOFError, KeyboardInterrupt):
-                print("Unknown choice.")
+                util.say("Unknown choice.")
 
-        DM.update_minion_stats()
+        with instrument.span("turn.end"):
+            await util.narrate(game.end_turn)
+            await check_ending(game)
 
-        if not skip_hunger:
-            DM.player.hunger += Variables.HUNGER_RATE
 
-            _try_eat_food()
+async def _ask_rest_length(game: GameEngine) -> int:
+    """Ask how long to rest. Returns 0 if the player ends up not resting."""
 
-            if DM.player.hunger >= 100:
-                DM.do_bad_ending("starvation")
+    try:
+        util.say(
+            "How long do you want to rest? You will gain that much in HP and twice that hunger."
+        )
+        util.say(f"You are at {DM.player.hp} of {DM.player.max_hp} possible health.")
+        util.say(f"You are at {DM.player.hunger}% hunger.")
+        wait_time = await util.read_line("\nRest length (0 to cancel): ")
+        try:
+            wait_time = int(wait_time)
+            if wait_time == 0:
+                util.say("\nYou decide against resting.")
+            else:
+                match game.rest_problem(wait_time):
+                    case "starve":
+                        util.say(
+                            "\nYou can't wait that long -- you'll starve to death!"
+                        )
+                    case "no_benefit":
+                        util.say("\nYou will not benefit from resting for that long.")
+                    case _:
+                        return wait_time
+        except ValueError:
+            util.say("Unknown input.")
+    except (EOFError, ValueError):
+        util.say("You decide against resting.")
+    await util.continue_prompt()
+    return 0
 
-            DM.increase_doom()
 
+def _narrate(event: str) -> None:
+    """Listener for the GameEngine."""
 
-def _try_eat_food() -> None:
-    if DM.player.hunger >= Variables.FOOD_VALUE and DM.player.food > 0:
-        print(f"\nYou eat one of your food rations. (-{Variables.FOOD_VALUE}% hunger)")
-        DM.player.food -= 1
-        DM.player.hunger -= Variables.FOOD_VALUE
-        Stats.add_ration_eat()
-        util.continue_prompt()
+    match event:
+        case "skeleton":
+            util.say("...and you find the skeleton of a previous tenant. Rise!")
+        case "eat":
+            util.say(
+                f"\nYou eat one of your food rations. (-{DM.variables.FOOD_VALUE}% hunger)"
+            )
+            util.pause()
 
 
-def manage_undead_ratio() -> None:
+async def manage_undead_ratio(game: GameEngine) -> bool:
     """Attacking minions will attack during a fight.
     Defending minions will take damage in the player's place.
+
+    Return True if any orders were given to the GameEngine.
     """
 
     if DM.player.minion_count == 0:
-        print("\nNo minions serve under your command.")
-        util.continue_prompt()
+        util.say("\nNo minions serve under your command.")
+        await util.continue_prompt()
+        return False
     else:
         util.clear()
         _print_minions()
         _print_ratio()
-        _do_ratio_management()
-        util.continue_prompt()
+        ordered = await _do_ratio_management(game)
+        await util.continue_prompt()
+        return ordered
 
 
-def _do_ratio_management():
-    print("\nWhat do you want to do?")
-    print("\n1. Set minions to offensive.")
-    print("2. Set minions to defensive.")
-    print(
+async def _do_ratio_management(game: GameEngine) -> bool:
+    util.say("\nWhat do you want to do?")
+    util.say("\n1. Set minions to offensive.")
+    util.say("2. Set minions to defensive.")
+    util.say(
         f"3. Set minion default behavior. (Currently {DM.player.minion_default.capitalize()})"
     )
-    print("Q. Finish making changes.")
+    util.say("Q. Finish making changes.")
 
     while True:
         try:
-            choice = input("\nChoice: ")
+            choice = await util.read_line("\nChoice: ")
             try:
                 choice = int(choice)
                 if choice == 1:
-                    if _move_minions_to_attacking():
-                        break
+                    if await _move_minions_to_attacking(game):
+                        return True
                 elif choice == 2:
-                    if _move_minions_to_defending():
-                        break
+                    if await _move_minions_to_defending(game):
+                        return True
                 elif choice == 3:
-                    DM.player._prompt_for_default_behavior()
-                    break
+                    game.manage_army(
+                        default=await DM.player._prompt_for_default_behavior()
+                    )
+                    return True
                 else:
-                    print("\nUnknown choice.")
+                    util.say("\nUnknown choice.")
             except ValueError:
                 if choice.lower() == "q":
-                    print("\nYou return your focus to the dungeon.")
-                    break
+                    util.say("\nYou return your focus to the dungeon.")
+                    return False
                 else:
-                    print("\nUnknown choice.")
+                    util.say("\nUnknown choice.")
         except (EOFError, KeyboardInterrupt):
-            print("\nUnknown choice.")
+            util.say("\nUnknown choice.")
 
 
-def _move_minions_to_attacking() -> bool:
+async def _move_minions_to_attacking(game: GameEngine) -> bool:
     """Move minions from defending to attacking.
     You cannot move minions if none are defending.
 
     Return True if we are breaking out of the ratio management.
     """
     if DM.player.minions_defending == 0:
-        print("\nYou have no defending minions to command.")
+        util.say("\nYou have no defending minions to command.")
     else:
         max = DM.player.minions_defending
         while True:
             try:
-                choice = input(
+                choice = await util.read_line(
                     f"\nHow many minions will move to offense? (max {max}): "
                 )
                 try:
                     choice = int(choice)
                     if choice > max:
-                        print("\nYou do not have that many minions to move.")
+                        util.say("\nYou do not have that many minions to move.")
                     elif choice < 0:
-                        print("\nYou cannot move a negative amount of minions.")
+                        util.say("\nYou cannot move a negative amount of minions.")
                     elif choice == 0:
-                        print("\nYou decide to make no changes.")
+                        util.say("\nYou decide to make no changes.")
                         return False
                     else:
                         # Select the first n minions that are defending and set them to attacking.
-                        set = 0
-                        for minion in DM.player.minions:
-                            if minion.defending:
-                                minion.attacking = True
-                                set += 1
-                            if set == choice:
-                                break
-                        print(
+                        game.manage_army(attack=choice)
+                        util.say(
                             f"\nYou command {choice} {util.make_plural('minion', choice)} to attack."
                         )
-                        print(
+                        util.say(
                             f"\nDefending minions remaining: {DM.player.minions_defending}"
                         )
                         return True
                 except ValueError:
-                    print("\nUnknown choice.")
+                    util.say("\nUnknown choice.")
             except (EOFError, KeyboardInterrupt):
-                print("\nUnknown choice.")
+                util.say("\nUnknown choice.")
 
 
-def _move_minions_to_defending() -> bool:
+async def _move_minions_to_defending(game: GameEngine) -> bool:
     """Move minions from attacking to defending.
     You cannot move minions if none are attacking.
 
     Return True if we are breaking out of the ratio management.
     """
     if DM.player.minions_attacking == 0:
-        print("\nYou have no attacking minions to command.")
+        util.say("\nYou have no attacking minions to command.")
     else:
         max = DM.player.minions_attacking
         while True:
             try:
-                choice = input(
+                choice = await util.read_line(
                     f"\nHow many minions will move to defense? (max {max}): "
                 )
                 try:
                     choice = int(choice)
                     if choice > max:
-                        print("\nYou do not have that many minions to move.")
+                        util.say("\nYou do not have that many minions to move.")
                     elif choice < 0:
-                        print("\nYou cannot move a negative amount of minions.")
+                        util.say("\nYou cannot move a negative amount of minions.")
                     elif choice == 0:
-                        print("You decide to make no changes.")
+                        util.say("You decide to make no changes.")
                         return False
                     else:
-                        # Select the first n minions that are defending and set them to attacking.
-                        set = 0
-                        for minion in DM.player.minions:
-                            if minion.attacking:
-                                minion.defending = True
-                                set += 1
-                            if set == choice:
-                                break
-                        print(
+                        # Select the first n minions that are attacking and set them to defending.
+                        game.manage_army(defend=choice)
+                        util.say(
                             f"\nYou command {choice} {util.make_plural('minion', choice)} to defend."
                         )
-                        print(
+                        util.say(
                             f"\nAttacking minions remaining: {DM.player.minions_attacking}"
                         )
                         return True
                 except ValueError:
-                    print("\nUnknown choice.")
+                    util.say("\nUnknown choice.")
             except (EOFError, KeyboardInterrupt):
-                print("\nUnknown choice.")
+                util.say("\nUnknown choice.")
 
 
 def _print_minions():
-    print("These minions serve under your command...")
+    util.say("These minions serve under your command...")
     for minion in DM.player.minions:
-        print(f"\t{minion.name}")
-    print(f"Total: {DM.player.minion_count}")
+        util.say(f"\t{minion.name}")
+    util.say(f"Total: {DM.player.minion_count}")
 
 
 def _print_ratio():
-    print(f"\nMinions attacking: {DM.player.minions_attacking}")
-    print(f"Minions defending: {DM.player.minions_defending}")
+    util.say(f"\nMinions attacking: {DM.player.minions_attacking}")
+    util.say(f"Minions defending: {DM.player.minions_defending}")
 
-    print("\nAttacking minions will attack your enemies every turn.")
-    print(f"Currently, they will deal {DM._get_minion_attack()} damage per turn.")
+    util.say("\nAttacking minions will attack your enemies every turn.")
+    util.say(f"Currently, they will deal {DM._get_minion_attack()} damage per turn.")
 
-    print("\nDefending minions will take attacks intended for you.")
-    print(
+    util.say("\nDefending minions will take attacks intended for you.")
+    util.say(
         f"Currently, a minion can withstand {DM._get_minion_defense()} damage before being destroyed."
     )
 
 
-def _do_final_boss() -> None:
+async def _do_final_boss(game: GameEngine) -> None:
     util.clear()
 
-    print(
+    util.say(
         "As you enter the final chamber of the dungeon, you notice an unsettling silence permeating the area."
     )
-    print("\nSuddenly, there is a noise, the clinking of chains in the darkness.")
-    print(
+    util.say("\nSuddenly, there is a noise, the clinking of chains in the darkness.")
+    util.say(
         "A fell growl fills the chamber as a ragged, towering figure, shackles around its wrists and ankles, shambles into the light of your death lantern."
     )
-    print(
+    util.say(
         "\nThe creature snatches away the final Rune of Escape and charges towards you with a feral roar!"
     )
 
-    util.continue_prompt()
+    await util.continue_prompt()
 
-    boss = DM.generate_final_boss()
-    bm = BattleMaster(DM.player, boss)
-    bm.do_battle()
+    boss = game.spawn_monster("FINAL_BOSS")
+    bm = BattleMaster(game.player, boss, game.master.streams)
+    await bm.do_battle()
 
     util.clear()
 
-    check_player_dead(boss.name)
-    DM.do_victory()
+    game.finish_battle(boss)
+    await check_ending(game)
 
 
-def do_battle(self_triggered=False) -> None:
+async def do_battle(game: GameEngine, self_triggered=False) -> None:
     util.clear()
 
-    monster = DM.generate_monster()
+    monster = game.spawn_monster("SELF" if self_triggered else "DOOM")
 
     if self_triggered:
-        print(f"You are the darkness that stalks these halls...")
-        print(f"You come upon the {monster.name}!")
+        util.say(f"You are the darkness that stalks these halls...")
+        util.say(f"You come upon the {monster.name}!")
     else:
-        print("A dreadful noise echoes from up ahead!")
-        print(f"\nThe {monster.name} emerges from the darkness!")
+        util.say("A dreadful noise echoes from up ahead!")
+        util.say(f"\nThe {monster.name} emerges from the darkness!")
 
-    util.continue_prompt()
+    await util.continue_prompt()
 
-    bm = BattleMaster(DM.player, monster)
-    bm.do_battle()
+    bm = BattleMaster(game.player, monster, game.master.streams)
+    await bm.do_battle()
 
-    DM.player.doom = 0
+    game.finish_battle(monster)
     util.clear()
 
-    check_player_dead(monster.name)
+    await check_ending(game)
 
 
-def check_player_dead(killer: str) -> None:
-    if DM.player.hp <= 0:
-        DM.do_bad_ending("damage", killer=killer)
+async def check_ending(game: GameEngine) -> None:
+    match game.ending:
+        case "starvation":
+            DM.do_bad_ending("starvation")
+        case "damage":
+            DM.do_bad_ending("damage", killer=game.killer)
+        case "victory":
+            await DM.do_victory()
 
 
 def give_room_hints(room_type: str) -> None:
     match room_type:
         case "kitchen":
-            print("You think you could find some food here.")
+            util.say("You think you could find some food here.")
         case "armory":
-            print("You may be able to find weapons or armor here.")
+            util.say("You may be able to find weapons or armor here.")
         case "workshop":
-            print("You might be able to find potions here.")
+            util.say("You might be able to find potions here.")
 
 
 def print_choices(room: Room) -> None:
-    print("\nWhat do you do?\n")
-    print(
-        f"1. Search the room.\t\t({room.searches_left} {util.make_plural('search', room.searches_left, ending='es')} left. +{Variables.HUNGER_RATE}% hunger, chance to find items, food, and skeletons)"
+    util.say("\nWhat do you do?\n")
+    util.say(
+        f"1. Search the room.\t\t({room.searches_left} {util.make_plural('search', room.searches_left, ending='es')} left. +{DM.variables.HUNGER_RATE}% hunger, chance to find items, food, and skeletons)"
     )
-    print("2. Rest here a while.\t\t(Gain HP and Hunger)")
-    print("3. Look for a fight.\t\t(Immediately start a battle)")
-    print(
-        f"4. Continue exploring.\t\t(+{Variables.HUNGER_RATE}% hunger, enter a new room)"
+    util.say("2. Rest here a while.\t\t(Gain HP and Hunger)")
+    util.say("3. Look for a fight.\t\t(Immediately start a battle)")
+    util.say(
+        f"4. Continue exploring.\t\t(+{DM.variables.HUNGER_RATE}% hunger, enter a new room)"
     )
-    print(
+    util.say(
         f"5. Manage your undead army.\t(Change Attack/Defense Ratio, currently {DM.player.minions_attacking}/{DM.player.minions_defending})"
     )
-    print(f"6. Drink a healing potion.\t(-1 Potion, +{Variables.POTION_VALUE} HP)")
-    print("\nQ. Surrender to the darkness...")
+    util.say(
+        f"6. Drink a healing potion.\t(-1 Potion, +{DM.variables.POTION_VALUE} HP)"
+    )
+    util.say("\nQ. Surrender to the darkness...")
 
 
 def do_search_result(result: str) -> str:
-    """See Room.POSSIBLE_SEARCHES for types."""
+    """Describe what the GameEngine found. See Room.POSSIBLE_SEARCHES for types."""
 
     match result:
         case "nothing":
             return "...but you find nothing of use."
         case "skeleton":
-            print("...and you find the skeleton of a previous tenant. Rise!")
-            DM.add_generic_minion()
+            # Told as the skeleton rises, before it is asked what to do.
             return ""
         case "weapon":
-            DM.player.weapon += 1
             if DM.player.weapon == 6:
                 # Finding the scythe
                 return "...amazing! You find an intact Blackmetal scythe! Now you may empower it with wandering souls..."
@@ -505,17 +685,14 @@ def do_search_result(result: str) -> str:
             else:
                 return "...and you find an intact weapon!"
         case "armor":
-            DM.player.armor += 1
             return "...and you find servicable armor! Your Shadowcloak consumes it to grow in power."
         case "potion":
-            DM.player.potions += 1
             return "...and you find a potion of healing!"
         case "food":
-            DM.player.add_food(1)
             return "...and you find some edible food!"
 
 
-def print_intro() -> None:
+async def print_intro() -> None:
     """Print the intro text."""
     util.clear()
 
@@ -527,28 +704,28 @@ def print_intro() -> None:
             \tWith your necromancy, you give them new life... in your service!
             """
 
-    print(intro)
+    util.say(intro)
 
-    util.continue_prompt()
+    await util.continue_prompt()
 
 
-def get_name() -> str:
+async def get_name() -> str:
     util.clear()
 
     try:
         while True:
-            name = input("What is your name? ")
+            name = await util.read_line("What is your name? ")
             if name.isspace() or len(name) == 0:
-                print("Please enter a name.")
+                util.say("Please enter a name.")
             else:
                 return name
     except (EOFError, KeyboardInterrupt):
         util.close()
 
 
-def get_dungeon_length() -> int:
+async def get_dungeon_length() -> int:
     while True:
-        print(
+        util.say(
             """What is the length of the dungeon?
 
               1. Short (10 rooms)
@@ -559,7 +736,7 @@ def get_dungeon_length() -> int:
               """
         )
         try:
-            choice = input("Choice: ")
+            choice = await util.read_line("Choice: ")
             if choice.lower() == "q":
                 util.close()
             try:
@@ -573,23 +750,23 @@ def get_dungeon_length() -> int:
                         return 30
                     case 4:
                         while True:
-                            length = input(
+                            length = await util.read_line(
                                 "How many rooms are in the dungeon? (Minimum 10, maximum 100) "
                             )
                             try:
                                 length = int(length)
                                 if length < 10:
-                                    print("Too few rooms!")
+                                    util.say("Too few rooms!")
                                 elif length > 100:
-                                    print("Too many rooms!")
+                                    util.say("Too many rooms!")
                                 else:
                                     return length
                             except ValueError:
-                                print("Invalid input.")
+                                util.say("Invalid input.")
                     case _:
-                        print("Invalid input")
+                        util.say("Invalid input")
             except ValueError:
-                print("Unknown choice.")
+                util.say("Unknown choice.")
         except KeyboardInterrupt:
             util.close()
         except EOFError:
@@ -0,0 +1,99 @@
+import journal
+
+from battleengine import BattleEngine
+from dm import DungeonMaster
+from gameengine import GameEngine
+from journal import Journal
+from player import Player
+from policies import Policy
+import rng
+
+
+class JournalEnd(Exception):
+    """The journal has no more decisions to give."""
+
+
+class ReplayPolicy(Policy):
+    """Makes the decisions recorded in a journal, in order."""
+
+    def __init__(self, recorded: Journal):
+        self._decisions = recorded.decisions()
+        self._used = 0
+
+    @property
+    def used(self) -> int:
+        """How many decisions have been replayed."""
+        return self._used
+
+    def choose_action(self, game) -> str:
+        return GameEngine.ACTIONS[self._next(journal.ACTION)]
+
+    def choose_rest_hours(self, game) -> int:
+        return self._next(journal.REST)
+
+    def choose_army_orders(self, game) -> tuple:
+        attack = self._next(journal.ARMY)
+        defend = self._next(journal.ARMY)
+        default = journal.ARMY_DEFAULTS[self._next(journal.ARMY)]
+        return attack, defend, default
+
+    def choose_minion_behavior(self, game) -> str:
+        return Player.BEHAVIOR_ANSWERS[self._next(journal.BEHAVIOR)]
+
+    def choose_battle_action(self, battle) -> str:
+        return BattleEngine.CHOICES[self._next(journal.BATTLE)]
+
+    def choose_necromancy(self, battle) -> str:
+        return ("RAISE", "BUTCHER")[self._next(journal.NECROMANCY)]
+
+    def _next(self, kind: int) -> int:
+        try:
+            recorded_kind, value = next(self._decisions)
+        except StopIteration:
+            raise JournalEnd() from None
+
+        if recorded_kind != kind:
+            raise ValueError(
+                f"Replay went off course at decision {self._used}: "
+                f"expected kind {kind}, the journal has kind {recorded_kind}."
+            )
+
+        self._used += 1
+        return value
+
+
+def replay(recorded: Journal) -> dict:
+    """Play a journal back headlessly and compare where it ends up.
+
+    Returns the differences between the recorded and the replayed final
+    player state, as {field: (recorded, replayed)}; empty if they match.
+    """
+
+    if len(DungeonMaster.monsters) == 0:
+        DungeonMaster.load_data()
+    master = DungeonMaster(rng.RandomStreams(recorded.seed), recorded.variables)
+    master.setup_player(recorded.name)
+    master.place_runes(recorded.length)
+
+    policy = ReplayPolicy(recorded)
+    game = GameEngine(recorded.length, master=master)
+    try:
+        # A game cannot take more actions than were recorded.
+        game.run(policy, max_actions=recorded.count + 1)
+    except JournalEnd:
+        pass
+
+    if policy.used != recorded.count:
+        raise ValueError(
+            f"Replay ended after {policy.used} of {recorded.count} decisions."
+        )
+
+    if recorded.final_state == None:
+        return {}
+
+    replayed = journal.get_player_state(master.player)
+    return {
+        field: (value, replayed[field])
+        for field, value in recorded.final_state.items()
+        if replayed[field] != value
+    }
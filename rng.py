@@ -0,0 +1,142 @@
+"""Every random roll in the game comes from one of a few named streams.
+
+Each stream is seeded from the one master seed of the game, so the same
+seed and the same choices always give the same game. Because the streams
+are independent, an extra roll in battle does not change which rooms or
+monsters come later.
+
+    room     room sizes, types and names
+    loot     search rolls and what they find
+    monster  monster names and levels
+    doom     how fast doom grows
+    combat   flee and dodge rolls
+
+Use rng.seed() to start a game, or rng.use() to plug in streams made
+elsewhere.
+"""
+
+import hashlib
+import random
+
+STREAMS = ("room", "loot", "monster", "doom", "combat")
+
+
+def derive_seed(master_seed: int, label: str) -> int:
+    """A seed for label that is independent of every other label's."""
+
+    digest = hashlib.blake2b(f"{master_seed}:{label}".encode(), digest_size=8)
+    return int.from_bytes(digest.digest(), "big")
+
+
+class Stream(random.Random):
+    """A random.Random that can also draw a block of values at once."""
+
+    def randint_block(self, a: int, b: int, n: int) -> list:
+        """n draws of randint(a, b), inclusive of both ends."""
+
+        return self.choices(range(a, b + 1), k=n)
+
+    def random_block(self, n: int) -> list:
+        """n draws of random()."""
+
+        random_ = self.random
+        return [random_() for _ in range(n)]
+
+    def choice_block(self, seq, n: int) -> list:
+        """n draws of choice(seq)."""
+
+        return self.choices(seq, k=n)
+
+
+class RandomStreams:
+    """The named streams of one game, all seeded from master_seed.
+
+    Without a master seed, a fresh one is drawn from the operating system.
+    pooled streams (see randompool.py, needs NumPy) roll faster, but give a
+    different game for the same seed.
+
+    Each stream is only made, and seeded, when it is first rolled with:
+    seeding one costs more than many rolls, and a short game may never
+    need some of them. Every stream's seed depends on its name alone, so
+    the order they are made in changes nothing.
+    """
+
+    def __init__(self, master_seed: int = None, pooled: bool = False):
+        if master_seed == None:
+            master_seed = random.SystemRandom().getrandbits(64)
+
+        if pooled:
+            # Only needed, and NumPy only imported, for pooled streams.
+            from randompool import PooledStream as stream_type
+        else:
+            stream_type = Stream
+
+        self._seed = master_seed
+        self._pooled = pooled
+        self._stream_type = stream_type
+        self._streams = {}
+
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+    @property
+    def pooled(self) -> bool:
+        return self._pooled
+
+    def getstate(self) -> tuple:
+        """The state of every stream, in STREAMS order, for setstate()."""
+
+        if self._pooled:
+            raise ValueError("Pooled random streams cannot be saved.")
+        return tuple(self[name].getstate() for name in STREAMS)
+
+    def setstate(self, state: tuple) -> None:
+        if self._pooled:
+            raise ValueError("Pooled random streams cannot be restored.")
+        for name, stream_state in zip(STREAMS, state, strict=True):
+            self[name].setstate(stream_state)
+
+    def __getitem__(self, name: str) -> Stream:
+        try:
+            return self._streams[name]
+        except KeyError:
+            if name not in STREAMS:
+                raise ValueError(f"Unknown random stream: {name}") from None
+
+        stream = self._stream_type(derive_seed(self._seed, name))
+        self._streams[name] = stream
+        return stream
+
+
+_streams = RandomStreams()
+
+
+def seed(master_seed: int = None, pooled: bool = False) -> RandomStreams:
+    """Start a new set of streams from master_seed and use them."""
+
+    use(RandomStreams(master_seed, pooled))
+    return _streams
+
+
+def use(streams: RandomStreams) -> None:
+    """Make streams the ones the game rolls with."""
+
+    global _streams
+    _streams = streams
+
+
+def get_streams() -> RandomStreams:
+    """The streams in use."""
+
+    return _streams
+
+
+def stream(name: str) -> Stream:
+    return _streams[name]
+
+
+def get_seed() -> int:
+    """The master seed of the streams in use."""
+
+    return _streams.seed
@@ -1,27 +1,41 @@
-from variables import Variables
+from variables import GameVariables
 
-import random
+import instrument
+import loot
+import rng
 
 
 class Room:
 
-    def __init__(self, name, room_type="generic"):
-        
-        if room_type not in Room.VALID_ROOM_TYPES:
-            raise ValueError(f"New room was provided invalid type {room_type}.")
-        else:
-            self._room_type = room_type
+    def __init__(
+        self,
+        name,
+        room_type="generic",
+        streams: rng.RandomStreams = None,
+        variables: GameVariables = None,
+    ):
+        # The random streams to roll with, by default those in use, and the
+        # variables, by default those of a game starting now.
+        self._streams = streams if streams != None else rng.get_streams()
+        self._variables = variables if variables != None else GameVariables.current()
+
+        # Raises a ValueError for a room type without a loot table.
+        self._loot = loot.get_table(room_type)
+        self._room_type = room_type
 
         self._size = self._roll_room_size()
         self._max_searches = self.size
         self._name = self._get_name(name)
 
         self._times_searched = 0
-        self._search_chance = Variables.ROOM_BASE_SEARCH_CHANCE
-        self._search_reduction = Variables.ROOM_BASE_SEARCH_CHANCE / self._max_searches
+        self._search_chance = self._variables.ROOM_BASE_SEARCH_CHANCE
+        self._search_reduction = (
+            self._variables.ROOM_BASE_SEARCH_CHANCE / self._max_searches
+        )
 
     # Normal methods
 
+    @instrument.timed("room.search")
     def search(self) -> str:
         """Roll to find something in the room.
         The returned string corresponds with what gets generated.
@@ -30,7 +44,7 @@ class Room:
                 better solutions.
         """
 
-        success = random.randint(0, 100) < self.search_chance
+        success = self._streams["loot"].randint(0, 100) < self.search_chance
         self.times_searched += 1
 
         if success:
@@ -58,9 +72,9 @@ class Room:
         """
 
         prepend = ""
-        if self.max_searches < Variables.ROOM_AVG_SEARCHES:
+        if self.max_searches < self._variables.ROOM_AVG_SEARCHES:
             prepend = "small "
-        elif self.max_searches > Variables.ROOM_AVG_SEARCHES:
+        elif self.max_searches > self._variables.ROOM_AVG_SEARCHES:
             prepend = "large "
         return f"{prepend}{name}"
 
@@ -84,38 +98,25 @@ class Room:
                 and <= ROOM_MAX_SEARCHES.
         """
 
-        diff_size_chance = Variables.ROOM_SIZE_DIFFERENCE_CHANCE
+        diff_size_chance = self._variables.ROOM_SIZE_DIFFERENCE_CHANCE
         
-        roll = random.randint(0, 100)
+        roll = self._streams["room"].randint(0, 100)
         if (roll < diff_size_chance):
-            return Variables.ROOM_MIN_SEARCHES
+            return self._variables.ROOM_MIN_SEARCHES
         elif (roll >= 100 - diff_size_chance):
-            return Variables.ROOM_MAX_SEARCHES
+            return self._variables.ROOM_MAX_SEARCHES
         else:
-            return Variables.ROOM_AVG_SEARCHES
+            return self._variables.ROOM_AVG_SEARCHES
 
     def _roll_for_item(self) -> str:
-        """Roll for a random item. Depending on the room type, do a
-        reroll if we don't get the expected item type.
+        """Roll for a random item from the loot table of the room type
+        (see loot.py).
         
         TODO: Consider turning the results into classes rather than
                 having them as strings -- how should I go about that?
         """
 
-        result: str = random.choice(Room.POSSIBLE_SEARCHES)
-        
-        match self.room_type:
-            case "armory":
-                if result != "weapon" and result != "armor":
-                    result = self._roll_for_item()
-            case "kitchen":
-                if result != "food":
-                    result = self._roll_for_item()
-            case "workshop":
-                if result != "skeleton" and result != "potion":
-                    result = self._roll_for_item()
-
-        return result
+        return self._loot.draw(self._streams["loot"])
 
     # Properties
 
@@ -162,19 +163,6 @@ class Room:
         self._times_searched = amt
 
     # Constants
-    # TODO: Should these be stored a different way?
-
-    VALID_ROOM_TYPES = (
-        "generic",
-        "armory",
-        "kitchen",
-        "workshop",
-    )
-
-    POSSIBLE_SEARCHES = (
-        "skeleton",
-        "food",
-        "weapon",
-        "armor",
-        "potion",
-    )
\ No newline at end of file
+    # The room types, and what each can hold, are in data/loot.txt.
+
+    POSSIBLE_SEARCHES = loot.ITEMS
\ No newline at end of file
@@ -0,0 +1,267 @@
+from bisect import bisect_left, insort
+
+from minion import Minion
+
+
+def _seat(minion) -> int:
+    return minion._seat
+
+
+class MinionRoster:
+    """The player's minions, in the order they were raised.
+
+    Alongside the full roster it keeps the attackers and the defenders as
+    separate lists, still in roster order, plus running counts and totals.
+    Minions report their own changes of role, hp and damage, so nothing
+    here ever needs a pass over the whole army.
+    """
+
+    def __init__(self):
+        self._minions = []
+        self._attackers = []
+        self._defenders = []
+
+        # Every minion gets a seat number when it joins. Seats only go up,
+        # so sorting by seat keeps the role lists in roster order.
+        self._next_seat = 0
+
+        self._attack_damage = 0
+        self._living_defenders = 0
+        self._defense_hp = 0
+
+    def __len__(self) -> int:
+        return len(self._minions)
+
+    def __iter__(self):
+        return iter(self._minions)
+
+    def __getitem__(self, index):
+        return self._minions[index]
+
+    def __contains__(self, minion) -> bool:
+        return minion._roster is self
+
+    @property
+    def attackers(self) -> list:
+        """Attacking minions, in roster order."""
+        return self._attackers
+
+    @property
+    def defenders(self) -> list:
+        """Defending minions, in roster order. Includes those at 0 HP."""
+        return self._defenders
+
+    @property
+    def attacking_count(self) -> int:
+        return len(self._attackers)
+
+    @property
+    def defending_count(self) -> int:
+        """Defending minions that can still take a hit."""
+        return self._living_defenders
+
+    @property
+    def attack_damage(self) -> int:
+        """Damage dealt by all attacking minions together."""
+        return self._attack_damage
+
+    @property
+    def defense_hp(self) -> int:
+        """HP of all defending minions that can still take a hit."""
+        return self._defense_hp
+
+    def add(self, minion) -> None:
+        if minion._roster is not None:
+            raise ValueError("Tried to add a minion that already serves a roster.")
+
+        minion._roster = self
+        minion._seat = self._next_seat
+        self._next_seat += 1
+
+        self._minions.append(minion)
+        self._join_role(minion)
+
+    def remove(self, minion) -> None:
+        if minion._roster is not self:
+            raise ValueError(
+                "Tried to remove a minion that wasn't already in the minions list."
+            )
+
+        self._leave_role(minion)
+        self._minions.remove(minion)
+        minion._roster = None
+
+    def get_columns(self) -> tuple:
+        """The whole army as (names, hp, max_hp, damage, attacking) lists,
+        in roster order."""
+
+        minions = self._minions
+        return (
+            [minion._name for minion in minions],
+            [minion._hp for minion in minions],
+            [minion._max_hp for minion in minions],
+            [minion._damage for minion in minions],
+            [minion._attacking for minion in minions],
+        )
+
+    def set_columns(self, columns: tuple, master) -> None:
+        """Fill an empty roster from get_columns()'s lists."""
+
+        if len(self._minions) > 0:
+            raise ValueError("Tried to fill a roster that already has minions.")
+
+        for name, hp, max_hp, damage, attacking in zip(*columns):
+            minion = Minion(name, master)
+            minion._name = name
+            minion._hp = hp
+            minion._max_hp = max_hp
+            minion._damage = damage
+            minion._attacking = attacking
+            minion._defending = not attacking
+            self.add(minion)
+
+    def command_attack(self, count: int = 1) -> list:
+        """Send the first count defending minions on the attack.
+
+        Returns the minions that changed role.
+        """
+
+        moved = self._defenders[:count]
+        for minion in moved:
+            minion.attacking = True
+        return moved
+
+    def command_defend(self, count: int = 1) -> list:
+        """Pull the first count attacking minions back to defend.
+
+        Returns the minions that changed role.
+        """
+
+        moved = self._attackers[:count]
+        for minion in moved:
+            minion.defending = True
+        return moved
+
+    def absorb(self, damage: int) -> tuple:
+        """Let the defending minions soak up a blow, in roster order.
+
+        Each standing defender takes as much of the blow as it has HP left.
+        Returns the damage that got through and a list of
+        (minion, damage taken, destroyed) for every minion that was hit.
+        """
+
+        hits = []
+        living_defenders = self._living_defenders
+        defense_hp = self._defense_hp
+
+        # As minion.hp -= damage for each defender hit, keeping the counts
+        # in locals until the blow is spent.
+        for minion in self._defenders:
+            hp = minion._hp
+            if hp <= 0:
+                continue
+
+            minion._hp = hp - damage
+            if damage >= hp:
+                hits.append((minion, hp, True))
+                living_defenders -= 1
+                defense_hp -= hp
+                damage -= hp
+                if damage == 0:
+                    break
+            else:
+                hits.append((minion, damage, False))
+                defense_hp -= damage
+                damage = 0
+                break
+
+        self._living_defenders = living_defenders
+        self._defense_hp = defense_hp
+        return damage, hits
+
+    def heal(self) -> int:
+        """Restore every minion to full HP.
+
+        Returns how many had fallen to exactly 0 HP.
+        """
+
+        reanimated = 0
+        living_defenders = self._living_defenders
+        defense_hp = self._defense_hp
+
+        for minion in self._minions:
+            hp = minion._hp
+            max_hp = minion._max_hp
+            if hp == max_hp:
+                continue
+            if hp == 0:
+                reanimated += 1
+
+            # As minion.hp = max_hp.
+            minion._hp = max_hp
+            if not minion._attacking:
+                if hp > 0:
+                    defense_hp += max_hp - hp
+                else:
+                    living_defenders += 1
+                    defense_hp += max_hp
+
+        self._living_defenders = living_defenders
+        self._defense_hp = defense_hp
+        return reanimated
+
+    def reset_stats(self, max_hp: int, damage: int) -> None:
+        """Give every minion the same fresh stats, at full HP."""
+
+        if max_hp <= 0:
+            raise ValueError("Minion tried to set an invalid max HP.")
+        if damage <= 0:
+            raise ValueError("Minion tried to set an invalid damage.")
+
+        for minion in self._minions:
+            minion._hp = max_hp
+            minion._max_hp = max_hp
+            minion._damage = damage
+
+        self._attack_damage = damage * len(self._attackers)
+        self._living_defenders = len(self._defenders)
+        self._defense_hp = max_hp * len(self._defenders)
+
+    # Called by Minion when it changes.
+
+    def _join_role(self, minion) -> None:
+        if minion._attacking:
+            insort(self._attackers, minion, key=_seat)
+            self._attack_damage += minion._damage
+        else:
+            insort(self._defenders, minion, key=_seat)
+            if minion._hp > 0:
+                self._living_defenders += 1
+                self._defense_hp += minion._hp
+
+    def _leave_role(self, minion) -> None:
+        if minion._attacking:
+            members = self._attackers
+            self._attack_damage -= minion._damage
+        else:
+            members = self._defenders
+            if minion._hp > 0:
+                self._living_defenders -= 1
+                self._defense_hp -= minion._hp
+
+        del members[bisect_left(members, minion._seat, key=_seat)]
+
+    def _hp_changed(self, minion, old_hp: int) -> None:
+        if minion._attacking:
+            return
+
+        if old_hp > 0:
+            self._living_defenders -= 1
+            self._defense_hp -= old_hp
+        if minion._hp > 0:
+            self._living_defenders += 1
+            self._defense_hp += minion._hp
+
+    def _damage_changed(self, minion, old_damage: int) -> None:
+        if minion._attacking:
+            self._attack_damage += minion._damage - old_damage
@@ -0,0 +1,336 @@
+"""Snapshots of a whole game in progress, to suspend it and carry on later.
+
+A snapshot holds everything a game depends on: the GameEngine and its
+current Room, the player with their army and Stats, the rune rooms, the
+state of every random stream and the variables the game plays by. Take
+one between actions, not in the middle of a battle.
+
+The word lists are not copied into the snapshot. It keeps a checksum of
+them instead: restoring uses the lists already loaded, loading
+them only if it has none, and refuses a snapshot saved with other lists.
+
+The encoding is little-endian binary. Numbers are packed with struct,
+strings are UTF-8 with their length in front, and the army is stored as
+columns so that large armies pack in a few calls.
+"""
+
+import array
+import json
+import os
+import struct
+import sys
+import zlib
+
+import dm
+from dm import DungeonMaster
+from gameengine import GameEngine
+import loot
+from player import Player
+import rng
+from room import Room
+from roster import MinionRoster
+from variables import GameVariables
+
+MAGIC = b"NTS"
+# 2: the game's variables, as JSON, follow the word list checksum. Games
+# restored from version 1 play by the variables of a game starting now.
+VERSION = 2
+
+_U32 = struct.Struct("<I")
+
+# length, room_count, skip_hunger, turns, battles
+_ENGINE = struct.Struct("<qq?qq")
+
+# size, max_searches, times_searched, search_chance, search_reduction
+_ROOM = struct.Struct("<qqqdd")
+
+# The player fields kept in a snapshot, in order, followed by dodging.
+PLAYER_FIELDS = (
+    "max_hp",
+    "hp",
+    "level",
+    "hunger",
+    "food",
+    "potions",
+    "souls",
+    "runes",
+    "doom",
+    "armor",
+    "weapon",
+)
+_PLAYER = struct.Struct(f"<{len(PLAYER_FIELDS)}q?")
+
+# random.Random's state: the 624 words of the Mersenne Twister and its
+# position, then gauss()'s spare value, if it has one.
+_STREAM = struct.Struct("<625I?d")
+
+# array.array works in the machine's byte order; snapshots are little-endian.
+_SWAP_BYTES = sys.byteorder == "big"
+
+
+def snapshot(game: GameEngine) -> bytes:
+    """Encode the game in progress and everything it depends on."""
+
+    master = game.master
+    out = [MAGIC, bytes((VERSION,))]
+
+    _pack_str(out, str(master.streams.seed))
+    for version, internal, gauss_next in master.streams.getstate():
+        out.append(_STREAM.pack(*internal, gauss_next != None, gauss_next or 0.0))
+
+    out.append(_U32.pack(_word_list_checksum()))
+    _pack_str(out, game.variables.as_json())
+
+    out.append(
+        _ENGINE.pack(
+            game._length,
+            game._room_count,
+            game._skip_hunger,
+            game._turns,
+            game._battles,
+        )
+    )
+    _pack_str(out, game._ending or "")
+    _pack_str(out, game._killer or "")
+
+    room = game._room
+    _pack_str(out, room._name)
+    _pack_str(out, room._room_type)
+    out.append(
+        _ROOM.pack(
+            room._size,
+            room._max_searches,
+            room._times_searched,
+            room._search_chance,
+            room._search_reduction,
+        )
+    )
+
+    _pack_ints(out, master._rune_rooms)
+    _pack_ints(out, master.player.stats.as_dict().values())
+
+    _pack_player(out, master.player)
+
+    return b"".join(out)
+
+
+def restore(data: bytes, listener=None) -> GameEngine:
+    """Put the game of a snapshot back in place and return its GameEngine.
+
+    The game gets a new DungeonMaster, with the player and their Stats, the
+    rune rooms, the random streams and the variables, which becomes the
+    current one.
+    listener is given to the GameEngine.
+    """
+
+    reader = _Reader(data)
+    if reader.take(3) != MAGIC:
+        raise ValueError("Not a game snapshot.")
+    version = reader.take(1)[0]
+    if version not in (1, VERSION):
+        raise ValueError(f"Unsupported snapshot version: {version}")
+
+    master_seed = int(reader.string())
+    stream_states = []
+    for _ in rng.STREAMS:
+        *internal, has_gauss, gauss_next = reader.unpack(_STREAM)
+        stream_states.append(
+            (rng.Stream.VERSION, tuple(internal), gauss_next if has_gauss else None)
+        )
+
+    (checksum,) = reader.unpack(_U32)
+    if len(DungeonMaster.monsters) == 0:
+        DungeonMaster.load_data()
+    if checksum != _word_list_checksum():
+        raise ValueError("The snapshot was saved with different word lists.")
+
+    if version == 1:
+        variables = GameVariables.current()
+    else:
+        variables = GameVariables.from_dict(json.loads(reader.string()))
+
+    # Rooms and engines are rebuilt without their constructors, which would
+    # roll the dice.
+    game = GameEngine.__new__(GameEngine)
+    game._listener = listener
+    game._variables = variables
+    (
+        game._length,
+        game._room_count,
+        game._skip_hunger,
+        game._turns,
+        game._battles,
+    ) = reader.unpack(_ENGINE)
+    game._ending = reader.string() or None
+    game._killer = reader.string() or None
+
+    room = Room.__new__(Room)
+    room._name = reader.string()
+    room._room_type = reader.string()
+    room._loot = loot.get_table(room._room_type)
+    room._variables = variables
+    (
+        room._size,
+        room._max_searches,
+        room._times_searched,
+        room._search_chance,
+        room._search_reduction,
+    ) = reader.unpack(_ROOM)
+    game._room = room
+
+    rune_rooms = reader.ints()
+    counters = reader.ints()
+    player = _unpack_player(reader, variables)
+    player.stats.set_counters(dict(zip(player.stats.as_dict(), counters, strict=True)))
+
+    streams = rng.RandomStreams(master_seed)
+    streams.setstate(stream_states)
+
+    master = DungeonMaster(streams, variables)
+    master.player = player
+    master._rune_rooms = rune_rooms
+    game._master = master
+    room._streams = streams
+
+    dm.use(master)
+
+    return game
+
+
+def save(game: GameEngine, path: str) -> None:
+    """Write a snapshot of the game to path.
+
+    The old file is only replaced once the new one is complete, so a
+    snapshot on disk is never half written.
+    """
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(snapshot(game))
+    os.replace(temp_path, path)
+
+
+def load(path: str, listener=None) -> GameEngine:
+    with open(path, "rb") as f:
+        return restore(f.read(), listener)
+
+
+def _word_list_checksum() -> int:
+    words = [*DungeonMaster.adjectives, *DungeonMaster.monsters]
+    for room_type, names in DungeonMaster.rooms.items():
+        words.append(room_type)
+        words += names
+    return zlib.crc32("\n".join(words).encode())
+
+
+# The player and their army
+
+
+def _pack_player(out: list, player: Player) -> None:
+    _pack_str(out, player.name)
+    _pack_str(out, player.minion_default)
+    out.append(
+        _PLAYER.pack(
+            *[getattr(player, field) for field in PLAYER_FIELDS], player.dodging
+        )
+    )
+
+    minions = player.minions
+    _pack_str(out, "objects" if isinstance(minions, MinionRoster) else "arrays")
+
+    names, hp, max_hp, damage, attacking = minions.get_columns()
+
+    # Most minions share a handful of names, so each name is stored once.
+    name_table = list(dict.fromkeys(names))
+    name_index = {name: i for i, name in enumerate(name_table)}
+
+    out.append(_U32.pack(len(name_table)))
+    for name in name_table:
+        _pack_str(out, name)
+
+    out.append(_U32.pack(len(names)))
+    _pack_array(out, "I", [name_index[name] for name in names])
+    for column in (hp, max_hp, damage):
+        _pack_array(out, "q", column)
+    out.append(bytes(attacking))
+
+
+def _unpack_player(reader: "_Reader", variables: GameVariables) -> Player:
+    name = reader.string()
+    minion_default = reader.string()
+    *values, dodging = reader.unpack(_PLAYER)
+    army = reader.string()
+
+    name_table = [reader.string() for _ in range(reader.unpack(_U32)[0])]
+
+    (count,) = reader.unpack(_U32)
+    names = [name_table[i] for i in reader.array("I", count)]
+    hp = reader.array("q", count)
+    max_hp = reader.array("q", count)
+    damage = reader.array("q", count)
+    attacking = [bool(b) for b in reader.take(count)]
+
+    player = Player(name, army, variables)
+    player.minion_default = minion_default
+    for field, value in zip(PLAYER_FIELDS, values):
+        setattr(player, field, value)
+    player.dodging = dodging
+
+    player.minions.set_columns((names, hp, max_hp, damage, attacking), player)
+    return player
+
+
+# Encoding
+
+
+def _pack_str(out: list, text: str) -> None:
+    encoded = text.encode()
+    out.append(_U32.pack(len(encoded)))
+    out.append(encoded)
+
+
+def _pack_ints(out: list, values) -> None:
+    values = list(values)
+    out.append(_U32.pack(len(values)))
+    _pack_array(out, "q", values)
+
+
+def _pack_array(out: list, typecode: str, values: list) -> None:
+    packed = array.array(typecode, values)
+    if _SWAP_BYTES:
+        packed.byteswap()
+    out.append(packed.tobytes())
+
+
+class _Reader:
+    """Reads a snapshot from front to back."""
+
+    def __init__(self, data: bytes):
+        self._data = memoryview(data)
+        self._pos = 0
+
+    def take(self, size: int) -> bytes:
+        end = self._pos + size
+        if end > len(self._data):
+            raise ValueError("The snapshot is cut short.")
+        chunk = self._data[self._pos : end]
+        self._pos = end
+        return chunk
+
+    def unpack(self, layout: struct.Struct) -> tuple:
+        return layout.unpack(self.take(layout.size))
+
+    def string(self) -> str:
+        (size,) = self.unpack(_U32)
+        return str(self.take(size), "utf-8")
+
+    def array(self, typecode: str, count: int) -> list:
+        values = array.array(typecode)
+        values.frombytes(self.take(count * values.itemsize))
+        if _SWAP_BYTES:
+            values.byteswap()
+        return values.tolist()
+
+    def ints(self) -> list:
+        (count,) = self.unpack(_U32)
+        return self.array("q", count)
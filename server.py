@@ -0,0 +1,292 @@
+"""Many games at once over plain TCP, one game per connection, all on one
+event loop. Any telnet client can play:
+
+    py server.py --port 4000
+    telnet localhost 4000
+
+Each connection is a Session, which is its game's I/O (see util.use_io):
+where the game reads its input from and where everything it says goes.
+sys.stdout is left alone. A game only lets other sessions run while it
+waits for a line of input, so its I/O and the current DungeonMaster,
+which the game still reaches through the DM shim and which holds its
+player, rune rooms and random streams, are swapped out by its session
+before every wait and back in after.
+
+Output is held until the game asks for input, then sent in one write with
+CRLF line endings and a telnet Go Ahead after the prompt, which also tells
+clients that don't speak telnet that the server is waiting on them.
+"""
+
+import argparse
+import asyncio
+import sys
+import traceback
+
+from battlemaster import BattleMaster
+import dm
+from dm import DungeonMaster
+import history
+import project
+import util
+
+# Telnet: Interpret As Command, and the Go Ahead command.
+IAC = 255
+GA = 249
+
+# Telnet commands that are followed by an option byte, and those that
+# start and end a subnegotiation.
+_OPTION_COMMANDS = range(251, 255)
+_SB = 250
+_SE = 240
+
+# The longest line of input a session accepts, in bytes.
+MAX_LINE = 1024
+
+
+class Disconnected(Exception):
+    """The client of a session went away.
+
+    Not an EOFError: the game answers those by asking again.
+    """
+
+
+class SessionOver(Exception):
+    """The game of a session has ended."""
+
+
+class Session:
+    """One game played over one connection."""
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        idle_timeout: float = None,
+    ):
+        self._reader = reader
+        self._writer = writer
+        self._idle_timeout = idle_timeout
+
+        # Text said since the game last asked for input.
+        self._output = []
+
+        # The game's DungeonMaster while the session is suspended, and
+        # util's I/O from before it was resumed.
+        self._master = None
+        self._outer_io = None
+
+    async def run(self) -> None:
+        """Play one game from the intro to its ending, then hang up."""
+
+        self.resume()
+        game = None
+        try:
+            game = await project.start_game()
+            await project.play_game(game)
+        except (SessionOver, Disconnected):
+            pass
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
+            self.write("\nThe dungeon collapses around you. (Server error)\n")
+        finally:
+            if game != None:
+                history.record(game.summary(), game.player.name, "server")
+            self.suspend()
+            await self._hang_up()
+
+    # Switching between sessions
+
+    def resume(self) -> None:
+        """Put this session's game state back in place to carry on."""
+
+        self._outer_io = util.get_io()
+        util.use_io(self)
+
+        if self._master != None:
+            dm.use(self._master)
+
+    def suspend(self) -> None:
+        """Keep this session's game state, to let other sessions run."""
+
+        self._master = dm.get_current()
+
+        util.use_io(self._outer_io)
+        self._outer_io = None
+
+    # The game's I/O
+
+    def write(self, text: str) -> None:
+        self._output.append(text)
+
+    def clear(self) -> None:
+        # Anything not yet sent would be cleared away at once.
+        self._output.clear()
+        self._output.append(util.CLEAR_SCREEN)
+
+    def close(self, message: str) -> None:
+        self._output.append(message)
+        raise SessionOver(message)
+
+    async def read_line(self, prompt: str = "") -> str:
+        """Send what the game said and prompt, then wait for a line."""
+
+        self._output.append(prompt)
+        self.suspend()
+        try:
+            self._send(go_ahead=True)
+            await self._writer.drain()
+            line = await self._read()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            raise Disconnected() from e
+        except asyncio.TimeoutError:
+            self._output.append("\n\nYou were idle for too long.\n")
+            raise Disconnected() from None
+        finally:
+            self.resume()
+
+        return _strip_telnet(line).decode(errors="replace").rstrip("\r\n\0")
+
+    async def _read(self) -> bytes:
+        if self._idle_timeout == None:
+            line = await self._reader.readline()
+        else:
+            line = await asyncio.wait_for(self._reader.readline(), self._idle_timeout)
+
+        if len(line) == 0:
+            raise Disconnected()
+        return line
+
+    def _send(self, go_ahead: bool = False) -> None:
+        text = "".join(self._output).replace("\n", "\r\n")
+        self._output.clear()
+
+        data = text.encode()
+        if go_ahead:
+            data += bytes((IAC, GA))
+        self._writer.write(data)
+
+    async def _hang_up(self) -> None:
+        try:
+            self._send()
+            self._writer.close()
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+def _strip_telnet(data: bytes) -> bytes:
+    """Drop the telnet commands from a line of input."""
+
+    if IAC not in data:
+        return data
+
+    kept = bytearray()
+    i = 0
+    while i < len(data):
+        byte = data[i]
+        if byte != IAC:
+            kept.append(byte)
+            i += 1
+            continue
+
+        command = data[i + 1] if i + 1 < len(data) else None
+        if command == IAC:
+            # An escaped 255.
+            kept.append(IAC)
+            i += 2
+        elif command in _OPTION_COMMANDS:
+            i += 3
+        elif command == _SB:
+            end = data.find(bytes((IAC, _SE)), i)
+            i = len(data) if end == -1 else end + 2
+        else:
+            i += 2
+
+    return bytes(kept)
+
+
+async def serve(
+    host: str, port: int, idle_timeout: float = None, backlog: int = 1024
+) -> None:
+    """Accept players on host:port until cancelled."""
+
+    if len(DungeonMaster.monsters) == 0:
+        DungeonMaster.load_data()
+
+    async def start_session(reader, writer):
+        await Session(reader, writer, idle_timeout).run()
+
+    server = await asyncio.start_server(
+        start_session, host, port, limit=MAX_LINE, backlog=backlog
+    )
+    addresses = ", ".join(str(s.getsockname()[:2]) for s in server.sockets)
+    print(f"Serving the Necromancer's Trial on {addresses}", file=sys.stderr)
+
+    async with server:
+        await server.serve_forever()
+
+
+def raise_file_limit() -> None:
+    """Allow as many open connections as the system lets this process have."""
+
+    try:
+        import resource
+    except ImportError:
+        return
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def main():
+    args = parse_args()
+
+    BattleMaster.show_advisor = args.advisor
+    if args.variables:
+        project.use_variables(args.variables)
+    if args.history:
+        project.use_history(args.history)
+    raise_file_limit()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.idle_timeout))
+    except KeyboardInterrupt:
+        pass
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Host games of the Necromancer's Trial over TCP."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=None,
+        help="hang up on players who send nothing for this many seconds",
+    )
+    parser.add_argument(
+        "--advisor",
+        action="store_true",
+        help="show the action with the best chance of winning during battles",
+    )
+    parser.add_argument(
+        "--variables",
+        metavar="FILE",
+        help="play new games by the variables of a TOML or JSON file, read "
+        "again whenever it changes (see variables.py)",
+    )
+    parser.add_argument(
+        "--history",
+        metavar="DATABASE",
+        help="keep every finished game in this SQLite database (see history.py)",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
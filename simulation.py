@@ -0,0 +1,210 @@
+"""Whole games played headlessly, many at once, to measure how often a run
+survives a dungeon of a given length.
+
+    py simulation.py --runs 10000 --length 10 --seed 1 > runs.jsonl
+
+Every run gets its own seed, worked out from the master seed and the run
+number alone, so a run plays out the same no matter how many runs there
+are or which process plays it.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+
+from dm import DungeonMaster
+from gameengine import GameEngine
+import history
+from policies import POLICIES
+import rng
+from stats import StatsAggregator
+import variables
+from variables import GameVariables
+
+
+def run_seed(master_seed: int, index: int) -> int:
+    """The seed of run number index."""
+
+    return rng.derive_seed(master_seed, str(index))
+
+
+def play_run(
+    length: int,
+    policy,
+    seed: int,
+    max_actions: int = 10_000,
+    variables: GameVariables = None,
+) -> dict:
+    """Play one game from setup to its ending and summarize it.
+
+    The game plays by variables, or those of a game starting now.
+    """
+
+    if len(DungeonMaster.monsters) == 0:
+        DungeonMaster.load_data()
+    master = DungeonMaster(rng.RandomStreams(seed), variables)
+    master.setup_player("Simulant")
+    master.place_runes(length)
+
+    game = GameEngine(length, master=master)
+    game.run(policy, max_actions)
+    return game.summary()
+
+
+def run_many(
+    runs: int,
+    length: int,
+    policy: str = "cautious",
+    seed: int = 0,
+    processes: int = None,
+    max_actions: int = 10_000,
+    variables: GameVariables = None,
+):
+    """Play runs games under the named policy, one per core.
+
+    Every run plays by variables, by default those of a game starting now.
+    Yields each run's summary as soon as it finishes, so not in run order;
+    the "run" key holds its number.
+    """
+
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy: {policy}")
+    if variables == None:
+        variables = GameVariables.current()
+
+    tasks = (
+        (i, run_seed(seed, i), length, policy, max_actions, variables)
+        for i in range(runs)
+    )
+
+    if processes == None:
+        processes = os.cpu_count()
+    # Read here first: a worker that cannot read the data dies, and the pool
+    # would start another in its place forever.
+    DungeonMaster.load_data()
+
+    if processes <= 1:
+        yield from map(_play_task, tasks)
+        return
+
+    # Runs take a few milliseconds, so hand them out in batches, but small
+    # enough batches that every process stays busy until the end.
+    chunksize = max(1, min(64, runs // (processes * 8)))
+
+    with multiprocessing.Pool(processes, initializer=_init_worker) as pool:
+        yield from pool.imap_unordered(_play_task, tasks, chunksize)
+
+
+def _init_worker() -> None:
+    DungeonMaster.load_data()
+
+
+def _play_task(task: tuple) -> dict:
+    index, seed, length, policy, max_actions, variables = task
+
+    summary = play_run(length, POLICIES[policy](), seed, max_actions, variables)
+    summary["run"] = index
+    return summary
+
+
+def main():
+    args = parse_args()
+
+    try:
+        run_variables = variables.load(args.variables) if args.variables else None
+    except (OSError, ValueError) as e:
+        sys.exit(f"Cannot use the variables of {args.variables}: {e}")
+
+    try:
+        DungeonMaster.load_data()
+    except (OSError, ValueError) as e:
+        sys.exit(f"Cannot read the game data: {e}")
+
+    if args.history:
+        try:
+            history.start(args.history)
+        except (OSError, sqlite3.Error) as e:
+            sys.exit(f"Cannot keep the history in {args.history}: {e}")
+
+    start = time.perf_counter()
+    endings = {}
+    survived = 0
+    stats = StatsAggregator()
+
+    for summary in run_many(
+        args.runs,
+        args.length,
+        args.policy,
+        args.seed,
+        args.processes,
+        args.max_actions,
+        run_variables,
+    ):
+        print(json.dumps(summary))
+        history.record(summary, "Simulant", "simulation")
+        endings[summary["ending"]] = endings.get(summary["ending"], 0) + 1
+        survived += summary["survived"]
+        stats.add(summary["stats"])
+
+    elapsed = time.perf_counter() - start
+
+    # Unlike a game's exit, a simulation waits for every run to be written.
+    history.stop()
+
+    print(
+        f"{args.runs} runs of length {args.length} in {elapsed:.1f}s "
+        f"({args.runs / elapsed:.0f} runs/s)",
+        file=sys.stderr,
+    )
+    print(f"Survival rate: {survived / args.runs:.2%}", file=sys.stderr)
+    for ending, count in sorted(endings.items()):
+        print(f"\t{ending}: {count}", file=sys.stderr)
+
+    print("Per run:", file=sys.stderr)
+    for name in StatsAggregator.HISTOGRAMS:
+        summary = stats.summaries[name]
+        print(
+            f"\t{name}: {summary.mean:.1f} on average (sd {summary.stdev:.1f}), "
+            f"{summary.min} to {summary.max}",
+            file=sys.stderr,
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Play many headless games at once.")
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--length", type=int, default=10, help="rooms in the dungeon")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="cautious")
+    parser.add_argument("--seed", type=int, default=0, help="master seed")
+    parser.add_argument(
+        "--processes", type=int, default=None, help="defaults to one per core"
+    )
+    parser.add_argument(
+        "--max-actions",
+        type=int,
+        default=10_000,
+        help="a run still going after this many actions ends as stalled",
+    )
+    parser.add_argument(
+        "--variables",
+        metavar="FILE",
+        help="play by the variables of a TOML or JSON file (see variables.py)",
+    )
+    parser.add_argument(
+        "--history",
+        metavar="DATABASE",
+        help="also keep every run in this SQLite database (see history.py)",
+    )
+
+    args = parser.parse_args()
+    if args.runs < 1:
+        parser.error("--runs must be at least 1")
+    return args
+
+
+if __name__ == "__main__":
+    main()
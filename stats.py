@@ -1,224 +1,429 @@
+import math
+
 import util
 
 
 class Stats:
-    """A structure to present fun game stats on victory."""
-
-    _kills = 0
-    _raised = 0
-    _fallen_minions = 0
-    _butchered = 0
-    _spirits = 0
-
-    _rations_eaten = 0
-    _potions_drank = 0
-
-    _damage_deflected = 0
-    _damage_dodged = 0
-    _damage_taken_personal = 0
-    _damage_taken_minions = 0
-    _damage_dealt_personal = 0
-    _damage_dealt_minions = 0
-
-    @classmethod
-    def add_damage_taken_minion(cls, amt=1) -> None:
-        cls._damage_taken_minions += amt
-
-    @classmethod
-    def add_damage_taken_personal(cls, amt=1) -> None:
-        cls._damage_taken_personal += amt
-
-    @classmethod
-    def add_damage_deflected(cls, amt=1) -> None:
-        cls._damage_deflected += amt
-
-    @classmethod
-    def add_damage_dodged(cls, amt=1) -> None:
-        cls._damage_dodged += amt
-
-    @classmethod
-    def add_damage_dealt_personal(cls, amt=1) -> None:
-        cls._damage_dealt_personal += amt
-
-    @classmethod
-    def add_damage_dealt_minions(cls, amt=1) -> None:
-        cls._damage_dealt_minions += amt
-
-    @classmethod
-    def add_kill(cls, amt=1) -> None:
-        cls._kills += amt
-
-    @classmethod
-    def add_raise(cls, amt=1) -> None:
-        cls._raised += amt
-
-    @classmethod
-    def add_butchery(cls, amt=1) -> None:
-        cls._butchered += amt
-
-    @classmethod
-    def add_spirit(cls, amt=1) -> None:
-        cls._spirits += amt
-
-    @classmethod
-    def add_ration_eat(cls, amt=1) -> None:
-        cls._rations_eaten += amt
-
-    @classmethod
-    def add_potion_drink(cls, amt=1) -> None:
-        cls._potions_drank += amt
-
-    @classmethod
-    def add_fallen_minion(cls, amt=1) -> None:
-        cls._fallen_minions += amt
-
-    @classmethod
-    def print_stats(cls) -> None:
-        cls._print_general_stats()
-        print()  # Divider
-        cls._print_damage_stats()
-        print()  # Divider
-        cls._print_item_stats()
-
-    @classmethod
-    def _print_general_stats(cls) -> None:
-        cls._print_kills()
-        cls._print_raised()
-        cls._print_fallen_minions()
-        cls._print_butchered()
-        cls._print_spirits()
-
-    @classmethod
-    def _print_damage_stats(cls) -> None:
-        cls._print_damage_dealt_personal()
-        cls._print_damage_dealt_minions()
-        cls._print_damage_taken_personal()
-        cls._print_damage_taken_minions()
-        cls._print_damage_deflected()
-        cls._print_damage_dodged()
-
-    @classmethod
-    def _print_item_stats(cls) -> None:
-        cls._print_rations_eaten()
-        cls._print_potions_drank()
+    """A structure to present fun game stats on victory.
+
+    Every game has its own Stats, kept by its Player.
+    """
+
+    _COUNTERS = (
+        "kills",
+        "raised",
+        "fallen_minions",
+        "butchered",
+        "spirits",
+        "rations_eaten",
+        "potions_drank",
+        "damage_deflected",
+        "damage_dodged",
+        "damage_taken_personal",
+        "damage_taken_minions",
+        "damage_dealt_personal",
+        "damage_dealt_minions",
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """Zero every counter."""
+
+        self._kills = 0
+        self._raised = 0
+        self._fallen_minions = 0
+        self._butchered = 0
+        self._spirits = 0
+
+        self._rations_eaten = 0
+        self._potions_drank = 0
+
+        self._damage_deflected = 0
+        self._damage_dodged = 0
+        self._damage_taken_personal = 0
+        self._damage_taken_minions = 0
+        self._damage_dealt_personal = 0
+        self._damage_dealt_minions = 0
+
+    def as_dict(self) -> dict:
+        return {counter: getattr(self, f"_{counter}") for counter in self._COUNTERS}
+
+    def set_counters(self, counters: dict) -> None:
+        """Set every counter from a dict like as_dict()'s."""
+
+        for counter in self._COUNTERS:
+            setattr(self, f"_{counter}", counters[counter])
+
+    def add_battle(self, outcome) -> None:
+        """Add up the counts of a BattleOutcome, all at once."""
+
+        self._kills += outcome.kills
+        self._spirits += outcome.spirits
+        self._potions_drank += outcome.potions_drank
+        self._fallen_minions += outcome.minions_fallen
+        self._damage_dealt_personal += outcome.damage_dealt_personal
+        self._damage_dealt_minions += outcome.damage_dealt_minions
+        self._damage_taken_personal += outcome.damage_taken_personal
+        self._damage_taken_minions += outcome.damage_taken_minions
+        self._damage_deflected += outcome.damage_deflected
+        self._damage_dodged += outcome.damage_dodged
+
+    def add_damage_taken_minion(self, amt=1) -> None:
+        self._damage_taken_minions += amt
+
+    def add_damage_taken_personal(self, amt=1) -> None:
+        self._damage_taken_personal += amt
+
+    def add_damage_deflected(self, amt=1) -> None:
+        self._damage_deflected += amt
+
+    def add_damage_dodged(self, amt=1) -> None:
+        self._damage_dodged += amt
+
+    def add_damage_dealt_personal(self, amt=1) -> None:
+        self._damage_dealt_personal += amt
+
+    def add_damage_dealt_minions(self, amt=1) -> None:
+        self._damage_dealt_minions += amt
+
+    def add_kill(self, amt=1) -> None:
+        self._kills += amt
+
+    def add_raise(self, amt=1) -> None:
+        self._raised += amt
+
+    def add_butchery(self, amt=1) -> None:
+        self._butchered += amt
+
+    def add_spirit(self, amt=1) -> None:
+        self._spirits += amt
+
+    def add_ration_eat(self, amt=1) -> None:
+        self._rations_eaten += amt
+
+    def add_potion_drink(self, amt=1) -> None:
+        self._potions_drank += amt
+
+    def add_fallen_minion(self, amt=1) -> None:
+        self._fallen_minions += amt
+
+    def print_stats(self) -> None:
+        self._print_general_stats()
+        util.say()  # Divider
+        self._print_damage_stats()
+        util.say()  # Divider
+        self._print_item_stats()
+
+    def _print_general_stats(self) -> None:
+        self._print_kills()
+        self._print_raised()
+        self._print_fallen_minions()
+        self._print_butchered()
+        self._print_spirits()
+
+    def _print_damage_stats(self) -> None:
+        self._print_damage_dealt_personal()
+        self._print_damage_dealt_minions()
+        self._print_damage_taken_personal()
+        self._print_damage_taken_minions()
+        self._print_damage_deflected()
+        self._print_damage_dodged()
+
+    def _print_item_stats(self) -> None:
+        self._print_rations_eaten()
+        self._print_potions_drank()
 
     """ General stats START """
 
-    @classmethod
-    def _print_kills(cls) -> None:
-        if cls._kills > 0:
-            print(f"You killed {cls._kills} {util.make_plural('monster', cls._kills)}.")
+    def _print_kills(self) -> None:
+        if self._kills > 0:
+            util.say(f"You killed {self._kills} {util.make_plural('monster', self._kills)}.")
         else:
-            print(f"No monsters were felled by your hand.")
+            util.say(f"No monsters were felled by your hand.")
 
-    @classmethod
-    def _print_raised(cls) -> None:
-        if cls._raised > 0:
-            print(
-                f"You raised {cls._raised} new {util.make_plural('minion', cls._kills)} to serve in your army."
+    def _print_raised(self) -> None:
+        if self._raised > 0:
+            util.say(
+                f"You raised {self._raised} new {util.make_plural('minion', self._kills)} to serve in your army."
             )
         else:
-            print(f"No minions have joined your army of the dead, for now.")
+            util.say(f"No minions have joined your army of the dead, for now.")
 
-    @classmethod
-    def _print_fallen_minions(cls) -> None:
-        if cls._fallen_minions > 0:
-            print(
-                f"In battle, {cls._fallen_minions} {util.make_plural('minion', cls._fallen_minions)} fell in your defense, only to rise again."
+    def _print_fallen_minions(self) -> None:
+        if self._fallen_minions > 0:
+            util.say(
+                f"In battle, {self._fallen_minions} {util.make_plural('minion', self._fallen_minions)} fell in your defense, only to rise again."
             )
         else:
-            print("None of your minions fell to the creatures of the dungeon.")
+            util.say("None of your minions fell to the creatures of the dungeon.")
 
-    @classmethod
-    def _print_butchered(cls) -> None:
-        if cls._butchered > 0:
-            print(
-                f"You butchered {cls._butchered} {util.make_plural('monster', cls._kills)} for food."
+    def _print_butchered(self) -> None:
+        if self._butchered > 0:
+            util.say(
+                f"You butchered {self._butchered} {util.make_plural('monster', self._kills)} for food."
             )
         else:
-            print(f"No monsters were butchered for food.")
+            util.say(f"No monsters were butchered for food.")
 
-    @classmethod
-    def _print_spirits(cls) -> None:
-        if cls._spirits > 0:
-            print(
-                f"Due to your actions, {cls._spirits} new {util.make_plural('bone spirit', cls._spirits)} haunt the earth."
+    def _print_spirits(self) -> None:
+        if self._spirits > 0:
+            util.say(
+                f"Due to your actions, {self._spirits} new {util.make_plural('bone spirit', self._spirits)} haunt the earth."
             )
         else:
-            print(f"You refrained from releasing new bone spirits upon the world.")
+            util.say(f"You refrained from releasing new bone spirits upon the world.")
 
     """ Damage stats START """
 
-    @classmethod
-    def _print_damage_dealt_personal(cls) -> None:
-        if cls._damage_dealt_personal > 0:
-            print(
-                f"By your hands, your enemies suffered {cls._damage_dealt_personal} damage."
+    def _print_damage_dealt_personal(self) -> None:
+        if self._damage_dealt_personal > 0:
+            util.say(
+                f"By your hands, your enemies suffered {self._damage_dealt_personal} damage."
             )
         else:
-            print("Your hands are unsullied by combat; you dealt no damage personally.")
+            util.say(
+                "Your hands are unsullied by combat; you dealt no damage personally."
+            )
 
-    @classmethod
-    def _print_damage_dealt_minions(cls) -> None:
-        if cls._damage_dealt_minions > 0:
-            print(
-                f"Your army of the dead collectively dealt {cls._damage_dealt_minions} damage to your enemies."
+    def _print_damage_dealt_minions(self) -> None:
+        if self._damage_dealt_minions > 0:
+            util.say(
+                f"Your army of the dead collectively dealt {self._damage_dealt_minions} damage to your enemies."
             )
         else:
-            print("Your undead army inflicted no wounds on your enemies.")
+            util.say("Your undead army inflicted no wounds on your enemies.")
 
-    @classmethod
-    def _print_damage_taken_personal(cls) -> None:
-        if cls._damage_taken_personal > 0:
-            print(
-                f"You suffered {cls._damage_taken_personal} damage from the denizens of the dungeon."
+    def _print_damage_taken_personal(self) -> None:
+        if self._damage_taken_personal > 0:
+            util.say(
+                f"You suffered {self._damage_taken_personal} damage from the denizens of the dungeon."
             )
         else:
-            print("Like a ghost, you were untouched by your enemies.")
+            util.say("Like a ghost, you were untouched by your enemies.")
 
-    @classmethod
-    def _print_damage_taken_minions(cls) -> None:
-        if cls._damage_taken_minions > 0:
-            print(
-                f"Acting in your defense, your minions suffered {cls._damage_taken_minions} damage."
+    def _print_damage_taken_minions(self) -> None:
+        if self._damage_taken_minions > 0:
+            util.say(
+                f"Acting in your defense, your minions suffered {self._damage_taken_minions} damage."
             )
         else:
-            print("None of your minions suffered harm in the dungeon.")
+            util.say("None of your minions suffered harm in the dungeon.")
 
-    @classmethod
-    def _print_damage_deflected(cls) -> None:
-        if cls._damage_deflected > 0:
-            print(
-                f"Protected by your Shadowcloak, it absorbed {cls._damage_deflected} damage intended for you."
+    def _print_damage_deflected(self) -> None:
+        if self._damage_deflected > 0:
+            util.say(
+                f"Protected by your Shadowcloak, it absorbed {self._damage_deflected} damage intended for you."
             )
         else:
-            print("Your Shadowcloak absorbed no damage intended for you.")
+            util.say("Your Shadowcloak absorbed no damage intended for you.")
 
-    @classmethod
-    def _print_damage_dodged(cls) -> None:
-        if cls._damage_dodged > 0:
-            print(
-                f"Fleeting as a shadow, you managed to evade {cls._damage_dodged} damage intended for you."
+    def _print_damage_dodged(self) -> None:
+        if self._damage_dodged > 0:
+            util.say(
+                f"Fleeting as a shadow, you managed to evade {self._damage_dodged} damage intended for you."
             )
         else:
-            print("You did not evade any damage.")
+            util.say("You did not evade any damage.")
 
     """ Item stats START """
 
-    @classmethod
-    def _print_rations_eaten(cls) -> None:
-        if cls._rations_eaten > 0:
-            print(
-                f"During your stay in the dungeon, you ate {cls._rations_eaten} {util.make_plural('ration', cls._rations_eaten)}. Some of them may have been former residents."
+    def _print_rations_eaten(self) -> None:
+        if self._rations_eaten > 0:
+            util.say(
+                f"During your stay in the dungeon, you ate {self._rations_eaten} {util.make_plural('ration', self._rations_eaten)}. Some of them may have been former residents."
             )
         else:
-            print("In your relentless pursuit for freedom, you ate no food at all.")
+            util.say("In your relentless pursuit for freedom, you ate no food at all.")
 
-    @classmethod
-    def _print_potions_drank(cls) -> None:
-        if cls._potions_drank > 0:
-            print(
-                f"Through your body courses the remnant, tainted magic of {cls._potions_drank} healing {util.make_plural('potion', cls._potions_drank)}."
+    def _print_potions_drank(self) -> None:
+        if self._potions_drank > 0:
+            util.say(
+                f"Through your body courses the remnant, tainted magic of {self._potions_drank} healing {util.make_plural('potion', self._potions_drank)}."
             )
         else:
-            print("Your body remains untainted by the contents of healing potions.")
+            util.say("Your body remains untainted by the contents of healing potions.")
+
+
+class RunningSummary:
+    """The count, mean, variance, min and max of a stream of numbers, kept
+    in constant memory with Welford's method."""
+
+    def __init__(self):
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._min = None
+        self._max = None
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    @property
+    def variance(self) -> float:
+        """The sample variance; 0 until there are two values."""
+        if self._count < 2:
+            return 0.0
+        return self._m2 / (self._count - 1)
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def min(self):
+        return self._min
+
+    @property
+    def max(self):
+        return self._max
+
+    def add(self, value) -> None:
+        self._count += 1
+        delta = value - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (value - self._mean)
+
+        if self._min == None or value < self._min:
+            self._min = value
+        if self._max == None or value > self._max:
+            self._max = value
+
+    def merge(self, other: "RunningSummary") -> None:
+        """Fold in another summary, as if its values had been added here."""
+
+        if other._count == 0:
+            return
+        if self._count == 0:
+            self._count, self._mean, self._m2 = other._count, other._mean, other._m2
+            self._min, self._max = other._min, other._max
+            return
+
+        count = self._count + other._count
+        delta = other._mean - self._mean
+        self._mean += delta * other._count / count
+        self._m2 += other._m2 + delta * delta * self._count * other._count / count
+        self._count = count
+
+        self._min = min(self._min, other._min)
+        self._max = max(self._max, other._max)
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self._count,
+            "mean": self._mean,
+            "stdev": self.stdev,
+            "min": self._min,
+            "max": self._max,
+        }
+
+
+class Histogram:
+    """Counts of values in bins of a fixed width. Its size grows with the
+    range of the values, not with how many there are."""
+
+    def __init__(self, bin_width: int = 1):
+        if bin_width <= 0:
+            raise ValueError(f"Histogram bin width must be positive: {bin_width}")
+
+        self._bin_width = bin_width
+        self._bins = {}
+
+    @property
+    def bin_width(self) -> int:
+        return self._bin_width
+
+    def add(self, value) -> None:
+        low = value // self._bin_width * self._bin_width
+        self._bins[low] = self._bins.get(low, 0) + 1
+
+    def merge(self, other: "Histogram") -> None:
+        if other._bin_width != self._bin_width:
+            raise ValueError("Cannot merge histograms with different bin widths.")
+
+        for low, count in other._bins.items():
+            self._bins[low] = self._bins.get(low, 0) + count
+
+    def bins(self) -> list:
+        """(bin's lowest value, count) for every bin with a value, in order."""
+        return sorted(self._bins.items())
+
+
+class StatsAggregator:
+    """Streaming summaries of the Stats of many finished games.
+
+    Every counter gets a RunningSummary, as do the damage dealt and taken
+    in total. A few of them also get a Histogram. Aggregators from
+    different processes can be merged.
+    """
+
+    # Sums of counters, summarized alongside the counters themselves.
+    TOTALS = {
+        "damage_dealt": ("damage_dealt_personal", "damage_dealt_minions"),
+        "damage_taken": ("damage_taken_personal", "damage_taken_minions"),
+    }
+
+    # The bin width of each histogram.
+    HISTOGRAMS = {
+        "kills": 1,
+        "fallen_minions": 1,
+        "damage_dealt": 10,
+        "damage_taken": 10,
+    }
+
+    def __init__(self):
+        self._summaries = {
+            name: RunningSummary() for name in (*Stats._COUNTERS, *self.TOTALS)
+        }
+        self._histograms = {
+            name: Histogram(width) for name, width in self.HISTOGRAMS.items()
+        }
+
+    @property
+    def games(self) -> int:
+        return self._summaries["kills"].count
+
+    @property
+    def summaries(self) -> dict:
+        """A RunningSummary by counter name."""
+        return self._summaries
+
+    @property
+    def histograms(self) -> dict:
+        """A Histogram by counter name."""
+        return self._histograms
+
+    def add(self, counters: dict) -> None:
+        """Fold in one finished game, given as Stats.as_dict()."""
+
+        values = dict(counters)
+        for total, parts in self.TOTALS.items():
+            values[total] = sum(counters[part] for part in parts)
+
+        for name, summary in self._summaries.items():
+            summary.add(values[name])
+        for name, histogram in self._histograms.items():
+            histogram.add(values[name])
+
+    def merge(self, other: "StatsAggregator") -> None:
+        for name, summary in self._summaries.items():
+            summary.merge(other._summaries[name])
+        for name, histogram in self._histograms.items():
+            histogram.merge(other._histograms[name])
+
+    def as_dict(self) -> dict:
+        return {
+            "games": self.games,
+            "summaries": {
+                name: summary.as_dict() for name, summary in self._summaries.items()
+            },
+            "histograms": {
+                name: histogram.bins() for name, histogram in self._histograms.items()
+            },
+        }
@@ -0,0 +1,486 @@
+"""Simulations of the game under many settings of its variables, to see
+what changing them does.
+
+    py sweep.py HUNGER_RATE=1,2,3 POTION_VALUE=3:7:2 --output sweep.csv
+    py sweep.py HUNGER_RATE=1:4 FLEE_BASE_CHANCE=10:60 --sample 200 ...
+
+Each argument gives the values of one variable, as a list (a,b,c) or a
+range (low:high, or low:high:step). Without --sample the sweep plays every
+combination of them; with it, that many points drawn at random, a range
+being drawn from uniformly (whole numbers if both ends are whole).
+
+Every point plays --runs whole games across a pool of processes, the
+games of one point together, and gets a row of the output: its win rate,
+the average rooms reached and turns taken, and what ended the other runs.
+Run number i has the same seed at every point, so points differ by their
+variables and not by their luck.
+
+The output is also the checkpoint. A point's row is written to disk as
+soon as its last run is in, and a sweep started again with the same
+arguments skips every point already in the file. A sweep that is stopped
+loses only the points it was in the middle of.
+"""
+
+import argparse
+import csv
+import itertools
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from dm import DungeonMaster
+from policies import POLICIES
+import rng
+import simulation
+import variables
+from variables import GameVariables
+
+# What ended a run that was not won, in the order of the output's columns.
+CAUSES = ("starvation", "monster", "runekeeper", "surrender", "stalled")
+
+# The columns that say which sweep a row came from, after those of the
+# swept variables.
+SETTINGS = ("runs", "length", "policy", "seed", "max_actions")
+
+RESULTS = (
+    "win_rate",
+    "mean_rooms",
+    "mean_turns",
+    *(f"{cause}_rate" for cause in CAUSES),
+)
+
+
+class Axis:
+    """The values one variable takes in a sweep."""
+
+    def __init__(self, name: str, values: tuple = None, bounds: tuple = None):
+        """Either values to pick from, or bounds (low, high, step or None)."""
+
+        self._name = name
+        self._values = values
+        self._bounds = bounds
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @classmethod
+    def parse(cls, text: str) -> "Axis":
+        """NAME=a,b,c or NAME=low:high[:step]."""
+
+        name, sign, spec = text.partition("=")
+        if sign == "" or spec == "":
+            raise ValueError(f"Expected NAME=a,b,c or NAME=low:high: {text}")
+
+        name = name.strip().upper()
+        if name not in variables.NAMES:
+            raise ValueError(f"Unknown variable: {name}")
+
+        if ":" not in spec:
+            return cls(name, values=tuple(_parse_value(v) for v in spec.split(",")))
+
+        parts = [_parse_value(v) for v in spec.split(":")]
+        if len(parts) > 3 or any(isinstance(p, str) for p in parts):
+            raise ValueError(f"A range is low:high or low:high:step: {text}")
+        low, high, step = (*parts, None)[:3]
+        if high < low or (step != None and step <= 0):
+            raise ValueError(f"Empty range: {text}")
+        return cls(name, bounds=(low, high, step))
+
+    def grid_values(self) -> tuple:
+        """Every value of the axis, a range going up by its step (or 1)."""
+
+        if self._values != None:
+            return self._values
+
+        low, high, step = self._bounds
+        if step == None:
+            step = 1
+        count = math.floor((high - low) / step + 1e-9) + 1
+        if all(isinstance(x, int) for x in self._bounds if x != None):
+            return tuple(low + i * step for i in range(count))
+        return tuple(round(low + i * step, 9) for i in range(count))
+
+    def sample(self, rand: random.Random):
+        """One value of the axis at random."""
+
+        if self._values != None:
+            return rand.choice(self._values)
+
+        low, high, _ = self._bounds
+        if isinstance(low, int) and isinstance(high, int):
+            return rand.randint(low, high)
+        return round(rand.uniform(low, high), 4)
+
+
+def _parse_value(text: str):
+    text = text.strip()
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+def make_points(axes: list, sample: int = None, seed: int = 0) -> list:
+    """The changes to the variables at every point of a sweep, in order.
+
+    Every combination of the axes' values, or sample points drawn from them.
+    """
+
+    names = [axis.name for axis in axes]
+    if sample == None:
+        combinations = itertools.product(*(axis.grid_values() for axis in axes))
+        return [dict(zip(names, values)) for values in combinations]
+
+    rand = random.Random(rng.derive_seed(seed, "sweep"))
+    return [{axis.name: axis.sample(rand) for axis in axes} for _ in range(sample)]
+
+
+class Tally:
+    """How the runs of one point have gone so far. Tallies of different
+    runs of the same point can be merged."""
+
+    def __init__(self):
+        self._runs = 0
+        self._victories = 0
+        self._rooms = 0
+        self._turns = 0
+        self._causes = dict.fromkeys(CAUSES, 0)
+
+    @property
+    def runs(self) -> int:
+        return self._runs
+
+    def add(self, summary: dict) -> None:
+        """Fold in one run, as summarized by simulation.play_run."""
+
+        self._runs += 1
+        self._rooms += summary["rooms"]
+        self._turns += summary["turns"]
+
+        match summary["ending"]:
+            case "victory":
+                self._victories += 1
+            case "damage" if summary["killer"] == "Runekeeper":
+                self._causes["runekeeper"] += 1
+            case "damage":
+                self._causes["monster"] += 1
+            case ending:
+                self._causes[ending] += 1
+
+    def merge(self, other: "Tally") -> None:
+        self._runs += other._runs
+        self._victories += other._victories
+        self._rooms += other._rooms
+        self._turns += other._turns
+        for cause, count in other._causes.items():
+            self._causes[cause] += count
+
+    def results(self) -> tuple:
+        """The values of the RESULTS columns."""
+
+        runs = self._runs
+        return (
+            round(self._victories / runs, 6),
+            round(self._rooms / runs, 4),
+            round(self._turns / runs, 4),
+            *(round(self._causes[cause] / runs, 6) for cause in CAUSES),
+        )
+
+
+class Sweep:
+    """The points of a sweep, where their rows go and which are done."""
+
+    def __init__(self, axes: list, points: list, settings: tuple, path: str):
+        self._names = [axis.name for axis in axes]
+        self._points = points
+        self._settings = settings
+        self._path = path
+        self._header = ["point", *self._names, *SETTINGS, *RESULTS]
+        self._dialect = "excel-tab" if path.endswith(".tsv") else "excel"
+
+    @property
+    def points(self) -> list:
+        return self._points
+
+    def _key(self, index: int) -> tuple:
+        """The columns of a row that name its point, as written."""
+
+        point = self._points[index]
+        values = (index, *(point[name] for name in self._names), *self._settings)
+        return tuple(str(value) for value in values)
+
+    def resume(self) -> set:
+        """The indexes of the points already in the output file.
+
+        A row cut short by an interruption is dropped from the file. Raises
+        ValueError if the file was written by a sweep of other variables.
+        """
+
+        try:
+            with open(self._path, newline="") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return set()
+
+        lines = text.splitlines(keepends=True)
+        if len(lines) > 0 and not lines[-1].endswith("\n"):
+            lines.pop()
+            with open(self._path, "w", newline="") as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+        rows = list(csv.reader(lines, self._dialect))
+        if len(rows) == 0:
+            return set()
+        if rows[0] != self._header:
+            raise ValueError(
+                f"{self._path} holds a sweep with other columns: {rows[0]}"
+            )
+
+        width = len(self._names) + len(SETTINGS) + 1
+        written = {tuple(row[:width]) for row in rows[1:]}
+        return {i for i in range(len(self._points)) if self._key(i) in written}
+
+    def make_variables(self, base: GameVariables, indexes: list) -> dict:
+        """The GameVariables of each of the points at indexes, by index.
+
+        Raises ValueError if those of a point are not valid.
+        """
+
+        point_variables = {}
+        for index in indexes:
+            point = self._points[index]
+            try:
+                point_variables[index] = base.replace(**point)
+            except ValueError as e:
+                raise ValueError(f"point {index}, {point}: {e}") from None
+        return point_variables
+
+    def open(self):
+        """The output file, open to add rows to, with its header if new."""
+
+        f = open(self._path, "a", newline="")
+        if f.tell() == 0:
+            csv.writer(f, self._dialect).writerow(self._header)
+        return f
+
+    def write(self, f, index: int, tally: Tally) -> None:
+        """Add the row of a finished point, and make sure it is on disk."""
+
+        csv.writer(f, self._dialect).writerow((*self._key(index), *tally.results()))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def run_sweep(
+    point_variables: dict,
+    runs: int,
+    length: int,
+    policy: str = "cautious",
+    seed: int = 0,
+    processes: int = None,
+    max_actions: int = 10_000,
+):
+    """Play runs games at each point, given as its GameVariables by index.
+
+    Yields each point's index and Tally as soon as its last run is in.
+    """
+
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy: {policy}")
+
+    if processes == None:
+        processes = os.cpu_count()
+
+    # A batch of one point's runs is a task: small enough batches that every
+    # process stays busy, but big enough that a point's variables are sent
+    # along once per few dozen runs rather than with every one.
+    batch = max(1, min(64, runs // (processes * 2)))
+    tasks = (
+        (
+            index,
+            start,
+            min(start + batch, runs),
+            seed,
+            length,
+            policy,
+            max_actions,
+            point_variables[index],
+        )
+        for index in point_variables
+        for start in range(0, runs, batch)
+    )
+
+    tallies = {}
+
+    def finish(result: tuple):
+        index, tally = result
+        if index in tallies:
+            tallies[index].merge(tally)
+            tally = tallies[index]
+        if tally.runs < runs:
+            tallies[index] = tally
+            return None
+        tallies.pop(index, None)
+        return index, tally
+
+    # Read here first, as simulation.run_many does.
+    DungeonMaster.load_data()
+
+    if processes <= 1:
+        results = map(_play_batch, tasks)
+        yield from filter(None, map(finish, results))
+        return
+
+    with multiprocessing.Pool(processes, initializer=simulation._init_worker) as pool:
+        for result in pool.imap_unordered(_play_batch, tasks):
+            finished = finish(result)
+            if finished != None:
+                yield finished
+
+
+def _play_batch(task: tuple) -> tuple:
+    index, start, stop, seed, length, policy, max_actions, point_variables = task
+
+    tally = Tally()
+    for i in range(start, stop):
+        tally.add(
+            simulation.play_run(
+                length,
+                POLICIES[policy](),
+                simulation.run_seed(seed, i),
+                max_actions,
+                point_variables,
+            )
+        )
+    return index, tally
+
+
+def main():
+    args = parse_args()
+
+    try:
+        axes = [Axis.parse(text) for text in args.axes]
+        base = variables.load(args.variables) if args.variables else None
+    except (OSError, ValueError) as e:
+        sys.exit(f"Cannot sweep: {e}")
+    if base == None:
+        base = GameVariables.current()
+
+    if len({axis.name for axis in axes}) < len(axes):
+        sys.exit("Cannot sweep: a variable is given more than once.")
+
+    try:
+        DungeonMaster.load_data()
+    except (OSError, ValueError) as e:
+        sys.exit(f"Cannot read the game data: {e}")
+
+    points = make_points(axes, args.sample, args.seed)
+    settings = (args.runs, args.length, args.policy, args.seed, args.max_actions)
+    sweep = Sweep(axes, points, settings, args.output)
+
+    try:
+        done = sweep.resume()
+    except (OSError, ValueError) as e:
+        sys.exit(f"Cannot carry on the sweep: {e}")
+    pending = [i for i in range(len(points)) if i not in done]
+
+    try:
+        point_variables = sweep.make_variables(base, pending)
+    except ValueError as e:
+        sys.exit(f"Cannot sweep: {e}")
+
+    print(
+        f"{len(points)} points, {len(done)} already done, "
+        f"{args.runs} runs of length {args.length} each",
+        file=sys.stderr,
+    )
+
+    start = time.perf_counter()
+    finished = 0
+    try:
+        with sweep.open() as f:
+            for index, tally in run_sweep(
+                point_variables,
+                args.runs,
+                args.length,
+                args.policy,
+                args.seed,
+                args.processes,
+                args.max_actions,
+            ):
+                sweep.write(f, index, tally)
+                finished += 1
+                print(
+                    f"Point {index} done ({len(done) + finished}/{len(points)})",
+                    file=sys.stderr,
+                )
+    except KeyboardInterrupt:
+        sys.exit(
+            f"\nStopped after {finished} more points. Run the same command "
+            "again to carry on."
+        )
+
+    elapsed = time.perf_counter() - start
+    print(f"{finished} points in {elapsed:.1f}s", file=sys.stderr)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Simulate many games under each of many settings of the "
+        "variables."
+    )
+    parser.add_argument(
+        "axes",
+        nargs="+",
+        metavar="NAME=VALUES",
+        help="a variable and its values, as a,b,c or low:high[:step]",
+    )
+    parser.add_argument(
+        "--output",
+        required=True,
+        help="the CSV (or .tsv) file of results, which is also the checkpoint",
+    )
+    parser.add_argument(
+        "--sample",
+        type=int,
+        default=None,
+        help="play this many random points instead of every combination",
+    )
+    parser.add_argument("--runs", type=int, default=1000, help="games per point")
+    parser.add_argument("--length", type=int, default=10, help="rooms in the dungeon")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="cautious")
+    parser.add_argument(
+        "--seed", type=int, default=0, help="master seed of the runs and the sample"
+    )
+    parser.add_argument(
+        "--processes", type=int, default=None, help="defaults to one per core"
+    )
+    parser.add_argument(
+        "--max-actions",
+        type=int,
+        default=10_000,
+        help="a run still going after this many actions ends as stalled",
+    )
+    parser.add_argument(
+        "--variables",
+        metavar="FILE",
+        help="the variables not swept, from a TOML or JSON file "
+        "(see variables.py)",
+    )
+
+    args = parser.parse_args()
+    if args.runs < 1:
+        parser.error("--runs must be at least 1")
+    return args
+
+
+if __name__ == "__main__":
+    main()
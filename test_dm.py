@@ -0,0 +1,122 @@
+"""Games with DungeonMasters of their own, played side by side in one process.
+
+    py -m unittest test_dm
+"""
+
+import random
+import threading
+import unittest
+
+from dm import DungeonMaster
+from policies import RandomPolicy
+import rng
+import simulation
+
+GAMES = 1_000
+LENGTH = 8
+
+
+class SteppedPolicy(RandomPolicy):
+    """Plays as RandomPolicy, but only one decision at a time: before each
+    one, it hands control back to the scheduler and waits for its turn."""
+
+    def __init__(self, yielded: threading.Semaphore):
+        super().__init__()
+        self._yielded = yielded
+        self._turn = threading.Semaphore(0)
+
+    def wait_to_start(self) -> None:
+        self._turn.acquire()
+
+    def take_turn(self) -> None:
+        """Let the game play up to its next decision, and wait until it has."""
+
+        self._turn.release()
+        self._yielded.acquire()
+
+    def wait_for_turn(self) -> None:
+        self._yielded.release()
+        self._turn.acquire()
+
+    def choose_action(self, game) -> str:
+        self.wait_for_turn()
+        return super().choose_action(game)
+
+    def choose_rest_hours(self, game) -> int:
+        self.wait_for_turn()
+        return super().choose_rest_hours(game)
+
+    def choose_army_orders(self, game) -> tuple:
+        self.wait_for_turn()
+        return super().choose_army_orders(game)
+
+    def choose_minion_behavior(self, game) -> str:
+        self.wait_for_turn()
+        return super().choose_minion_behavior(game)
+
+    def choose_battle_action(self, battle) -> str:
+        self.wait_for_turn()
+        return super().choose_battle_action(battle)
+
+    def choose_necromancy(self, battle) -> str:
+        self.wait_for_turn()
+        return super().choose_necromancy(battle)
+
+
+class InterleavedGamesTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        DungeonMaster.load_data()
+
+    def test_interleaved_games_end_as_when_played_alone(self):
+        alone = [
+            simulation.play_run(LENGTH, RandomPolicy(), seed) for seed in range(GAMES)
+        ]
+
+        # Each game runs in a thread of its own, but only the one whose turn
+        # it is ever moves. The rng module's streams are reseeded between
+        # turns, so a game rolling with anything but its own would go astray.
+        yielded = threading.Semaphore(0)
+        policies = [SteppedPolicy(yielded) for _ in range(GAMES)]
+        summaries = [None] * GAMES
+        finished = [False] * GAMES
+        errors = []
+
+        def play(seed: int) -> None:
+            policy = policies[seed]
+            policy.wait_to_start()
+            try:
+                summaries[seed] = simulation.play_run(LENGTH, policy, seed)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                finished[seed] = True
+                yielded.release()
+
+        threads = [
+            threading.Thread(target=play, args=(seed,), daemon=True)
+            for seed in range(GAMES)
+        ]
+        for thread in threads:
+            thread.start()
+
+        scheduler = random.Random(16)
+        playing = list(range(GAMES))
+        while len(playing) > 0:
+            i = scheduler.randrange(len(playing))
+            seed = playing[i]
+            rng.seed(scheduler.getrandbits(64))
+            policies[seed].take_turn()
+            if finished[seed]:
+                threads[seed].join()
+                playing[i] = playing[-1]
+                playing.pop()
+
+        if len(errors) > 0:
+            raise errors[0]
+        for seed in range(GAMES):
+            self.assertEqual(summaries[seed], alone[seed], f"seed {seed}")
+
+
+if __name__ == "__main__":
+    unittest.main()
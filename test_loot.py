@@ -0,0 +1,89 @@
+"""The loot tables' alias draws against the rejection sampler they replaced.
+
+    py -m unittest test_loot
+"""
+
+import random
+import unittest
+
+import loot
+
+DRAWS = 100_000
+
+# The chi-square statistic with 4 degrees of freedom (five items) that is
+# exceeded by chance once in a thousand times. Fewer items mean fewer
+# degrees of freedom and a lower critical value, so this is the loosest.
+THRESHOLD = 18.47
+
+# What the rejection sampler kept in each room type; anything else it rolled
+# again, from all of loot.ITEMS.
+OLD_ALLOWED = {
+    "generic": loot.ITEMS,
+    "armory": ("weapon", "armor"),
+    "kitchen": ("food",),
+    "workshop": ("skeleton", "potion"),
+}
+
+
+def old_draw(room_type: str, stream) -> str:
+    """Room._roll_for_item as it was before the loot tables."""
+
+    while True:
+        result = stream.choice(loot.ITEMS)
+        if result in OLD_ALLOWED[room_type]:
+            return result
+
+
+def chi_square(first: dict, second: dict) -> float:
+    """The two-sample chi-square statistic of two sets of counts of equal
+    size, over the items that either of them drew."""
+
+    statistic = 0.0
+    for item in loot.ITEMS:
+        total = first.get(item, 0) + second.get(item, 0)
+        if total > 0:
+            statistic += (first.get(item, 0) - second.get(item, 0)) ** 2 / total
+    return statistic
+
+
+def count(draw, stream) -> dict:
+    counts = {}
+    for _ in range(DRAWS):
+        item = draw(stream)
+        counts[item] = counts.get(item, 0) + 1
+    return counts
+
+
+class LootTableTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        loot.load()
+
+    def test_room_types_match_the_old_ones(self):
+        self.assertEqual(set(loot.get_room_types()), set(OLD_ALLOWED))
+
+    def test_draws_match_the_rejection_sampler(self):
+        for seed, room_type in enumerate(loot.get_room_types()):
+            table = loot.get_table(room_type)
+            new = count(table.draw, random.Random(seed))
+            old = count(
+                lambda stream: old_draw(room_type, stream),
+                random.Random(seed + 1000),
+            )
+
+            with self.subTest(room_type=room_type):
+                self.assertEqual(set(new), set(OLD_ALLOWED[room_type]))
+                self.assertEqual(set(old), set(OLD_ALLOWED[room_type]))
+                self.assertLess(chi_square(new, old), THRESHOLD)
+
+    def test_probabilities(self):
+        for room_type, allowed in OLD_ALLOWED.items():
+            table = loot.get_table(room_type)
+            for item in loot.ITEMS:
+                expected = 1 / len(allowed) if item in allowed else 0
+                with self.subTest(room_type=room_type, item=item):
+                    self.assertAlmostEqual(table.probability(item), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
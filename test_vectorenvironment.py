@@ -0,0 +1,119 @@
+"""VectorEnvironment(exact=True) stepped alongside a GameEnvironment per game.
+
+    py -m unittest test_vectorenvironment
+"""
+
+import random
+import unittest
+
+import numpy as np
+
+from environment import ACTIONS, BATTLE, NECROMANCY, ROOM, GameEnvironment
+from variables import GameVariables
+from vectorenvironment import ENDINGS, VectorEnvironment
+
+GAMES = 48
+STEPS = 1_500
+LENGTH = 8
+MAX_STEPS = 300
+
+SURRENDER = ACTIONS.index("SURRENDER")
+
+
+def choose(observation: tuple, legal: tuple, style: int, chooser) -> int:
+    """An action for one game. The styles play carefully, recklessly or at
+    random, so that the games between them reach every phase and ending."""
+
+    phase, hp, max_hp, hunger, _, potions, *_ = observation
+    searches_left = observation[14]
+
+    if style == 0:
+        if phase == ROOM and chooser.random() < 0.98:
+            legal = [action for action in legal if action != SURRENDER]
+        return chooser.choice(legal)
+
+    if phase == ROOM:
+        if style == 1:
+            if hp <= max_hp // 2 and potions > 0:
+                name = "POTION"
+            elif hp < max_hp and hunger < 60:
+                name = "REST"
+            elif searches_left > 0:
+                name = "SEARCH"
+            else:
+                name = "EXPLORE"
+        else:
+            name = chooser.choice(("FIGHT", "FIGHT", "ALL_ATTACK", "EXPLORE"))
+        return ACTIONS.index(name)
+
+    if phase == BATTLE:
+        if style == 1:
+            if hp <= 3 and ACTIONS.index("DRINK_POTION") in legal:
+                return ACTIONS.index("DRINK_POTION")
+            return ACTIONS.index("ATTACK")
+        return chooser.choice(legal)
+
+    if phase == NECROMANCY:
+        if style == 1:
+            return ACTIONS.index("RAISE")
+        return ACTIONS.index(chooser.choice(("RAISE", "BUTCHER")))
+    return chooser.choice(legal)
+
+
+class ExactVectorEnvironmentTest(unittest.TestCase):
+    def check_lockstep(self, variables: GameVariables) -> None:
+        vector = VectorEnvironment(
+            GAMES, LENGTH, variables, max_steps=MAX_STEPS, exact=True
+        )
+        observations = vector.reset(seed=7)
+        games = [
+            GameEnvironment(LENGTH, variables, max_steps=MAX_STEPS)
+            for _ in range(GAMES)
+        ]
+        alone = [games[i].reset(vector.seeds[i]) for i in range(GAMES)]
+
+        chooser = random.Random(24)
+        endings = set()
+        for step in range(STEPS):
+            legal = vector.legal_actions()
+            actions = []
+            for i, game in enumerate(games):
+                where = f"step {step}, game {i}"
+                self.assertEqual(tuple(observations[i].tolist()), alone[i], where)
+                game_legal = game.legal_actions()
+                self.assertEqual(
+                    tuple(np.flatnonzero(legal[i]).tolist()), game_legal, where
+                )
+                actions.append(choose(alone[i], game_legal, i % 3, chooser))
+
+            observations, rewards, dones, info = vector.step(np.array(actions))
+            for i, game in enumerate(games):
+                where = f"step {step}, game {i}"
+                observation, reward, done, game_info = game.step(actions[i])
+                self.assertEqual(rewards[i], reward, where)
+                self.assertEqual(bool(dones[i]), done, where)
+                if done:
+                    ending = game_info["ending"]
+                    self.assertEqual(ENDINGS[info["ending"][i]], ending, where)
+                    final = tuple(info["final_observation"][i].tolist())
+                    self.assertEqual(final, observation, where)
+                    endings.add(ending)
+                    observation = game.reset(vector.seeds[i])
+                else:
+                    self.assertEqual(info["ending"][i], -1, where)
+                alone[i] = observation
+
+        # The games are long enough to end in more ways than one.
+        self.assertGreater(len(endings), 2, endings)
+
+    def test_default_variables(self):
+        self.check_lockstep(GameVariables.from_dict({}))
+
+    def test_changed_variables(self):
+        self.check_lockstep(
+            GameVariables.from_dict({"HUNGER_RATE": 5, "POTION_VALUE": 6})
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
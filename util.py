@@ -1,35 +1,210 @@
 import os
 import sys
+from io import StringIO
+
+import instrument
+
+
+# Clears the screen and moves the cursor to its top left corner.
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+
+
+class ConsoleIO:
+    """The game's input and output at the terminal.
+
+    Everything the game says is held as one frame and written in a single
+    call when the game asks for input, and clear() starts a new frame with
+    an ANSI clear-screen instead of running a shell command. When stream
+    is not a terminal, nothing is cleared and the output is left as it was
+    said. Until start(), what is said goes straight to sys.stdout.
+
+    read_line blocks in input() and never really waits on anything, so a
+    game played at the console runs to the end in run_console() without an
+    event loop. Sessions of the TCP server (see server.py) use their own.
+    """
+
+    def __init__(self):
+        self._stream = None
+        self._frame = []
+        self._ansi = False
+
+    def start(self, stream) -> None:
+        """Send frames to stream from now on."""
+
+        self._stream = stream
+        self._ansi = stream.isatty()
+        if self._ansi and os.name == "nt":
+            # Running any command turns on escape sequences in the console.
+            os.system("")
+
+    def write(self, text: str) -> None:
+        if self._stream == None:
+            sys.stdout.write(text)
+        else:
+            self._frame.append(text)
+
+    def present(self) -> None:
+        """Write out the frame so far."""
+
+        if len(self._frame) > 0:
+            self._stream.write("".join(self._frame))
+            self._frame.clear()
+        self._stream.flush()
+
+    async def read_line(self, prompt: str = "") -> str:
+        """Raises EOFError when the input runs out, as input() does."""
+
+        self._frame.append(prompt)
+        self.present()
+        return input()
+
+    def clear(self) -> None:
+        if self._ansi:
+            # Anything not yet shown would be cleared away at once.
+            self._frame.clear()
+            self._frame.append(CLEAR_SCREEN)
+
+    def close(self, message: str) -> None:
+        self.present()
+        sys.exit(message)
+
+
+# Where the game reads its input, says everything, clears the screen and
+# quits through.
+_io = ConsoleIO()
+
+
+def use_io(io) -> None:
+    global _io
+    _io = io
+
+
+def get_io():
+    return _io
+
+
+def run_console(coroutine):
+    """Run a coroutine of the game at the terminal, with a ConsoleIO for
+    its input and output."""
+
+    console = ConsoleIO()
+    io = _io
+    console.start(sys.stdout)
+    use_io(console)
+    try:
+        coroutine.send(None)
+    except StopIteration as finished:
+        return finished.value
+    finally:
+        console.present()
+        use_io(io)
+
+    coroutine.close()
+    raise RuntimeError("A console game tried to wait on something besides input.")
+
+
+def say(*values, sep: str = " ", end: str = "\n") -> None:
+    """Show values to the player, as print() would."""
+    _io.write(sep.join(map(str, values)) + end)
+
+
+async def read_line(prompt: str = "") -> str:
+    """Read a line of the player's input, showing prompt first."""
+    return await _io.read_line(prompt)
 
 
 def clear() -> None:
     """Clear the terminal."""
-
-    if os.name == "nt":
-        os.system("cls")
-    else:
-        os.system("clear")
+    _io.clear()
 
 
-def continue_prompt() -> None:
+async def continue_prompt() -> None:
     """Prompt the Player to press Enter to continue.
 
     Avoids some throws from trying to cancel out.
     """
 
     try:
-        input("\nPress enter to continue.")
+        with instrument.span("continue_prompt"):
+            await read_line("\nPress enter to continue.")
     except KeyboardInterrupt:
         pass
     except EOFError:
         pass
 
 
+class _Narration(StringIO):
+    """The I/O while narrate() runs: what is said is kept back, and the
+    screen is cleared through the I/O underneath."""
+
+    def __init__(self, io):
+        super().__init__()
+        self._io = io
+
+    def clear(self) -> None:
+        self._io.clear()
+
+
+# While narrate() runs, where its output goes and where it paused.
+_narration = None
+_pauses = None
+
+
+def pause() -> None:
+    """Have the player press Enter at this point of a narration.
+
+    Listeners of the engines call this instead of continue_prompt(), as
+    they cannot wait for input themselves; see narrate().
+    """
+
+    if _pauses == None:
+        raise ValueError("Tried to pause outside of a narration.")
+    _pauses.append(_narration.tell())
+
+
+async def narrate(function, *args):
+    """Call function(*args) and return what it returns, showing what it
+    said with a continue prompt at every pause() it made.
+
+    function must not wait for input. Its output is held back while it
+    runs and let out a piece at a time afterwards, so it reads exactly as
+    if the prompts had been asked on the spot.
+    """
+
+    global _narration, _pauses
+    if _pauses != None:
+        raise ValueError("Tried to start a narration inside another.")
+
+    io = _io
+    narration, pauses = _Narration(io), []
+    _narration, _pauses = narration, pauses
+    use_io(narration)
+    try:
+        result = function(*args)
+    except BaseException:
+        # What function said before it failed is still shown.
+        io.write(narration.getvalue())
+        raise
+    finally:
+        use_io(io)
+        _narration = _pauses = None
+
+    text = narration.getvalue()
+    start = 0
+    for end in pauses:
+        io.write(text[start:end])
+        start = end
+        await continue_prompt()
+    io.write(text[start:])
+
+    return result
+
+
 def close(name: str = "necromancer") -> None:
     if name != "necromancer":
-        sys.exit(f"\nUntil next time, {name} the Necromancer...\n")
+        _io.close(f"\nUntil next time, {name} the Necromancer...\n")
     else:
-        sys.exit(f"\nUntil next time, {name}...")
+        _io.close(f"\nUntil next time, {name}...")
 
 
 def make_plural(word, amt, ending="s") -> str:
@@ -39,21 +214,21 @@ def make_plural(word, amt, ending="s") -> str:
         return f"{word}{ending}"
 
 
-def prompt_for_number_safely(question, num_choices):
+async def prompt_for_number_safely(question, num_choices):
     if num_choices <= 0:
         raise ValueError("Can't prompt for non-positive number of choices.")
 
     while True:
         try:
-            choice = input(f"{question} ")
+            choice = await read_line(f"{question} ")
             try:
                 choice = int(choice)
                 if choice == 0 or choice > num_choices:
-                    print("\nUnknown choice.")
+                    say("\nUnknown choice.")
                 else:
                     return choice
 
             except ValueError:
-                print("\nUnknown choice.")
+                say("\nUnknown choice.")
         except (EOFError, KeyboardInterrupt):
-            print("\nUnknown choice.")
+            say("\nUnknown choice.")
@@ -1,3 +1,27 @@
+"""The game's tuning knobs, and the frozen copy of them each game plays by.
+
+The Variables class holds the defaults. A config file, TOML or JSON, can
+change any of them by name; a TOML one reads:
+
+    HUNGER_RATE = 3
+    POTION_VALUE = 5
+
+Run `py project.py --variables tuning.toml` (or server.py, or
+simulation.py) to play with one. Every game takes a GameVariables from
+GameVariables.current() when it starts and keeps it to the end. While a
+file is in use, current() reads it again whenever it changes, so new
+games pick up the change and the games already running carry on as they
+were.
+"""
+
+import json
+import os
+import sys
+import time
+
+import wordtables
+
+
 class Variables:
     """An object to contain various game variables."""
 
@@ -33,6 +57,10 @@ class Variables:
     MINION_ARMOR_RATIO = 1
     MINION_DAMAGE_RATIO = 3
 
+    # How the army is stored: "objects", or "arrays" for armies of tens of
+    # thousands (needs NumPy).
+    MINION_ARMY = "objects"
+
     """Spell variables."""
 
     SPELL_VAMPIRIC_TOUCH_RATIO = 3
@@ -59,3 +87,227 @@ class Variables:
 
     FINAL_BOSS_ADDITIONAL_LEVELS = 3
     FINAL_BOSS_LEVEL_MULTIPLIER = 1.5
+
+
+# The names of every variable, in the order of the class.
+NAMES = tuple(name for name in vars(Variables) if name.isupper())
+
+# Variables worked out from others, unless a config file sets them itself.
+_DERIVED = {"RESTING_HUNGER_RATE": lambda values: values["HUNGER_RATE"] * 2}
+
+# Variables that are divided by, and so must be above 0. They may have a
+# fractional part even where the default is a whole number.
+_DIVISORS = (
+    "MINION_ARMOR_RATIO",
+    "MINION_DAMAGE_RATIO",
+    "SPELL_VAMPIRIC_TOUCH_RATIO",
+    "SPELL_PAIN_RATIO",
+    "SPELL_DEATH_BOLT_RATIO",
+)
+
+ARMIES = ("objects", "arrays")
+
+
+class GameVariables:
+    """The variables of one game, which cannot change once it has them.
+
+    They are read as attributes, like those of the Variables class, and
+    are kept in slots so that reading one costs no more.
+    """
+
+    __slots__ = NAMES + ("_json",)
+
+    def __init__(self, values: dict):
+        """values must have every name in NAMES; see from_dict()."""
+
+        for name in NAMES:
+            object.__setattr__(self, name, values[name])
+        object.__setattr__(self, "_json", None)
+
+    @classmethod
+    def from_dict(cls, changes: dict) -> "GameVariables":
+        """The defaults with changes made to them, checked to be valid."""
+
+        values = {name: getattr(Variables, name) for name in NAMES}
+        for name, value in changes.items():
+            if name not in values:
+                raise ValueError(f"Unknown variable: {name}")
+            values[name] = value
+
+        for name, derive in _DERIVED.items():
+            if name not in changes:
+                values[name] = derive(values)
+
+        _validate(values)
+        return cls(values)
+
+    @classmethod
+    def current(cls) -> "GameVariables":
+        """The variables for a game starting now.
+
+        Without a config file, these are the values of the Variables class.
+        With one, the file is checked for changes as often as the word lists
+        (see wordtables.py). A change that makes it invalid is reported on
+        stderr and ignored, so games keep starting with the last valid values.
+        """
+
+        global _version, _current, _checked_at
+
+        if _path == None:
+            return cls.from_dict({})
+
+        now = time.monotonic()
+        if now - _checked_at < wordtables.RECHECK_SECONDS:
+            return _current
+        _checked_at = now
+
+        try:
+            status = os.stat(_path)
+            version = (status.st_mtime_ns, status.st_size)
+            if version != _version:
+                _version = version
+                _current = load(_path)
+                print(f"Reloaded the variables of {_path}.", file=sys.stderr)
+        except (OSError, ValueError) as e:
+            print(f"Kept the variables in use: {e}", file=sys.stderr)
+
+        return _current
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            "The variables of a game cannot change; start a new game with new ones."
+        )
+
+    def __reduce__(self):
+        # Slots and a frozen __setattr__ need help to pickle.
+        return (GameVariables, (self.as_dict(),))
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in NAMES}
+
+    def as_json(self) -> str:
+        """as_dict() encoded as JSON, worked out once."""
+
+        if self._json == None:
+            object.__setattr__(self, "_json", json.dumps(self.as_dict()))
+        return self._json
+
+    def replace(self, **changes) -> "GameVariables":
+        """A copy with some variables changed, checked to be valid."""
+
+        values = self.as_dict()
+        for name in changes:
+            if name not in values:
+                raise ValueError(f"Unknown variable: {name}")
+        values.update(changes)
+
+        # Derived variables follow along, unless they were set otherwise.
+        old_values = self.as_dict()
+        for name, derive in _DERIVED.items():
+            if name not in changes and old_values[name] == derive(old_values):
+                values[name] = derive(values)
+
+        _validate(values)
+        return GameVariables(values)
+
+
+def _validate(values: dict) -> None:
+    for name, value in values.items():
+        default = getattr(Variables, name)
+        if isinstance(default, str):
+            if not isinstance(value, str):
+                raise ValueError(f"{name} must be a string: {value!r}")
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{name} must be a number: {value!r}")
+        elif (
+            isinstance(default, int)
+            and not isinstance(value, int)
+            and name not in _DIVISORS
+        ):
+            raise ValueError(f"{name} must be a whole number: {value!r}")
+        elif value < 0:
+            raise ValueError(f"{name} cannot be negative: {value}")
+
+        if name.endswith("_CHANCE") and value > 100:
+            raise ValueError(f"{name} is a percentage, at most 100: {value}")
+
+    for name in _DIVISORS:
+        if values[name] == 0:
+            raise ValueError(f"{name} must be above 0.")
+
+    if not (
+        1
+        <= values["ROOM_MIN_SEARCHES"]
+        <= values["ROOM_AVG_SEARCHES"]
+        <= values["ROOM_MAX_SEARCHES"]
+    ):
+        raise ValueError(
+            "Room searches must be at least 1, and "
+            "ROOM_MIN_SEARCHES <= ROOM_AVG_SEARCHES <= ROOM_MAX_SEARCHES."
+        )
+    if values["PLAYER_MAX_HP"] < 1:
+        raise ValueError("PLAYER_MAX_HP must be at least 1.")
+    if values["MINION_ARMY"] not in ARMIES:
+        raise ValueError(f"MINION_ARMY must be one of {ARMIES}.")
+
+
+def load(path: str) -> GameVariables:
+    """The defaults with the changes of a TOML or JSON config file.
+
+    Names may be written in lower case. Raises ValueError for a file that
+    cannot be read or sets anything to an invalid value.
+    """
+
+    try:
+        with open(path, "rb") as f:
+            if path.endswith(".json"):
+                changes = json.load(f)
+            else:
+                import tomllib
+
+                changes = tomllib.load(f)
+    except ImportError:
+        raise ValueError("TOML needs Python 3.11; use a .json file instead.") from None
+    except ValueError as e:
+        # json.JSONDecodeError and tomllib.TOMLDecodeError are both ValueErrors.
+        raise ValueError(f"{path} is not valid: {e}") from None
+
+    if not isinstance(changes, dict):
+        raise ValueError(f"{path} must hold a table of variables.")
+
+    try:
+        return GameVariables.from_dict(
+            {name.upper(): value for name, value in changes.items()}
+        )
+    except ValueError as e:
+        raise ValueError(f"{path}: {e}") from None
+
+
+# The config file in use, its modification time and size when it was
+# last read, what it gave, and when it was last checked.
+_path = None
+_version = None
+_current = None
+_checked_at = None
+
+
+def use_file(path: str) -> GameVariables:
+    """Play new games by the variables of path, from now on and whenever
+    it changes. A file that is invalid to begin with raises ValueError."""
+
+    global _path, _version, _current, _checked_at
+
+    status = os.stat(path)
+    _current = load(path)
+    _path = path
+    _version = (status.st_mtime_ns, status.st_size)
+    _checked_at = time.monotonic()
+    return _current
+
+
+def use_defaults() -> None:
+    """Stop using a config file."""
+
+    global _path, _current
+    _path = None
+    _current = None
@@ -0,0 +1,978 @@
+"""Thousands of games stepped in lockstep, for training agents in batches.
+
+    env = VectorEnvironment(4096, length=10)
+    observations = env.reset(seed=1)
+    while training:
+        actions = agent(observations, env.legal_actions())
+        observations, rewards, dones, info = env.step(actions)
+
+The games are those of GameEnvironment (see environment.py), with the same
+ACTIONS, phases, OBSERVATION columns and rewards. Here the state of every
+game is held in NumPy arrays, a row per game, and step() takes an array of
+actions and plays one decision of every game at once.
+
+A game that ends is started again within the same step, with the next
+seed: its reward and done flag are those of its ending, and the
+observation returned is the first of the new game. info["ending"] has the
+index into ENDINGS of each game that ended, -1 for the others, and
+info["final_observation"] the last observation of every game before any
+were started again.
+
+Game number i after reset(seed) plays the seed simulation.py gives its run
+number i. With exact=True, every game rolls with rng.RandomStreams of its
+own seed, taking the same rolls in the same order as DungeonMaster, Room
+and BattleEngine, so it plays out exactly as GameEnvironment plays that
+seed. That costs a Python call per roll. By default the rolls of the whole
+batch come from one NumPy generator seeded from the master seed instead:
+the same odds, and the same batch again for the same seed, but games that
+are not those of their seeds.
+"""
+
+import random
+
+import numpy as np
+
+from battleengine import BattleEngine
+from dm import DungeonMaster
+from environment import (
+    ACTIONS,
+    BATTLE,
+    BEHAVIOR,
+    NECROMANCY,
+    NECROMANCY_ACTIONS,
+    ROOM,
+    ROOM_ACTIONS,
+)
+import loot
+from player import Player
+import rng
+from variables import GameVariables
+
+# The endings info["ending"] gives, as indexes.
+ENDINGS = ("victory", "starvation", "damage", "surrender", "stalled")
+
+_GOING_ON = -1
+_VICTORY, _STARVATION, _DAMAGE, _SURRENDER, _STALLED = range(len(ENDINGS))
+
+_INDEX = {action: i for i, action in enumerate(ACTIONS)}
+_BATTLE_START = len(ROOM_ACTIONS)
+_NECROMANCY_START = _BATTLE_START + len(BattleEngine.CHOICES)
+_BEHAVIOR_START = _NECROMANCY_START + len(NECROMANCY_ACTIONS)
+
+# Who started a battle, and what follows the answer for a new minion.
+_SELF, _DOOM, _FINAL_BOSS = range(3)
+_THEN_END_TURN, _THEN_END_BATTLE = range(2)
+
+# The roles in the minion arrays; a seat past a game's army is empty.
+_EMPTY, _ATTACKING, _DEFENDING = range(3)
+
+# Player.minion_default, as indexes.
+_DEFAULTS = ("ask", "attack", "defend")
+_ASK, _ATTACK, _DEFEND = range(len(_DEFAULTS))
+
+# What Monster makes of a level, with its default ratios.
+_MONSTER_HEALTH_RATIO = 3
+_MONSTER_DAMAGE_RATIO = 1
+
+
+class _StreamRolls:
+    """Rolls from every game's own RandomStreams, made as the engines make
+    them."""
+
+    def __init__(self, size: int):
+        self._streams = [None] * size
+
+    def start(self, rows: np.ndarray, seeds: list) -> None:
+        for i, seed in zip(rows.tolist(), seeds):
+            self._streams[i] = rng.RandomStreams(seed)
+
+    def randint(self, name: str, rows: np.ndarray, a: int, b: int) -> np.ndarray:
+        streams = self._streams
+        return np.array(
+            [streams[i][name].randint(a, b) for i in rows.tolist()], dtype=np.int64
+        )
+
+    def random(self, name: str, rows: np.ndarray) -> np.ndarray:
+        streams = self._streams
+        return np.array(
+            [streams[i][name].random() for i in rows.tolist()], dtype=np.float64
+        )
+
+    def choice(self, name: str, rows: np.ndarray, sizes) -> np.ndarray:
+        """The index stream.choice() picks from a sequence of each size."""
+
+        streams = self._streams
+        sizes = np.broadcast_to(sizes, rows.shape).tolist()
+        return np.array(
+            [streams[i][name].choice(range(n)) for i, n in zip(rows.tolist(), sizes)],
+            dtype=np.int64,
+        )
+
+    def draw_name(self, name: str, rows: np.ndarray, sizes) -> None:
+        """A choice that only picks a word of a name, taken so that the
+        rolls after it line up."""
+
+        self.choice(name, rows, sizes)
+
+
+class _GeneratorRolls:
+    """Rolls for the whole batch from one NumPy generator."""
+
+    def __init__(self, seed: int):
+        self._generator = np.random.default_rng(seed)
+
+    def start(self, rows: np.ndarray, seeds: list) -> None:
+        pass
+
+    def randint(self, name: str, rows: np.ndarray, a: int, b: int) -> np.ndarray:
+        return self._generator.integers(a, b + 1, size=len(rows))
+
+    def random(self, name: str, rows: np.ndarray) -> np.ndarray:
+        return self._generator.random(len(rows))
+
+    def choice(self, name: str, rows: np.ndarray, sizes) -> np.ndarray:
+        return self._generator.integers(0, sizes, size=len(rows))
+
+    def draw_name(self, name: str, rows: np.ndarray, sizes) -> None:
+        """Names are never made, so there is nothing to roll."""
+
+
+class VectorEnvironment:
+    """size games at once, each played a decision per step."""
+
+    def __init__(
+        self,
+        size: int,
+        length: int = 10,
+        variables: GameVariables = None,
+        max_steps: int = 10_000,
+        exact: bool = False,
+    ):
+        """Every game is length rooms long and plays by variables, by
+        default those of a game starting now. exact picks the rolls of
+        each game's own seed over faster ones."""
+
+        if size <= 0:
+            raise ValueError(f"A vector environment needs at least one game: {size}")
+
+        if len(DungeonMaster.monsters) == 0:
+            DungeonMaster.load_data()
+
+        self._size = size
+        self._length = length
+        self._variables = variables if variables != None else GameVariables.current()
+        self._max_steps = max_steps
+        self._exact = exact
+
+        self._load_tables()
+
+        # As DungeonMaster.place_runes.
+        self._rune_rooms = np.array([int(length / i) for i in range(3, 0, -1)])
+
+        self._seed = None
+        self._games = 0
+        self._seeds = [None] * size
+        self._rolls = None
+
+        # The game, and the environment's place in it.
+        self._phase = np.zeros(size, dtype=np.int64)
+        self._steps = np.zeros(size, dtype=np.int64)
+        self._ending = np.full(size, _GOING_ON, dtype=np.int64)
+        self._room_count = np.zeros(size, dtype=np.int64)
+        self._turns = np.zeros(size, dtype=np.int64)
+        self._battles = np.zeros(size, dtype=np.int64)
+        self._skip_hunger = np.zeros(size, dtype=bool)
+        self._then = np.zeros(size, dtype=np.int64)
+
+        # The player.
+        self._hp = np.zeros(size, dtype=np.int64)
+        self._max_hp = np.zeros(size, dtype=np.int64)
+        self._hunger = np.zeros(size, dtype=np.int64)
+        self._food = np.zeros(size, dtype=np.int64)
+        self._potions = np.zeros(size, dtype=np.int64)
+        self._souls = np.zeros(size, dtype=np.int64)
+        self._runes = np.zeros(size, dtype=np.int64)
+        self._doom = np.zeros(size, dtype=np.int64)
+        self._level = np.zeros(size, dtype=np.int64)
+        self._weapon = np.zeros(size, dtype=np.int64)
+        self._armor = np.zeros(size, dtype=np.int64)
+        self._default = np.zeros(size, dtype=np.int64)
+        self._dodging = np.zeros(size, dtype=bool)
+
+        # The room.
+        self._room_type = np.zeros(size, dtype=np.int64)
+        self._max_searches = np.zeros(size, dtype=np.int64)
+        self._times_searched = np.zeros(size, dtype=np.int64)
+        self._search_chance = np.zeros(size, dtype=np.float64)
+
+        # The battle, while there is one.
+        self._in_battle = np.zeros(size, dtype=bool)
+        self._battle_kind = np.zeros(size, dtype=np.int64)
+        self._monster_level = np.zeros(size, dtype=np.int64)
+        self._monster_hp = np.zeros(size, dtype=np.int64)
+        self._monster_damage = np.zeros(size, dtype=np.int64)
+        self._pained = np.zeros(size, dtype=bool)
+
+        # The army: a column per seat, in the order minions were raised, as
+        # in MinionRoster, and running counts of each role.
+        self._minion_count = np.zeros(size, dtype=np.int64)
+        self._attacking = np.zeros(size, dtype=np.int64)
+        self._defending = np.zeros(size, dtype=np.int64)
+        self._minion_role = np.zeros((size, 8), dtype=np.int8)
+        self._minion_hp = np.zeros((size, 8), dtype=np.int64)
+        self._minion_max_hp = np.zeros((size, 8), dtype=np.int64)
+        self._minion_damage = np.zeros((size, 8), dtype=np.int64)
+
+    def _load_tables(self) -> None:
+        """The word list sizes and loot tables the rolls depend on, with
+        room types numbered in the order of DungeonMaster.rooms."""
+
+        rooms = DungeonMaster.rooms
+        room_types = tuple(rooms)
+        self._adjective_count = len(DungeonMaster.adjectives)
+        self._monster_count = len(DungeonMaster.monsters)
+        self._special_count = len(room_types) - 1
+        self._room_name_counts = np.array([len(rooms[t]) for t in room_types])
+
+        tables = [loot.get_table(t).get_alias_table() for t in room_types]
+        width = max(len(items) for items, _, _ in tables)
+        self._loot_sizes = np.array([len(items) for items, _, _ in tables])
+        self._loot_items = np.zeros((len(tables), width), dtype=np.int64)
+        self._loot_chances = np.ones((len(tables), width))
+        self._loot_aliases = np.zeros((len(tables), width), dtype=np.int64)
+        for t, (items, chances, aliases) in enumerate(tables):
+            self._loot_items[t, : len(items)] = [loot.ITEMS.index(i) for i in items]
+            self._loot_chances[t, : len(items)] = chances
+            self._loot_aliases[t, : len(items)] = aliases
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def seed(self) -> int:
+        """The master seed of the last reset."""
+        return self._seed
+
+    @property
+    def seeds(self) -> tuple:
+        """The seed of the game in each row."""
+        return tuple(self._seeds)
+
+    @property
+    def games(self) -> int:
+        """Games started since the last reset."""
+        return self._games
+
+    @property
+    def phases(self) -> np.ndarray:
+        return self._phase.copy()
+
+    def reset(self, seed: int = None) -> np.ndarray:
+        """Start size new games from the master seed, or a random one.
+        Returns the first observations."""
+
+        if seed == None:
+            seed = random.getrandbits(64)
+
+        self._seed = seed
+        self._games = 0
+        if self._exact:
+            self._rolls = _StreamRolls(self._size)
+        else:
+            self._rolls = _GeneratorRolls(seed)
+
+        self._start(np.arange(self._size))
+        return self.observe()
+
+    def legal_actions(self) -> np.ndarray:
+        """A (size, len(ACTIONS)) array, True for the actions step() accepts
+        now from each game."""
+
+        phase = self._phase
+        battle = phase == BATTLE
+
+        legal = np.zeros((self._size, len(ACTIONS)), dtype=bool)
+        legal[phase == ROOM, :_BATTLE_START] = True
+        legal[battle, _INDEX["ATTACK"] : _INDEX["CAST_DEATH_BOLT"] + 1] = True
+        legal[:, _INDEX["CAST_BONE_SPIRIT"]] = battle & (self._souls > 0)
+        legal[:, _INDEX["DRINK_POTION"]] = battle & (self._potions > 0)
+        legal[:, _INDEX["COMMAND_MINION_ATTACK"]] = battle & (self._defending > 0)
+        legal[:, _INDEX["COMMAND_MINION_DEFEND"]] = battle & (self._attacking > 0)
+        legal[:, _INDEX["TRY_DODGE"]] = battle
+        legal[:, _INDEX["TRY_FLEE"]] = battle & (self._battle_kind != _FINAL_BOSS)
+        legal[phase == NECROMANCY, _NECROMANCY_START:_BEHAVIOR_START] = True
+        legal[phase == BEHAVIOR, _BEHAVIOR_START:] = True
+        return legal
+
+    def observe(self) -> np.ndarray:
+        """A (size, len(OBSERVATION)) array of every game as it stands."""
+
+        return self._observe(slice(None))
+
+    def _observe(self, rows) -> np.ndarray:
+        in_battle = self._in_battle[rows]
+        return np.stack(
+            (
+                self._phase[rows],
+                self._hp[rows],
+                self._max_hp[rows],
+                self._hunger[rows],
+                self._food[rows],
+                self._potions[rows],
+                self._souls[rows],
+                self._runes[rows],
+                self._doom[rows],
+                self._level[rows],
+                self._weapon[rows],
+                self._armor[rows],
+                self._attacking[rows],
+                self._defending[rows],
+                self._max_searches[rows] - self._times_searched[rows],
+                self._room_count[rows],
+                np.where(in_battle, self._monster_level[rows], 0),
+                np.where(in_battle, self._monster_hp[rows], 0),
+            ),
+            axis=1,
+        )
+
+    def step(self, actions) -> tuple:
+        """Take an action in every game: actions has an index into ACTIONS
+        per game, one legal_actions() allows.
+
+        Returns (observations, rewards, dones, info), an array of each.
+        """
+
+        if self._seed == None:
+            raise ValueError("Reset the environment before stepping it.")
+
+        actions = np.asarray(actions, dtype=np.int64)
+        if actions.shape != (self._size,):
+            raise ValueError(
+                f"Expected an action for each of {self._size} games: {actions.shape}"
+            )
+        known = (actions >= 0) & (actions < len(ACTIONS))
+        legal = self.legal_actions()[np.arange(self._size), np.where(known, actions, 0)]
+        if not (known & legal).all():
+            game = int(np.flatnonzero(~(known & legal))[0])
+            raise ValueError(f"Game {game} cannot take action {actions[game]} now.")
+
+        # The phase each game took its action in, as the actions move them on.
+        phase = self._phase.copy()
+        end_turn = []
+        advance = []
+        end_battle = []
+
+        def rows_of(phase_code: int, action: str) -> np.ndarray:
+            return np.flatnonzero((phase == phase_code) & (actions == _INDEX[action]))
+
+        # Every game takes its action...
+
+        end_turn.append(self._search(rows_of(ROOM, "SEARCH")))
+        rested, not_rested = self._rest(rows_of(ROOM, "REST"))
+        end_turn.append(rested)
+        advance.append(not_rested)
+        fights = rows_of(ROOM, "FIGHT")
+        end_turn.append(self._explore(rows_of(ROOM, "EXPLORE")))
+        rows = rows_of(ROOM, "ALL_ATTACK")
+        end_turn.append(self._manage_army(rows, self._defending[rows], _DEFENDING))
+        rows = rows_of(ROOM, "ALL_DEFEND")
+        end_turn.append(self._manage_army(rows, self._attacking[rows], _ATTACKING))
+        advance.append(self._drink_potion(rows_of(ROOM, "POTION")))
+        self._ending[rows_of(ROOM, "SURRENDER")] = _SURRENDER
+
+        end_battle.append(self._play_round(np.flatnonzero(phase == BATTLE), actions))
+        end_battle.append(self._butcher(rows_of(NECROMANCY, "BUTCHER")))
+        end_battle.append(self._raise_minion(rows_of(NECROMANCY, "RAISE")))
+        rows = np.flatnonzero(phase == BEHAVIOR)
+        then = self._then[rows]
+        self._answer_behavior(rows, actions[rows] - _BEHAVIOR_START)
+        end_turn.append(rows[then == _THEN_END_TURN])
+        end_battle.append(rows[then == _THEN_END_BATTLE])
+
+        # ...then on to its next decision.
+
+        then_end_turn, then_advance = self._end_battle(np.concatenate(end_battle))
+        end_turn.append(then_end_turn)
+        advance.append(then_advance)
+
+        rows = np.concatenate(end_turn)
+        self._end_turn(rows)
+        advance.append(rows)
+
+        self._advance(np.concatenate(advance))
+        self._start_battle(fights, _SELF)
+
+        self._steps += 1
+        going_on = self._ending == _GOING_ON
+        self._ending[going_on & (self._steps >= self._max_steps)] = _STALLED
+
+        endings = self._ending.copy()
+        dones = endings != _GOING_ON
+        rewards = np.where(dones & (endings != _STALLED), -1.0, 0.0)
+        rewards[endings == _VICTORY] = 1.0
+
+        final_observations = self.observe()
+        info = {"ending": endings, "final_observation": final_observations}
+        observations = final_observations
+        finished = np.flatnonzero(dones)
+        if len(finished) > 0:
+            self._start(finished)
+            observations = final_observations.copy()
+            observations[finished] = self._observe(finished)
+
+        return observations, rewards, dones, info
+
+    # Starting games
+
+    def _start(self, rows: np.ndarray) -> None:
+        """New games in rows, with the next seeds: as DungeonMaster.setup_player
+        and GameEngine's constructor, then on to the first decision."""
+
+        seeds = [
+            rng.derive_seed(self._seed, str(self._games + i)) for i in range(len(rows))
+        ]
+        self._games += len(rows)
+        for i, seed in zip(rows.tolist(), seeds):
+            self._seeds[i] = seed
+        self._rolls.start(rows, seeds)
+
+        variables = self._variables
+        self._phase[rows] = ROOM
+        self._steps[rows] = 0
+        self._ending[rows] = _GOING_ON
+
+        self._hp[rows] = variables.PLAYER_MAX_HP
+        self._max_hp[rows] = variables.PLAYER_MAX_HP
+        self._hunger[rows] = 0
+        self._food[rows] = variables.PLAYER_STARTING_FOOD
+        self._potions[rows] = variables.PLAYER_STARTING_POTIONS
+        self._souls[rows] = 0
+        self._runes[rows] = 0
+        self._doom[rows] = 0
+        self._level[rows] = 1
+        self._weapon[rows] = 1
+        self._armor[rows] = 0
+        self._default[rows] = _ASK
+        self._dodging[rows] = False
+
+        self._minion_count[rows] = 0
+        self._minion_role[rows] = _EMPTY
+        self._add_minion(rows, np.zeros(len(rows), dtype=bool))
+        self._update_minion_stats(rows)
+
+        self._room_count[rows] = 1
+        self._turns[rows] = 0
+        self._battles[rows] = 0
+        self._skip_hunger[rows] = False
+        self._in_battle[rows] = False
+        self._room_type[rows] = 0
+        self._roll_room_size(rows)
+
+        self._advance(rows)
+
+    # Room actions, as in GameEngine. Each returns the rows that go on to
+    # end the turn, or to the next decision without ending it.
+
+    def _search(self, rows: np.ndarray) -> np.ndarray:
+        exhausted = self._times_searched[rows] >= self._max_searches[rows]
+        self._skip_hunger[rows[exhausted]] = True
+        searching = rows[~exhausted]
+
+        # As Room.search.
+        rolls = self._rolls.randint("loot", searching, 0, 100)
+        found = searching[rolls < self._search_chance[searching]]
+        self._times_searched[searching] += 1
+
+        items = self._draw_loot(found)
+        self._weapon[found[items == loot.ITEMS.index("weapon")]] += 1
+        self._armor[found[items == loot.ITEMS.index("armor")]] += 1
+        self._potions[found[items == loot.ITEMS.index("potion")]] += 1
+        self._food[found[items == loot.ITEMS.index("food")]] += 1
+
+        # As DungeonMaster.add_generic_minion; the player is asked what the
+        # skeleton does before the turn ends.
+        skeletons = found[items == loot.ITEMS.index("skeleton")]
+        self._add_minion(skeletons, self._default[skeletons] == _ATTACK)
+        self._update_minion_stats(skeletons)
+        self._ask_behavior(skeletons[self._default[skeletons] == _ASK], _THEN_END_TURN)
+
+        return rows[self._phase[rows] != BEHAVIOR]
+
+    def _draw_loot(self, rows: np.ndarray) -> np.ndarray:
+        """As LootTable.draw, for the table of each row's room type."""
+
+        room_type = self._room_type[rows]
+        position = self._rolls.random("loot", rows) * self._loot_sizes[room_type]
+        column = position.astype(np.int64)
+        keep = position - column < self._loot_chances[room_type, column]
+        column = np.where(keep, column, self._loot_aliases[room_type, column])
+        return self._loot_items[room_type, column]
+
+    def _rest(self, rows: np.ndarray) -> tuple:
+        """Rest as long as is allowed. Returns the rows that rested, whose
+        turn ends, and those that could not, whose turn goes on."""
+
+        variables = self._variables
+        self._skip_hunger[rows] = True
+
+        hp = self._hp[rows]
+        max_hp = self._max_hp[rows]
+        hunger = self._hunger[rows]
+        can_rest = (hp < max_hp) & (hunger + variables.RESTING_HUNGER_RATE < 100)
+        resting = rows[can_rest]
+
+        hp, max_hp, hunger = hp[can_rest], max_hp[can_rest], hunger[can_rest]
+        hours = np.minimum((100 - hunger - 1) // 2, max_hp - hp)
+        allowed = (hours != 0) & (hours * 2 < 100 - hunger) & (hours <= max_hp - hp)
+        rested = resting[allowed]
+        hours = hours[allowed]
+        self._set_hp(rested, self._hp[rested] + hours)
+        self._hunger[rested] += hours * 2
+        self._increase_doom(rested)
+
+        return resting, rows[~can_rest]
+
+    def _explore(self, rows: np.ndarray) -> np.ndarray:
+        self._room_count[rows] += 1
+        self._generate_room(rows)
+
+        # As DungeonMaster.find_rune.
+        here = self._room_count[rows, None] == self._rune_rooms
+        self._runes[rows] += here.sum(axis=1)
+        return rows
+
+    def _manage_army(
+        self, rows: np.ndarray, counts: np.ndarray, role: int
+    ) -> np.ndarray:
+        """Move counts minions of role to the other role."""
+
+        other = _ATTACKING if role == _DEFENDING else _DEFENDING
+        self._command(rows, counts, role, other)
+        self._skip_hunger[rows] = True
+        return rows
+
+    def _drink_potion(self, rows: np.ndarray) -> np.ndarray:
+        self._skip_hunger[rows] = True
+        drinking = rows[self._potions[rows] > 0]
+        self._potions[drinking] -= 1
+        self._set_hp(drinking, self._hp[drinking] + self._variables.POTION_VALUE)
+        return rows
+
+    # Battles, as in BattleEngine
+
+    def _play_round(self, rows: np.ndarray, actions: np.ndarray) -> np.ndarray:
+        """One round of every battle in rows. Battles that go on begin their
+        next round, and those won against a monster go on to necromancy.
+        Returns the rows whose battle is over otherwise."""
+
+        variables = self._variables
+        choice = actions[rows]
+        weapon = self._weapon[rows]
+        final = self._battle_kind[rows] == _FINAL_BOSS
+
+        def chose(name: str) -> np.ndarray:
+            return choice == _INDEX[name]
+
+        # The player's choice resolves.
+
+        damage = np.zeros(len(rows), dtype=np.int64)
+        damage[chose("ATTACK")] = weapon[chose("ATTACK")]
+
+        pain = chose("CAST_PAIN")
+        damage[pain] = np.where(
+            weapon[pain] == 1,
+            0,
+            _spell_damage(weapon[pain], variables.SPELL_PAIN_RATIO),
+        )
+        self._pained[rows[pain]] = True
+
+        touch = chose("CAST_VAMPIRIC_TOUCH")
+        damage[touch] = np.where(
+            weapon[touch] == 1,
+            1,
+            _spell_damage(weapon[touch], variables.SPELL_VAMPIRIC_TOUCH_RATIO),
+        )
+        self._set_hp(rows[touch], self._hp[rows[touch]] + damage[touch])
+
+        bolt = chose("CAST_DEATH_BOLT")
+        damage[bolt] = _spell_damage(weapon[bolt], variables.SPELL_DEATH_BOLT_RATIO)
+        self._set_hp(rows[bolt], self._hp[rows[bolt]] - weapon[bolt])
+
+        spirit = chose("CAST_BONE_SPIRIT")
+        self._souls[rows[spirit]] -= 1
+        repelled = spirit & final
+        damage[repelled] = (
+            self._level[rows[repelled]] + weapon[repelled] + self._souls[rows[repelled]]
+        )
+        self._monster_hp[rows] -= damage
+
+        drinking = rows[chose("DRINK_POTION")]
+        self._potions[drinking] -= 1
+        self._set_hp(drinking, self._hp[drinking] + variables.POTION_VALUE)
+
+        commanded = rows[chose("COMMAND_MINION_ATTACK")]
+        self._command(commanded, np.ones_like(commanded), _DEFENDING, _ATTACKING)
+        commanded = rows[chose("COMMAND_MINION_DEFEND")]
+        self._command(commanded, np.ones_like(commanded), _ATTACKING, _DEFENDING)
+
+        self._dodging[rows[chose("TRY_DODGE")]] = True
+
+        flee = chose("TRY_FLEE")
+        fled = np.zeros(len(rows), dtype=bool)
+        chance = variables.FLEE_BASE_CHANCE + (
+            self._level[rows[flee]] - self._monster_level[rows[flee]]
+        ) * variables.FLEE_LEVEL_VARIANCE
+        fled[flee] = self._rolls.randint("combat", rows[flee], 0, 100) < chance
+
+        # A Bone Spirit kills any monster but the Runekeeper outright, and
+        # a battle fled is over.
+
+        won = spirit & ~final
+        self._do_victory(rows[won], soul=False)
+        self._heal_minions(rows[fled])
+        over = won | fled
+
+        # The monster may fall to the player, then to the attacking minions,
+        # and otherwise strikes back.
+
+        slain = ~over & (self._monster_hp[rows] <= 0)
+        self._do_victory(rows[slain], soul=True)
+        won |= slain
+        over |= slain
+
+        fighting = rows[~over]
+        self._monster_hp[fighting] -= self._get_minion_damage(fighting)
+        slain = ~over & (self._monster_hp[rows] <= 0)
+        self._do_victory(rows[slain], soul=True)
+        won |= slain
+        over |= slain
+
+        self._do_monster_attack(rows[~over])
+        over |= self._hp[rows] <= 0
+
+        # As BattleEngine.begin_round, for the battles that go on.
+        going_on = rows[~over]
+        self._dodging[going_on] = False
+        self._pained[going_on] = False
+
+        necromancy = won & ~final
+        self._phase[rows[necromancy]] = NECROMANCY
+        return rows[over & ~necromancy]
+
+    def _get_minion_damage(self, rows: np.ndarray) -> np.ndarray:
+        attacking = self._minion_role[rows] == _ATTACKING
+        damage = np.where(attacking, self._minion_damage[rows], 0).sum(axis=1)
+
+        # As BattleEngine.do_minion_damage, a lone attacker hits with the
+        # damage of the first minion in the army, whichever that is.
+        lone = self._attacking[rows] == 1
+        damage[lone] = self._minion_damage[rows[lone], 0]
+        return damage
+
+    def _do_monster_attack(self, rows: np.ndarray) -> None:
+        variables = self._variables
+
+        damage = self._monster_damage[rows]
+        pained = self._pained[rows]
+        reduced = damage[pained] / variables.SPELL_PAIN_RATIO
+        damage[pained] = np.where(reduced < 1, 0, np.rint(reduced))
+
+        # A pained monster that can do no damage falters.
+        strikes = ~pained | (damage != 0)
+        rows = rows[strikes]
+        damage = damage[strikes] - self._armor[rows]
+
+        guarded = (damage > 0) & (self._defending[rows] > 0)
+        damage[guarded] = self._absorb(rows[guarded], damage[guarded])
+
+        hit = damage > 0
+        rows = rows[hit]
+        damage = damage[hit]
+
+        dodging = self._dodging[rows]
+        dodged = np.zeros(len(rows), dtype=bool)
+        chance = variables.DODGE_BASE_CHANCE - (
+            self._monster_level[rows[dodging]] - self._level[rows[dodging]]
+        ) * variables.DODGE_LEVEL_VARIANCE
+        dodged[dodging] = self._rolls.randint("combat", rows[dodging], 0, 100) < chance
+
+        struck = rows[~dodged]
+        self._set_hp(struck, self._hp[struck] - damage[~dodged])
+
+    def _do_victory(self, rows: np.ndarray, soul: bool) -> None:
+        if soul:
+            self._souls[rows] += 1
+        self._level[rows] += 1
+        self._max_hp[rows] += 1
+        self._doom[rows] = 0
+        self._heal_minions(rows)
+
+    def _start_battle(self, rows: np.ndarray, kind: int) -> None:
+        """As GameEngine.spawn_monster, then the first round begins."""
+
+        variables = self._variables
+        self._battles[rows] += 1
+
+        if kind == _FINAL_BOSS:
+            # As DungeonMaster.generate_final_boss.
+            level = np.rint(
+                (self._level[rows] + variables.FINAL_BOSS_ADDITIONAL_LEVELS)
+                * variables.FINAL_BOSS_LEVEL_MULTIPLIER
+            )
+        else:
+            level = self._roll_monster_level(rows)
+        level = np.maximum(level.astype(np.int64), 1)
+
+        self._in_battle[rows] = True
+        self._battle_kind[rows] = kind
+        self._monster_level[rows] = level
+        self._monster_hp[rows] = level * _MONSTER_HEALTH_RATIO
+        self._monster_damage[rows] = level * _MONSTER_DAMAGE_RATIO
+        self._phase[rows] = BATTLE
+        self._dodging[rows] = False
+        self._pained[rows] = False
+
+    def _roll_monster_level(self, rows: np.ndarray) -> np.ndarray:
+        """As DungeonMaster.generate_monster."""
+
+        variables = self._variables
+        self._rolls.draw_name("monster", rows, self._adjective_count)
+        self._rolls.draw_name("monster", rows, self._monster_count)
+
+        roll = self._rolls.randint("monster", rows, 0, 100)
+        level = self._level[rows]
+        return np.select(
+            (
+                roll < variables.LEVEL_TIER2_CHANCE,
+                roll < variables.LEVEL_TIER1_CHANCE,
+                roll < 100 - variables.LEVEL_TIER1_CHANCE,
+                roll < 100 - variables.LEVEL_TIER2_CHANCE,
+            ),
+            (
+                level - variables.LEVEL_TIER2_DIFF,
+                level - variables.LEVEL_TIER1_DIFF,
+                level,
+                level + 1,
+            ),
+            level + 2,
+        )
+
+    # Necromancy and new minions
+
+    def _butcher(self, rows: np.ndarray) -> np.ndarray:
+        self._food[rows] += 1
+        return rows
+
+    def _raise_minion(self, rows: np.ndarray) -> np.ndarray:
+        """Returns the rows whose battle is over; the others are asked what
+        the new minion does first."""
+
+        default = self._default[rows]
+        self._add_minion(rows, default == _ATTACK)
+        self._ask_behavior(rows[default == _ASK], _THEN_END_BATTLE)
+        return rows[default != _ASK]
+
+    def _ask_behavior(self, rows: np.ndarray, then: int) -> None:
+        """The newest minion defends until it is told otherwise."""
+
+        self._phase[rows] = BEHAVIOR
+        self._then[rows] = then
+
+    def _answer_behavior(self, rows: np.ndarray, answers: np.ndarray) -> None:
+        """As Player.answer_minion_behavior, with answers indexes into
+        Player.BEHAVIOR_ANSWERS."""
+
+        names = Player.BEHAVIOR_ANSWERS
+        self._default[rows[answers == names.index("always_attack")]] = _ATTACK
+        self._default[rows[answers == names.index("always_defend")]] = _DEFEND
+
+        attack = (answers == names.index("attack")) | (
+            answers == names.index("always_attack")
+        )
+        rows = rows[attack]
+        self._minion_role[rows, self._minion_count[rows] - 1] = _ATTACKING
+        self._count_minions(rows)
+
+    # Moving on
+
+    def _end_battle(self, rows: np.ndarray) -> tuple:
+        """As GameEngine.finish_battle. Returns the rows whose turn ends,
+        after a fight the player picked, and those that go on to the next
+        decision."""
+
+        self._in_battle[rows] = False
+        dead = self._hp[rows] <= 0
+        final = self._battle_kind[rows] == _FINAL_BOSS
+
+        self._ending[rows[final]] = np.where(dead[final], _DAMAGE, _VICTORY)
+        self._doom[rows[~final]] = 0
+        self._ending[rows[~final & dead]] = _DAMAGE
+
+        picked = (self._battle_kind[rows] == _SELF) & (self._ending[rows] == _GOING_ON)
+        return rows[picked], rows[~picked]
+
+    def _end_turn(self, rows: np.ndarray) -> None:
+        """As GameEngine.end_turn."""
+
+        variables = self._variables
+        self._turns[rows] += 1
+        self._update_minion_stats(rows)
+
+        skip = self._skip_hunger[rows]
+        self._skip_hunger[rows] = False
+        rows = rows[~skip]
+
+        hunger = self._hunger[rows] + variables.HUNGER_RATE
+        eating = (hunger >= variables.FOOD_VALUE) & (self._food[rows] > 0)
+        self._food[rows[eating]] -= 1
+        hunger[eating] -= variables.FOOD_VALUE
+        self._hunger[rows] = hunger
+
+        starved = hunger >= 100
+        self._ending[rows[starved]] = _STARVATION
+        self._increase_doom(rows[~starved])
+
+    def _advance(self, rows: np.ndarray) -> None:
+        """On to the next decision: a battle that must be fought, if there
+        is one, or else the next room action."""
+
+        self._phase[rows] = ROOM
+        rows = rows[self._ending[rows] == _GOING_ON]
+
+        final = self._room_count[rows] == self._length
+        doom = ~final & (self._doom[rows] >= self._variables.MAX_DOOM)
+        self._start_battle(rows[final], _FINAL_BOSS)
+        self._start_battle(rows[doom], _DOOM)
+
+    # The dungeon, as in DungeonMaster and Room
+
+    def _generate_room(self, rows: np.ndarray) -> None:
+        rolls = self._rolls
+        rolls.draw_name("room", rows, self._adjective_count)
+
+        roll = rolls.randint("room", rows, 0, 100)
+        room_type = np.zeros(len(rows), dtype=np.int64)
+        if self._special_count > 0:
+            special = roll >= self._variables.ROOM_GENERIC_CHANCE
+            room_type[special] = 1 + rolls.choice(
+                "room", rows[special], self._special_count
+            )
+        rolls.draw_name("room", rows, self._room_name_counts[room_type])
+
+        self._room_type[rows] = room_type
+        self._roll_room_size(rows)
+
+    def _roll_room_size(self, rows: np.ndarray) -> None:
+        variables = self._variables
+        chance = variables.ROOM_SIZE_DIFFERENCE_CHANCE
+
+        roll = self._rolls.randint("room", rows, 0, 100)
+        size = np.where(
+            roll < chance,
+            variables.ROOM_MIN_SEARCHES,
+            np.where(
+                roll >= 100 - chance,
+                variables.ROOM_MAX_SEARCHES,
+                variables.ROOM_AVG_SEARCHES,
+            ),
+        )
+        self._max_searches[rows] = size
+        self._times_searched[rows] = 0
+        self._search_chance[rows] = variables.ROOM_BASE_SEARCH_CHANCE
+
+    def _increase_doom(self, rows: np.ndarray) -> None:
+        variance = self._variables.DOOM_VARIANCE
+        self._doom[rows] += self._rolls.randint("doom", rows, 0, variance)
+
+    def _set_hp(self, rows: np.ndarray, hp: np.ndarray) -> None:
+        """As the Player.hp setter, which keeps it within 0 and max_hp."""
+
+        self._hp[rows] = np.clip(hp, 0, self._max_hp[rows])
+
+    # The army, as in MinionRoster
+
+    def _add_minion(self, rows: np.ndarray, attacking: np.ndarray) -> None:
+        """A fresh minion at 1 HP and 1 damage in the next seat of each row."""
+
+        seats = self._minion_count[rows]
+        if len(rows) > 0 and seats.max() >= self._minion_role.shape[1]:
+            self._grow(int(seats.max()) + 1)
+
+        self._minion_role[rows, seats] = np.where(attacking, _ATTACKING, _DEFENDING)
+        self._minion_hp[rows, seats] = 1
+        self._minion_max_hp[rows, seats] = 1
+        self._minion_damage[rows, seats] = 1
+        self._minion_count[rows] += 1
+        self._attacking[rows] += attacking
+        self._defending[rows] += ~attacking
+
+    def _grow(self, seats: int) -> None:
+        """Room for at least seats minions in every row."""
+
+        capacity = max(seats, 2 * self._minion_role.shape[1])
+        for name in ("_minion_role", "_minion_hp", "_minion_max_hp", "_minion_damage"):
+            old = getattr(self, name)
+            new = np.zeros((self._size, capacity), dtype=old.dtype)
+            new[:, : old.shape[1]] = old
+            setattr(self, name, new)
+
+    def _update_minion_stats(self, rows: np.ndarray) -> None:
+        """As DungeonMaster.update_minion_stats: every minion gets the HP
+        of the player's armor and the damage of their weapon."""
+
+        variables = self._variables
+        armor = self._armor[rows]
+        defense = np.where(
+            armor == 0, 1, np.ceil(armor / variables.MINION_ARMOR_RATIO)
+        ).astype(np.int64)
+        attack = np.ceil(self._weapon[rows] / variables.MINION_DAMAGE_RATIO)
+
+        self._minion_hp[rows] = defense[:, None]
+        self._minion_max_hp[rows] = defense[:, None]
+        self._minion_damage[rows] = attack.astype(np.int64)[:, None]
+        self._count_minions(rows)
+
+    def _heal_minions(self, rows: np.ndarray) -> None:
+        self._minion_hp[rows] = self._minion_max_hp[rows]
+        self._count_minions(rows)
+
+    def _command(
+        self, rows: np.ndarray, counts: np.ndarray, role: int, new_role: int
+    ) -> None:
+        """Move the first counts minions of role to new_role, standing or
+        not, as MinionRoster.command_attack and command_defend do."""
+
+        roles = self._minion_role[rows]
+        members = roles == role
+        moved = members & (np.cumsum(members, axis=1) <= counts[:, None])
+        roles[moved] = new_role
+        self._minion_role[rows] = roles
+        self._count_minions(rows)
+
+    def _absorb(self, rows: np.ndarray, damage: np.ndarray) -> np.ndarray:
+        """As MinionRoster.absorb: each standing defender, in seat order,
+        loses what is left of the blow. Returns the damage that got
+        through."""
+
+        hp = self._minion_hp[rows]
+        standing = (self._minion_role[rows] == _DEFENDING) & (hp > 0)
+        shares = np.where(standing, hp, 0)
+        left = damage[:, None] - (np.cumsum(shares, axis=1) - shares)
+        hit = standing & (left > 0)
+
+        self._minion_hp[rows] = np.where(hit, hp - left, hp)
+        self._count_minions(rows)
+        return np.maximum(damage - shares.sum(axis=1), 0)
+
+    def _count_minions(self, rows: np.ndarray) -> None:
+        roles = self._minion_role[rows]
+        standing = (roles == _DEFENDING) & (self._minion_hp[rows] > 0)
+        self._attacking[rows] = (roles == _ATTACKING).sum(axis=1)
+        self._defending[rows] = standing.sum(axis=1)
+
+
+def _spell_damage(weapon: np.ndarray, ratio) -> np.ndarray:
+    """As BattleEngine._get_spell_damage: never less than 1."""
+
+    return np.maximum(np.rint(weapon / ratio), 1).astype(np.int64)
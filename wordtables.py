@@ -0,0 +1,105 @@
+"""The word lists that room and monster names are made from, loaded once
+for the whole process.
+
+    tables = wordtables.load()
+    tables.rooms["kitchen"]    # ("kitchen", "galley", "butchery", ...)
+
+Every list is a tuple of interned strings, so all the games in a process
+share the same, unchangeable objects. A file is only read again once its
+modification time changes. Checking that takes a stat of every file, so
+load() checks at most once every RECHECK_SECONDS; in between, it hands out
+the tables it has without touching the disk.
+"""
+
+import os
+import sys
+import time
+import types
+
+DATA_DIR = "data"
+
+# The room types of the game itself; loot.get_room_types() has any others.
+ROOM_TYPES = ("generic", "armory", "kitchen", "workshop")
+
+# How long tables are handed out before the files are checked again.
+RECHECK_SECONDS = 1.0
+
+
+class WordTables:
+    """The adjectives, the monster names and the room names by room type."""
+
+    __slots__ = ("_adjectives", "_monsters", "_rooms")
+
+    def __init__(self, adjectives: tuple, monsters: tuple, rooms: dict):
+        self._adjectives = adjectives
+        self._monsters = monsters
+        self._rooms = types.MappingProxyType(rooms)
+
+    @property
+    def adjectives(self) -> tuple:
+        return self._adjectives
+
+    @property
+    def monsters(self) -> tuple:
+        return self._monsters
+
+    @property
+    def rooms(self) -> types.MappingProxyType:
+        """A read-only dict of room names by room type."""
+        return self._rooms
+
+
+# The words of every file read so far, with its modification time and size,
+# by path.
+_files = {}
+
+# The tables loaded so far, with when their files were last checked, by
+# directory and room types.
+_tables = {}
+
+
+def load(directory: str = DATA_DIR, room_types: tuple = ROOM_TYPES) -> WordTables:
+    """The word tables of directory, read from disk only if they changed.
+
+    There must be a rooms_<type>.txt of names for each of room_types.
+    """
+
+    now = time.monotonic()
+    key = (directory, room_types)
+    checked_at, tables = _tables.get(key, (None, None))
+    if checked_at != None and now - checked_at < RECHECK_SECONDS:
+        return tables
+
+    adjectives = _load_words(os.path.join(directory, "adjectives.txt"))
+    monsters = _load_words(os.path.join(directory, "monsters.txt"))
+    rooms = {
+        room_type: _load_words(os.path.join(directory, f"rooms_{room_type}.txt"))
+        for room_type in room_types
+    }
+
+    # Unchanged files give the very same tuples, and the same tables.
+    if (
+        tables == None
+        or tables.adjectives is not adjectives
+        or tables.monsters is not monsters
+        or any(tables.rooms[t] is not rooms[t] for t in room_types)
+    ):
+        tables = WordTables(adjectives, monsters, rooms)
+
+    _tables[key] = (now, tables)
+    return tables
+
+
+def _load_words(path: str) -> tuple:
+    # The size as well, for changes too quick for the clock to tell apart.
+    status = os.stat(path)
+    version = (status.st_mtime_ns, status.st_size)
+
+    cached = _files.get(path)
+    if cached != None and cached[0] == version:
+        return cached[1]
+
+    with open(path) as f:
+        words = tuple(sys.intern(line.strip()) for line in f)
+    _files[path] = (version, words)
+    return words